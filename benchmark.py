@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Synthetische Eingaben und Laufzeit-Benchmark für Validator und Planer.
+
+generate: erzeugt reproduzierbar (Seed) große Testdaten.csv und einen passenden Plan:
+tausende Abteilungen, dichte, sich überlappende Verhinderungen, viele Lieblingstage und
+mehrjährige Pläne (Plan per generate_plan, also realistisch verteilt).
+
+run: misst je Größenstufe die Phasen der Validierung (Einlesen, Durchlauf mit Basischecks und
+Zählungen, Quoten, rollierende Fenster, Abstände, Exporte) sowie die Planer (Greedy, auf kleinen
+Stufen auch Min-Cost-Flow) und schreibt die Zeiten als JSON und CSV. Mit --baseline wird gegen
+einen früheren Lauf verglichen; Phasen, die um mehr als --tolerance langsamer sind, gelten als
+Regression (Exit-Code 2).
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from calendar_service import working_days_between
+from generate_plan import generate_plan, write_plan_csv
+from validate_plan import (
+	GERMAN_WEEKDAYS,
+	format_date_de,
+	iter_plan_rows,
+	parse_abteilungen_csv,
+	print_report,
+	validate,
+	write_csv_reports,
+	write_markdown_report,
+)
+
+
+class Tier(NamedTuple):
+	name: str
+	abteilungen: int
+	jahre: int
+	solver: bool  # Min-Cost-Flow mitmessen (nur auf kleinen Stufen praktikabel)
+
+
+TIERS = {
+	'small': Tier('small', 50, 1, True),
+	'medium': Tier('medium', 500, 2, False),
+	'large': Tier('large', 2000, 3, False),
+	'xlarge': Tier('xlarge', 5000, 5, False),
+}
+DEFAULT_TIERS = ('small', 'medium', 'large')
+DEFAULT_TOLERANCE = 0.25
+PENSEN = ('25%', '50%', '60%', '75%', '80%', '100%')
+
+
+def synthetic_testdaten_lines(n: int, years: int, seed: int, blocks_per_year: int = 6, max_block_days: int = 21) -> List[str]:
+	"""Testdaten-Zeilen (mit Kopfzeile): je Abteilung bis zu 4 Lieblingstage und im Mittel
+	blocks_per_year Verhinderungen pro Jahr (Zeiträume bis max_block_days, teils überlappend)."""
+	rng = random.Random(seed)
+	start = date(2026, 1, 1)
+	span = (date(2026 + years, 1, 1) - start).days
+	lines = ['Abteilung;Jahrespensen;Lieblingstage;Verhinderungen']
+	for num in range(1, n + 1):
+		favs = rng.sample(GERMAN_WEEKDAYS[:5], rng.randint(0, 4))
+		tokens = []
+		for _ in range(rng.randint(0, 2 * blocks_per_year) * years):
+			first = start + timedelta(days=rng.randrange(span))
+			length = rng.randint(0, max_block_days)
+			if length == 0:
+				tokens.append(format_date_de(first))
+			else:
+				tokens.append(f"{format_date_de(first)}-{format_date_de(first + timedelta(days=length))}")
+		lines.append(f"{num};{rng.choice(PENSEN)};{', '.join(favs)};{', '.join(tokens)}")
+	return lines
+
+
+def generate_inputs(out_dir: str, n: int, years: int, seed: int) -> Tuple[str, str]:
+	"""Schreibt Testdaten.csv und Jahresdienstplan.csv nach out_dir; liefert die beiden Pfade."""
+	os.makedirs(out_dir, exist_ok=True)
+	testdaten = os.path.join(out_dir, 'Testdaten.csv')
+	with open(testdaten, 'w', newline='', encoding='utf-8') as f:
+		f.write('\n'.join(synthetic_testdaten_lines(n, years, seed)) + '\n')
+	plan_path = os.path.join(out_dir, 'Jahresdienstplan.csv')
+	write_plan_csv(plan_path, generate_plan(parse_abteilungen_csv(testdaten), working_days_between(2026, 2025 + years)))
+	return testdaten, plan_path
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> Tuple[float, object]:
+	"""Beste von repeat Messungen (Sekunden) und das Ergebnis des letzten Aufrufs."""
+	best = float('inf')
+	value = None
+	for _ in range(repeat):
+		started = time.perf_counter()
+		value = fn()
+		best = min(best, time.perf_counter() - started)
+	return best, value
+
+
+def run_tier(tier: Tier, seed: int, repeat: int, work_dir: str, backend: str = 'python') -> List[Dict]:
+	rows: List[Dict] = []
+
+	def record(phase: str, seconds: float) -> None:
+		rows.append({'tier': tier.name, 'abteilungen': tier.abteilungen, 'jahre': tier.jahre, 'phase': phase, 'sekunden': round(seconds, 6)})
+
+	tier_dir = os.path.join(work_dir, tier.name)
+	started = time.perf_counter()
+	testdaten, plan_path = generate_inputs(tier_dir, tier.abteilungen, tier.jahre, seed)
+	print(f"== {tier.name}: {tier.abteilungen} Abteilungen, {tier.jahre} Jahr(e) (Eingaben in {time.perf_counter() - started:.1f}s erzeugt)", flush=True)
+
+	seconds, abteilungen = _timed(lambda: parse_abteilungen_csv(testdaten), repeat)
+	record('einlesen_testdaten', seconds)
+	seconds, plan_rows = _timed(lambda: list(iter_plan_rows(plan_path)), repeat)
+	record('einlesen_plan', seconds)
+
+	phases: Dict[str, float] = {}
+	result = None
+	for _ in range(repeat):
+		timings: Dict[str, float] = {}
+		started = time.perf_counter()
+		result = validate(plan_rows, abteilungen, backend=backend, timings=timings)
+		timings['validierung_gesamt'] = time.perf_counter() - started
+		for phase, value in timings.items():
+			phases[phase] = min(phases.get(phase, float('inf')), value)
+	for phase, value in phases.items():
+		record(phase, value)
+
+	out_dir = os.path.join(tier_dir, 'reports')
+	record('export_konsole', _timed(lambda: print_report(result, io.StringIO()), repeat)[0])
+	record('export_csv', _timed(lambda: write_csv_reports(result, out_dir), repeat)[0])
+	record('export_markdown', _timed(lambda: write_markdown_report(result, out_dir), repeat)[0])
+
+	days = working_days_between(2026, 2025 + tier.jahre)
+	record('planer_greedy', _timed(lambda: generate_plan(abteilungen, days), repeat)[0])
+	if tier.solver:
+		from solve_plan import solve_plan
+		record('planer_mincostflow', _timed(lambda: solve_plan(abteilungen, days), 1)[0])
+
+	for r in rows:
+		print(f"- {r['phase']:<20} {r['sekunden'] * 1000:>10.1f} ms")
+	return rows
+
+
+def write_results(path: str, rows: List[Dict], meta: Dict) -> List[str]:
+	"""Schreibt <path>.json (mit Metadaten) und <path>.csv; path ohne Endung."""
+	base = path[:-5] if path.endswith('.json') else path
+	os.makedirs(os.path.dirname(os.path.abspath(base)), exist_ok=True)
+	with open(base + '.json', 'w', encoding='utf-8') as f:
+		json.dump({'meta': meta, 'results': rows}, f, ensure_ascii=False, indent=2)
+	with open(base + '.csv', 'w', newline='', encoding='utf-8') as f:
+		w = csv.writer(f, delimiter=';')
+		w.writerow(['Stufe', 'Abteilungen', 'Jahre', 'Phase', 'Sekunden'])
+		for r in rows:
+			w.writerow([r['tier'], r['abteilungen'], r['jahre'], r['phase'], r['sekunden']])
+	return [base + '.json', base + '.csv']
+
+
+def compare(rows: List[Dict], baseline_path: str, tolerance: float, min_seconds: float = 0.005) -> int:
+	"""Vergleicht mit einem früheren Lauf; liefert die Zahl der Regressionen.
+
+	Phasen unter min_seconds werden wegen Messrauschen nicht als Regression gewertet.
+	"""
+	with open(baseline_path, encoding='utf-8') as f:
+		baseline = {(r['tier'], r['phase']): r['sekunden'] for r in json.load(f)['results']}
+	regressions = 0
+	print(f"\nVergleich mit {baseline_path} (Toleranz {tolerance:.0%}):")
+	for r in rows:
+		old = baseline.get((r['tier'], r['phase']))
+		if old is None:
+			continue
+		ratio = r['sekunden'] / old if old > 0 else float('inf')
+		flag = ''
+		if ratio > 1 + tolerance and r['sekunden'] >= min_seconds:
+			flag = '  << REGRESSION'
+			regressions += 1
+		print(f"- {r['tier']:<7} {r['phase']:<20} {old * 1000:>9.1f} -> {r['sekunden'] * 1000:>9.1f} ms ({ratio:.2f}x){flag}")
+	print(f"{regressions} Regression(en)")
+	return regressions
+
+
+def main_run(tiers: List[str], seed: int, repeat: int, out: Optional[str], baseline: Optional[str], tolerance: float, backend: str, work_dir: Optional[str]) -> int:
+	rows: List[Dict] = []
+	with tempfile.TemporaryDirectory(prefix='dienstplan-bench-') as tmp:
+		for name in tiers:
+			rows.extend(run_tier(TIERS[name], seed, repeat, work_dir or tmp, backend))
+	meta = {
+		'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'seed': seed,
+		'repeat': repeat,
+		'backend': backend,
+	}
+	if out:
+		print(f"\nErgebnisse gespeichert: {', '.join(write_results(out, rows, meta))}")
+	if baseline:
+		return 2 if compare(rows, baseline, tolerance) else 0
+	return 0
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Synthetische Eingaben und Benchmark für Validator und Planer')
+	sub = parser.add_subparsers(dest='cmd', required=True)
+
+	p_gen = sub.add_parser('generate', help='Synthetische Testdaten.csv und Plan erzeugen')
+	p_gen.add_argument('--depts', type=int, default=1000, help='Anzahl Abteilungen')
+	p_gen.add_argument('--years', type=int, default=1, help='Planjahre ab 2026')
+	p_gen.add_argument('--seed', type=int, default=0)
+	p_gen.add_argument('--out-dir', required=True, help='Zielordner')
+
+	p_run = sub.add_parser('run', help='Benchmark über Größenstufen')
+	p_run.add_argument('--tiers', default=','.join(DEFAULT_TIERS), help=f"Stufen, kommagetrennt ({', '.join(f'{t.name}={t.abteilungen}x{t.jahre}J' for t in TIERS.values())})")
+	p_run.add_argument('--seed', type=int, default=0)
+	p_run.add_argument('--repeat', type=int, default=3, help='Wiederholungen je Phase (gewertet wird die schnellste)')
+	p_run.add_argument('--backend', choices=('python', 'numpy'), default='python')
+	p_run.add_argument('--out', default=None, help='Ergebnisdatei ohne Endung (schreibt .json und .csv)')
+	p_run.add_argument('--baseline', default=None, help='Früherer Lauf (.json) zum Vergleich')
+	p_run.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Erlaubte Verlangsamung je Phase (0.25 = 25%%)')
+	p_run.add_argument('--work-dir', default=None, help='Eingaben/Exporte hier behalten statt in einem temporären Ordner')
+
+	args = parser.parse_args()
+	if args.cmd == 'generate':
+		paths = generate_inputs(args.out_dir, args.depts, args.years, args.seed)
+		print(f"Erzeugt: {', '.join(paths)}")
+		sys.exit(0)
+	tier_names = [t.strip() for t in args.tiers.split(',') if t.strip()]
+	unknown = [t for t in tier_names if t not in TIERS]
+	if unknown:
+		parser.error(f"Unbekannte Stufe(n): {', '.join(unknown)}")
+	sys.exit(main_run(tier_names, args.seed, args.repeat, args.out, args.baseline, args.tolerance, args.backend, args.work_dir))
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Kalenderdienst: Feiertage und Arbeitstage für beliebige Jahre (Standard: Berlin).
+
+Je (Jahr, Bundesland) wird einmal ein kompakter Kalender aufgebaut:
+- day_index: Tag im Jahr (0-basiert) -> Arbeitstag-Index oder -1 (Wochenende/Feiertag)
+- working_ordinals: Arbeitstag-Index -> date.toordinal()
+- month_starts: Arbeitstag-Index, an dem Monat 1..12 beginnt (plus Endmarke)
+Kalender werden im Prozess memoisiert und auf Wunsch als JSON in einem Cache-Ordner abgelegt
+(cache_dir-Parameter oder Umgebungsvariable DIENSTPLAN_CALENDAR_CACHE).
+"""
+import hashlib
+import json
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+CACHE_ENV = 'DIENSTPLAN_CALENDAR_CACHE'
+CACHE_VERSION = 1
+SUPPORTED_STATES = ('BE',)
+
+_calendars: Dict[Tuple[int, str], 'WorkingCalendar'] = {}
+
+
+def easter_sunday(year: int) -> date:
+	"""Ostersonntag (gregorianisch, Algorithmus nach Meeus/Jones/Butcher)."""
+	a = year % 19
+	b, c = divmod(year, 100)
+	d, e = divmod(b, 4)
+	f = (b + 8) // 25
+	g = (b - f + 1) // 3
+	h = (19 * a + b - d - g + 15) % 30
+	i, k = divmod(c, 4)
+	l = (32 + 2 * e + 2 * i - h - k) % 7
+	m = (a + 11 * h + 22 * l) // 451
+	month, day = divmod(h + l - 7 * m + 114, 31)
+	return date(year, month, day + 1)
+
+
+def berlin_holidays(year: int) -> List[date]:
+	"""Gesetzliche Feiertage in Berlin (inkl. Frauentag seit 2019 und einmaliger Feiertage)."""
+	easter = easter_sunday(year)
+	days = [
+		date(year, 1, 1),                # Neujahr
+		easter - timedelta(days=2),      # Karfreitag
+		easter + timedelta(days=1),      # Ostermontag
+		date(year, 5, 1),                # Tag der Arbeit
+		easter + timedelta(days=39),     # Christi Himmelfahrt
+		easter + timedelta(days=50),     # Pfingstmontag
+		date(year, 10, 3),               # Tag der Deutschen Einheit
+		date(year, 12, 25),              # 1. Weihnachtstag
+		date(year, 12, 26),              # 2. Weihnachtstag
+	]
+	if year >= 2019:
+		days.append(date(year, 3, 8))    # Internationaler Frauentag (Berlin)
+	if year in (2020, 2025):
+		days.append(date(year, 5, 8))    # Tag der Befreiung (einmalig)
+	return sorted(days)
+
+
+def holidays_for(year: int, state: str = 'BE') -> List[date]:
+	if state not in SUPPORTED_STATES:
+		raise ValueError(f"Bundesland nicht unterstützt: {state} (verfügbar: {', '.join(SUPPORTED_STATES)})")
+	return berlin_holidays(year)
+
+
+class WorkingCalendar:
+	"""Arbeitstage eines Jahres als kompakte Arrays (siehe Modul-Docstring)."""
+	__slots__ = ('year', 'state', 'first_ordinal', 'holidays', 'day_index', 'working_ordinals', 'month_starts')
+
+	def __init__(self, year: int, state: str, holidays: List[date]):
+		self.year = year
+		self.state = state
+		self.first_ordinal = date(year, 1, 1).toordinal()
+		self.holidays = frozenset(holidays)
+		n_days = date(year + 1, 1, 1).toordinal() - self.first_ordinal
+		holiday_ords = {d.toordinal() for d in holidays}
+		# (o - 1) % 7 ist der Wochentag (date(1, 1, 1) ist ein Montag)
+		self.working_ordinals = array('i', [o for o in range(self.first_ordinal, self.first_ordinal + n_days) if (o - 1) % 7 < 5 and o not in holiday_ords])
+		self.day_index = array('i', [-1]) * n_days
+		for i, o in enumerate(self.working_ordinals):
+			self.day_index[o - self.first_ordinal] = i
+		self.month_starts = array('i', [bisect_left(self.working_ordinals, date(year, m, 1).toordinal()) for m in range(1, 13)])
+		self.month_starts.append(len(self.working_ordinals))
+
+	def is_holiday(self, d: date) -> bool:
+		return d in self.holidays
+
+	def working_index(self, d: date) -> int:
+		"""Arbeitstag-Index im Jahr oder -1."""
+		offset = d.toordinal() - self.first_ordinal
+		if 0 <= offset < len(self.day_index):
+			return self.day_index[offset]
+		return -1
+
+	def is_working_day(self, d: date) -> bool:
+		return self.working_index(d) >= 0
+
+	def __len__(self) -> int:
+		return len(self.working_ordinals)
+
+	def working_days(self, month: Optional[int] = None) -> List[date]:
+		if month is None:
+			lo, hi = 0, len(self.working_ordinals)
+		else:
+			lo, hi = self.month_starts[month - 1], self.month_starts[month]
+		return [date.fromordinal(o) for o in self.working_ordinals[lo:hi]]
+
+	def days_by_month(self) -> Dict[int, List[date]]:
+		return {m: self.working_days(m) for m in range(1, 13)}
+
+	def month_lengths(self) -> List[int]:
+		return [self.month_starts[m] - self.month_starts[m - 1] for m in range(1, 13)]
+
+
+def _cache_path(cache_dir: str, year: int, state: str) -> str:
+	return os.path.join(cache_dir, f"calendar_{state}_{year}.json")
+
+
+def _load(cache_dir: str, year: int, state: str) -> Optional[WorkingCalendar]:
+	"""Kalender aus dem Datei-Cache oder None, wenn die Datei fehlt, veraltet oder inkonsistent ist."""
+	try:
+		with open(_cache_path(cache_dir, year, state), encoding='utf-8') as f:
+			data = json.load(f)
+	except (OSError, ValueError):
+		return None
+	if not isinstance(data, dict) or data.get('version') != CACHE_VERSION or data.get('year') != year or data.get('state') != state:
+		return None
+	holidays = data.get('holidays')
+	first, end = date(year, 1, 1).toordinal(), date(year + 1, 1, 1).toordinal()
+	if not isinstance(holidays, list) or not all(type(o) is int and first <= o < end for o in holidays):
+		return None
+	cal = WorkingCalendar(year, state, [date.fromordinal(o) for o in holidays])
+	# Gespeicherte Arbeitstage müssen zu den Feiertagen passen (fängt leere/verfälschte Listen ab)
+	if data.get('working_ordinals') != cal.working_ordinals.tolist():
+		return None
+	return cal
+
+
+def _store(cache_dir: str, cal: WorkingCalendar) -> None:
+	os.makedirs(cache_dir, exist_ok=True)
+	data = {'version': CACHE_VERSION, 'year': cal.year, 'state': cal.state, 'holidays': sorted(d.toordinal() for d in cal.holidays), 'working_ordinals': list(cal.working_ordinals)}
+	tmp = _cache_path(cache_dir, cal.year, cal.state) + '.tmp'
+	with open(tmp, 'w', encoding='utf-8') as f:
+		json.dump(data, f)
+	os.replace(tmp, _cache_path(cache_dir, cal.year, cal.state))
+
+
+def get_calendar(year: int, state: str = 'BE', cache_dir: Optional[str] = None) -> WorkingCalendar:
+	"""Memoisierter Kalender für (Jahr, Bundesland); optional mit Datei-Cache."""
+	key = (year, state)
+	cal = _calendars.get(key)
+	if cal is not None:
+		return cal
+	cache_dir = cache_dir or os.environ.get(CACHE_ENV)
+	if cache_dir:
+		cal = _load(cache_dir, year, state)
+	if cal is None:
+		cal = WorkingCalendar(year, state, holidays_for(year, state))
+		if cache_dir:
+			_store(cache_dir, cal)
+	_calendars[key] = cal
+	return cal
+
+
+def is_holiday(d: date, state: str = 'BE') -> bool:
+	return get_calendar(d.year, state).is_holiday(d)
+
+
+def is_working_day(d: date, state: str = 'BE') -> bool:
+	return get_calendar(d.year, state).is_working_day(d)
+
+
+class HolidaySet:
+	"""Mengen-Sicht auf die Feiertage aller Jahre (für `d in holidays`-Prüfungen)."""
+
+	def __init__(self, state: str = 'BE'):
+		self.state = state
+
+	def __contains__(self, d: object) -> bool:
+		return isinstance(d, date) and get_calendar(d.year, self.state).is_holiday(d)
+
+
+def working_days_between(start_year: int, end_year: int, state: str = 'BE') -> List[date]:
+	"""Alle Arbeitstage der Jahre start_year..end_year (inklusive)."""
+	days: List[date] = []
+	for year in range(start_year, end_year + 1):
+		days.extend(get_calendar(year, state).working_days())
+	return days
+
+
+class WorkingDayAxis:
+	"""Durchgehender Arbeitstag-Index über die Jahre start_year..end_year (inklusive)."""
+	__slots__ = ('start_year', 'end_year', 'calendars', 'offsets', 'ordinals')
+
+	def __init__(self, start_year: int, end_year: int, state: str = 'BE'):
+		self.start_year = start_year
+		self.end_year = end_year
+		self.calendars = [get_calendar(y, state) for y in range(start_year, end_year + 1)]
+		self.offsets = array('i', [0])
+		self.ordinals = array('i')
+		for cal in self.calendars:
+			self.ordinals.extend(cal.working_ordinals)
+			self.offsets.append(len(self.ordinals))
+
+	def __len__(self) -> int:
+		return len(self.ordinals)
+
+	def index(self, d: date) -> int:
+		"""Arbeitstag-Index über alle Jahre der Achse oder -1 (kein Arbeitstag / außerhalb)."""
+		y = d.year - self.start_year
+		if not 0 <= y < len(self.calendars):
+			return -1
+		i = self.calendars[y].working_index(d)
+		return -1 if i < 0 else self.offsets[y] + i
+
+	def date(self, i: int) -> date:
+		return date.fromordinal(self.ordinals[i])
+
+	def first_at_or_after(self, ordinal: int) -> int:
+		"""Kleinster Index mit Datum >= ordinal (len(self), wenn keiner existiert)."""
+		return bisect_right(self.ordinals, ordinal - 1)
+
+
+def calendar_fingerprint(years, state: str = 'BE') -> str:
+	"""Stabiler Hash über Bundesland und Feiertage der angegebenen Jahre (für Cache-Schlüssel)."""
+	h = hashlib.sha256(f"{CACHE_VERSION}:{state}".encode('ascii'))
+	for year in sorted(set(years)):
+		cal = get_calendar(year, state)
+		h.update(f"|{year}:".encode('ascii'))
+		h.update(','.join(str(d.toordinal()) for d in sorted(cal.holidays)).encode('ascii'))
+	return h.hexdigest()
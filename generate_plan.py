@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Python-Gegenstück zu generatePlan() aus docs/index.html.
+
+Gleiche Logik wie die Web-App: Largest-Remainder-Quoten nach Pensum, drei Pässe je Arbeitstag
+(Lieblingstag → frei → Folgetage erlaubt) und Rotation des Start-Index nach jeder Zuweisung.
+Statt je Tag eine rotierte Kopie aller Abteilungen zu sortieren, stehen die Abteilungen in
+Heaps mit Schlüssel (-Restbedarf, -Pensum, Nummer); zusätzlich je Wochentag ein Heap der
+Abteilungen mit diesem Lieblingstag. Veraltete Heap-Einträge werden beim Auslesen verworfen.
+
+Mit --seed entsteht eine reproduzierbare Variante: Gleichstände in (Restbedarf, Pensum) entscheidet
+dann ein aus dem Seed gezogener Rang statt der Nummer. Mit --variants N werden N Seeds parallel
+erzeugt, mit den Validator-Metriken bewertet und die beste Variante geschrieben.
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from calendar_service import get_calendar, working_days_between
+from validate_plan import (
+	Abteilung,
+	GERMAN_WEEKDAYS,
+	format_date_de,
+	parse_abteilungen_csv,
+	summary_metrics,
+	validate,
+)
+
+PlanEntry = Tuple[date, str, int]  # (Datum, Wochentag, Abteilungsnummer)
+
+# Heap-Eintrag: (-Restbedarf, -Pensum, Rang, Index); Rang = Nummer oder Seed-Rang
+_HeapEntry = Tuple[int, float, int, int]
+
+# Gewichte für score_plan (kleiner = besser); Verstöße dominieren, Lieblingstage zählen positiv
+DEFAULT_SCORE_WEIGHTS: Dict[str, float] = {
+	'violations': 1000.0,
+	'abs_diff': 10.0,
+	'monthly_abs_diff': 1.0,
+	'q4_abs_diff': 2.0,
+	'folgetage': 1.0,
+	'favorite_hits': -0.5,
+}
+
+
+def quota_targets(abteilungen: List[Abteilung], total_days: int) -> List[int]:
+	"""Zielanzahl je Abteilung (Index-genau wie die Web-App, auch bei doppelten Nummern)."""
+	total_weight = sum(a.pensum for a in abteilungen)
+	if total_weight <= 0:
+		raise ValueError('Summe der Pensen muss größer als 0 sein.')
+	targets: List[int] = []
+	rests: List[float] = []
+	for a in abteilungen:
+		exact = (a.pensum / total_weight) * total_days
+		base = int(exact)
+		targets.append(base)
+		rests.append(exact - base)
+	remaining = total_days - sum(targets)
+	if remaining > 0:
+		order = sorted(range(len(abteilungen)), key=lambda i: (-rests[i], -abteilungen[i].pensum, abteilungen[i].nummer))
+		for i in order[:remaining]:
+			targets[i] += 1
+	return targets
+
+
+def working_days_2026() -> List[date]:
+	return get_calendar(2026).working_days()
+
+
+class _Scheduler:
+	def __init__(self, abteilungen: List[Abteilung], targets: List[int], seed: Optional[int] = None):
+		self.abteilungen = abteilungen
+		self.n = len(abteilungen)
+		self.need = list(targets)
+		if seed is None:
+			self.rank = [a.nummer for a in abteilungen]
+		else:
+			self.rank = list(range(self.n))
+			random.Random(seed).shuffle(self.rank)
+		self.all_heap: List[_HeapEntry] = []
+		self.fav_heaps: List[List[_HeapEntry]] = [[] for _ in range(7)]
+		self.fav_weekdays = [
+			[wd for wd in range(7) if a.verfuegbarkeit.favorite_mask >> wd & 1] for a in abteilungen
+		]
+		for i in range(self.n):
+			self._push(i)
+
+	def _entry(self, i: int) -> _HeapEntry:
+		return (-self.need[i], -self.abteilungen[i].pensum, self.rank[i], i)
+
+	def _push(self, i: int) -> None:
+		if self.need[i] <= 0:
+			return
+		entry = self._entry(i)
+		heapq.heappush(self.all_heap, entry)
+		for wd in self.fav_weekdays[i]:
+			heapq.heappush(self.fav_heaps[wd], entry)
+
+	def _select(self, heap: List[_HeapEntry], ordinal: int, start: int, exclude: int) -> Optional[int]:
+		"""Bester nicht verhinderter Kandidat (ohne exclude) in Heap-Reihenfolge.
+
+		Gleichstand in (Bedarf, Pensum, Rang) entscheidet die Rotation ab start – wie die
+		stabile Sortierung der rotierten Liste in der Web-App.
+		"""
+		n = self.n
+		set_aside: List[_HeapEntry] = []
+		best: Optional[_HeapEntry] = None
+		while heap:
+			entry = heap[0]
+			i = entry[3]
+			if -entry[0] != self.need[i]:
+				heapq.heappop(heap)  # veralteter Eintrag
+				continue
+			if best is not None and entry[:3] != best[:3]:
+				break
+			set_aside.append(heapq.heappop(heap))
+			if i == exclude or self.abteilungen[i].verfuegbarkeit.is_blocked_ordinal(ordinal):
+				continue
+			if best is None or (i - start) % n < (best[3] - start) % n:
+				best = entry
+		for entry in set_aside:
+			heapq.heappush(heap, entry)
+		return best[3] if best is not None else None
+
+	def run(self, working_days: List[date]) -> List[PlanEntry]:
+		plan: List[PlanEntry] = []
+		start = 0
+		prev = -1  # Abteilung vom vorherigen Arbeitstag (Folgetag-Kandidat)
+		for d in working_days:
+			ordinal = d.toordinal()
+			weekday = d.weekday()
+			# Pass 1: Lieblingstag + nicht verhindert + kein Folgetag
+			chosen = self._select(self.fav_heaps[weekday], ordinal, start, prev)
+			if chosen is None:
+				# Pass 2: nicht verhindert + kein Folgetag
+				chosen = self._select(self.all_heap, ordinal, start, prev)
+			if chosen is None and prev >= 0 and self.need[prev] > 0 and not self.abteilungen[prev].verfuegbarkeit.is_blocked_ordinal(ordinal):
+				# Pass 3: Folgetag erlaubt – einziger zusätzlicher Kandidat ist die Abteilung vom Vortag
+				chosen = prev
+			if chosen is None:
+				prev = -1
+				continue
+			a = self.abteilungen[chosen]
+			plan.append((d, GERMAN_WEEKDAYS[weekday], a.nummer))
+			self.need[chosen] -= 1
+			self._push(chosen)
+			start = (chosen + 1) % self.n
+			prev = chosen
+		return plan
+
+
+def generate_plan(abteilungen: List[Abteilung], working_days: Optional[List[date]] = None, seed: Optional[int] = None) -> List[PlanEntry]:
+	"""Erzeugt den Plan; seed=None entspricht exakt der Web-App."""
+	if working_days is None:
+		working_days = working_days_2026()
+	if not abteilungen:
+		return []
+	targets = quota_targets(abteilungen, len(working_days))
+	return _Scheduler(abteilungen, targets, seed).run(working_days)
+
+
+def plan_rows(plan: List[PlanEntry]) -> Iterator[Tuple[str, str, str]]:
+	"""Plan als Zeilen im CSV-Format (Eingabe für den Validator ohne Dateiumweg)."""
+	for d, weekday_name, nummer in plan:
+		yield format_date_de(d), weekday_name, str(nummer)
+
+
+def score_metrics(metrics: Dict[str, int], weights: Optional[Dict[str, float]] = None) -> float:
+	weights = DEFAULT_SCORE_WEIGHTS if weights is None else weights
+	return sum(weights.get(k, 0.0) * v for k, v in metrics.items())
+
+
+def score_plan(plan: List[PlanEntry], abteilungen: List[Abteilung], weights: Optional[Dict[str, float]] = None) -> Tuple[float, Dict[str, int]]:
+	"""Bewertet einen Plan mit den Validator-Metriken (kleiner = besser)."""
+	# Fenster- und Abstandsauswertungen fließen nicht in den Score ein
+	result = validate(lambda: plan_rows(plan), abteilungen, windows=(), min_gap=0)
+	metrics = summary_metrics(result)
+	return score_metrics(metrics, weights), metrics
+
+
+def _score_seed(abteilungen: List[Abteilung], seed: int, working_days: Optional[List[date]]) -> Tuple[int, float, Dict[str, int]]:
+	score, metrics = score_plan(generate_plan(abteilungen, working_days, seed=seed), abteilungen)
+	return seed, score, metrics
+
+
+def best_of_seeds(abteilungen: List[Abteilung], seeds: List[int], workers: Optional[int] = None, target_score: Optional[float] = None, progress: bool = False, working_days: Optional[List[date]] = None) -> Tuple[int, float, Dict[str, int], int]:
+	"""Bewertet Seed-Varianten parallel und liefert (bester Seed, Score, Metriken, bewertete Varianten).
+
+	Bei gleichem Score gewinnt der kleinere Seed. Mit target_score wird abgebrochen, sobald eine
+	Variante den Zielwert erreicht; die restlichen Aufträge werden verworfen.
+	"""
+	best: Optional[Tuple[float, int, Dict[str, int]]] = None
+	evaluated = 0
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		futures = [pool.submit(_score_seed, abteilungen, seed, working_days) for seed in seeds]
+		try:
+			for fut in as_completed(futures):
+				seed, score, metrics = fut.result()
+				evaluated += 1
+				if best is None or (score, seed) < (best[0], best[1]):
+					best = (score, seed, metrics)
+					if progress:
+						print(f"[{evaluated}/{len(seeds)}] Seed {seed}: Score {score:.1f} (neues Bestes)")
+				if target_score is not None and best[0] <= target_score:
+					break
+		finally:
+			for fut in futures:
+				fut.cancel()
+	if best is None:
+		raise ValueError('Keine Varianten bewertet.')
+	return best[1], best[0], best[2], evaluated
+
+
+def write_plan_csv(path: str, plan: List[PlanEntry]) -> None:
+	"""Schreibt den Plan im Format des Web-App-Exports (ohne BOM, LF)."""
+	parent = os.path.dirname(path)
+	if parent:
+		os.makedirs(parent, exist_ok=True)
+	with open(path, 'w', newline='', encoding='utf-8') as f:
+		f.write("Datum;Wochentag;Abteilungsnummer\n")
+		for d, weekday_name, nummer in plan:
+			f.write(f"{format_date_de(d)};{weekday_name};{nummer}\n")
+
+
+def main(testdaten_csv: str, out_path: str, seed: Optional[int] = None, variants: int = 0, workers: Optional[int] = None, target_score: Optional[float] = None, years: Optional[Tuple[int, int]] = None, binary: bool = False) -> int:
+	abteilungen = parse_abteilungen_csv(testdaten_csv)
+	working_days = working_days_between(*years) if years else None
+	try:
+		if variants > 0:
+			base = 0 if seed is None else seed
+			seeds = list(range(base, base + variants))
+			seed, score, metrics, evaluated = best_of_seeds(abteilungen, seeds, workers, target_score, progress=True, working_days=working_days)
+			print(f"Beste Variante: Seed {seed}, Score {score:.1f} ({evaluated} von {len(seeds)} Varianten bewertet)")
+			print('Metriken: ' + ', '.join(f"{k}={v}" for k, v in metrics.items()))
+		plan = generate_plan(abteilungen, working_days, seed=seed)
+	except ValueError as e:
+		print(f"Fehler: {e}", file=sys.stderr)
+		return 1
+	write_plan_csv(out_path, plan)
+	print(f"Dienstplan erzeugt: {len(plan)} Arbeitstage auf {len(abteilungen)} Abteilungen verteilt → {out_path}")
+	if binary:
+		from plan_binary import binary_path_for, write_plan_binary
+		write_plan_binary(binary_path_for(out_path), plan)
+		print(f"Binärplan gespeichert: {binary_path_for(out_path)}")
+	return 0
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Erzeuge Jahresdienstplan wie die Web-App (generatePlan)')
+	parser.add_argument('testdaten_csv', help='Pfad zu Testdaten.csv')
+	parser.add_argument('--out', default='Jahresdienstplan_2026.csv', help='Ziel-CSV (Default: Jahresdienstplan_2026.csv)')
+	parser.add_argument('--seed', type=int, default=None, help='Seed für reproduzierbare Variante (ohne: exakt wie Web-App); mit --variants Start-Seed')
+	parser.add_argument('--variants', type=int, default=0, help='Anzahl Seed-Varianten, die parallel bewertet werden (beste wird geschrieben)')
+	parser.add_argument('--workers', type=int, default=None, help='Anzahl Prozesse (Default: CPU-Anzahl)')
+	parser.add_argument('--target-score', type=float, default=None, help='Abbruch, sobald eine Variante diesen Score erreicht')
+	parser.add_argument('--years', default=None, help='Planungszeitraum als Jahr oder Spanne, z. B. 2027 oder 2026-2030 (Default: 2026 wie Web-App)')
+	parser.add_argument('--binary', action='store_true', help='Zusätzlich den Binärplan (.dpb) neben die CSV schreiben')
+	args = parser.parse_args()
+	years = None
+	if args.years:
+		first, _, last = args.years.partition('-')
+		years = (int(first), int(last or first))
+	sys.exit(main(args.testdaten_csv, args.out, args.seed, args.variants, args.workers, args.target_score, years, args.binary))
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""Einlesen von Testdaten und Plan-CSV in einem Stück, optional streng mit Fehlerliste.
+
+read_text liest eine Datei als Ganzes und erkennt Encoding/BOM genau einmal (UTF-8 mit oder
+ohne BOM, UTF-16 mit BOM, sonst cp1252 wie bei Excel-Exporten). Die Parser zerlegen den Text
+zeilenweise ohne csv-Modul und Dict je Zeile:
+- parse_testdaten_lines -> Abteilungen; tolerant wie bisher (Kopf- und Fremdzeilen werden
+  übersprungen, der erste harte Fehler bricht ab, jetzt mit Datei:Zeile)
+- parse_plan_text -> PlanRows (parallele Arrays Ordinal/Abteilung/Zeile)
+Im strengen Modus wird jeder Fehler als InputIssue (Datei, Zeile, Grund) gesammelt: ungültige
+Daten und Nummern, umgekehrte Zeiträume, unbekannte Wochentagsnamen, doppelte Abteilungen und
+doppelte Plan-Tage. Regelprüfungen (Wochenende, Feiertag, Verhinderung) bleiben beim Validator.
+"""
+import argparse
+import sys
+import time
+from array import array
+from calendar import monthrange
+from datetime import date
+from operator import add, itemgetter, le
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from validate_plan import WEEKDAY_INDEX, Abteilung, Verhinderung, parse_date_de
+
+PLAN_COLUMNS = ('Datum', 'Wochentag', 'Abteilungsnummer')
+MAX_REPORTED = 50  # so viele Fehler nennt InputError in seiner Meldung
+
+
+class InputIssue(NamedTuple):
+	source: str
+	line: int
+	reason: str
+
+	def __str__(self) -> str:
+		return f"{self.source}:{self.line}: {self.reason}"
+
+
+class InputError(ValueError):
+	"""Eingabefehler mit allen gesammelten InputIssues (im toleranten Modus genau einer)."""
+
+	def __init__(self, issues: List[InputIssue]):
+		self.issues = issues
+		shown = '\n'.join(str(i) for i in issues[:MAX_REPORTED])
+		more = f"\n… und {len(issues) - MAX_REPORTED} weitere" if len(issues) > MAX_REPORTED else ''
+		super().__init__(shown + more)
+
+	def __reduce__(self):
+		# Standard-Pickling ruft InputError(Meldungstext) auf; für Prozesspools die Issues übergeben
+		return (InputError, (self.issues,))
+
+
+def decode_bytes(data: bytes) -> Tuple[str, str]:
+	"""Text und erkanntes Encoding; ein führendes BOM wird entfernt."""
+	if data.startswith(b'\xef\xbb\xbf'):
+		return data[3:].decode('utf-8'), 'utf-8-sig'
+	if data.startswith((b'\xff\xfe', b'\xfe\xff')):
+		return data.decode('utf-16'), 'utf-16'
+	try:
+		return data.decode('utf-8'), 'utf-8'
+	except UnicodeDecodeError:
+		return data.decode('cp1252'), 'cp1252'
+
+
+def read_text(path: str) -> Tuple[str, str]:
+	with open(path, 'rb') as f:
+		return decode_bytes(f.read())
+
+
+# --- Testdaten ---
+
+def _parse_verhinderungen(field: str, source: str, lineno: int, issues: List[InputIssue], strict: bool) -> List[Verhinderung]:
+	result: List[Verhinderung] = []
+	for token in field.split(','):
+		token = token.strip()
+		if not token:
+			continue
+		start_s, sep, end_s = token.partition('-')
+		try:
+			start = parse_date_de(start_s)
+			end = parse_date_de(end_s) if sep else start
+		except ValueError:
+			issues.append(InputIssue(source, lineno, f"Ungültiges Datum in Verhinderung: '{token}'"))
+			continue
+		if strict and end < start:
+			# tolerant: umgekehrte Zeiträume blockieren wie bisher keinen Tag
+			issues.append(InputIssue(source, lineno, f"Zeitraum rückwärts (Ende vor Beginn): '{token}'"))
+		result.append(Verhinderung('range' if sep else 'single', start, end))
+	return result
+
+
+def parse_testdaten_lines(lines: Iterable[str], source: str = '<testdaten>', strict: bool = False) -> Tuple[List[Abteilung], List[InputIssue]]:
+	"""Testdaten-Zeilen (Abteilung;Jahrespensen;Lieblingstage;Verhinderungen) -> (Abteilungen, Fehler).
+
+	strict=False: Verhalten wie bisher; nur Fehler, die das Einlesen unmöglich machen
+	(Datum, Pensum), lösen sofort einen InputError aus. strict=True: alle Fehler sammeln;
+	die Abteilungen enthalten dann nur die verwertbaren Angaben.
+	"""
+	issues: List[InputIssue] = []
+	abteilungen: List[Abteilung] = []
+	first_line: Dict[int, int] = {}
+	content_seen = False
+	for lineno, raw in enumerate(lines, 1):
+		line = raw.strip().lstrip('\ufeff')
+		if not line or line.startswith('#'):
+			continue
+		parts = [p.strip() for p in line.split(';')]
+		is_first = not content_seen
+		content_seen = True
+		if len(parts) < 4:
+			# toleranter: fehlende Felder auffüllen
+			parts += [''] * (4 - len(parts))
+		try:
+			nummer = int(parts[0])
+		except ValueError:
+			# Überschrift (erste Zeile) oder defekte Zeile; tolerant wird beides übersprungen
+			if strict and not is_first:
+				issues.append(InputIssue(source, lineno, f"Ungültige Abteilungsnummer: '{parts[0]}'"))
+			continue
+		line_issues: List[InputIssue] = []
+		if strict and len(parts) > 4 and any(parts[4:]):
+			line_issues.append(InputIssue(source, lineno, f"Zu viele Felder ({len(parts)} statt 4)"))
+		if nummer in first_line and strict:
+			line_issues.append(InputIssue(source, lineno, f"Abteilung {nummer} doppelt (zuerst Zeile {first_line[nummer]})"))
+		first_line.setdefault(nummer, lineno)
+
+		pensum_str = parts[1].replace('%', '').strip()
+		try:
+			pensum = float(pensum_str) if pensum_str else 0.0
+		except ValueError:
+			line_issues.append(InputIssue(source, lineno, f"Ungültiges Jahrespensum: '{parts[1]}'"))
+			pensum = 0.0
+		else:
+			if strict and not 0 <= pensum <= 100:
+				line_issues.append(InputIssue(source, lineno, f"Jahrespensum außerhalb 0–100 %: '{parts[1]}'"))
+		lieblingstage = [t.strip() for t in parts[2].split(',') if t.strip()]
+		if strict:
+			for name in lieblingstage:
+				if name not in WEEKDAY_INDEX:
+					line_issues.append(InputIssue(source, lineno, f"Unbekannter Wochentag in Lieblingstagen: '{name}'"))
+		verhinderungen = _parse_verhinderungen(parts[3], source, lineno, line_issues, strict)
+		if line_issues and not strict:
+			# tolerant bleiben nur unlesbare Angaben (Datum, Pensum) übrig: sofort abbrechen
+			raise InputError(line_issues[:1])
+		issues.extend(line_issues)
+		abteilungen.append(Abteilung(nummer, pensum, lieblingstage, verhinderungen))
+	return abteilungen, issues
+
+
+def read_testdaten(path: str, strict: bool = False) -> List[Abteilung]:
+	"""Liest Testdaten.csv; im strengen Modus InputError mit allen Fehlern."""
+	text, _ = read_text(path)
+	abteilungen, issues = parse_testdaten_lines(text.splitlines(), path, strict)
+	if issues:
+		raise InputError(issues)
+	return abteilungen
+
+
+# --- Plan ---
+
+class PlanRows:
+	"""Plan als parallele Arrays statt einer Zeile je Objekt; Reihenfolge wie in der Datei."""
+	__slots__ = ('ordinals', 'departments', 'lines', 'weekday_names')
+
+	def __init__(self):
+		self.ordinals = array('i')
+		self.departments = array('i')
+		self.lines = array('i')  # Zeilennummer in der Datei
+		self.weekday_names: List[str] = []  # wie in der Datei (leer, falls nicht angegeben)
+
+	def __len__(self) -> int:
+		return len(self.ordinals)
+
+
+def _month_entry(table: Dict[str, Tuple[int, int]], key: str) -> Optional[Tuple[int, int]]:
+	"""Trägt 'mm.yyyy' -> (Ordinal des Vortags vom Monatsersten, Tage im Monat) in table ein."""
+	entry = table.get(key)
+	if entry is None:
+		month_s, _, year_s = key.partition('.')
+		if not (len(month_s) == 2 and len(year_s) == 4 and month_s.isdigit() and year_s.isdigit()):
+			return None
+		month, year = int(month_s), int(year_s)
+		if not 1 <= month <= 12 or year < 1:
+			return None
+		entry = (date(year, month, 1).toordinal() - 1, monthrange(year, month)[1])
+		table[key] = entry
+	return entry
+
+
+_DAY = itemgetter(slice(0, 2))
+_MONTH = itemgetter(slice(3, None))
+_PLAN_WEEKDAYS = WEEKDAY_INDEX.keys() | {''}
+
+
+def _parse_plan_fast(text: str, strict: bool) -> Optional[PlanRows]:
+	"""Massenpfad für den Regelfall (genau drei Spalten, dd.mm.yyyy, keine Leerzeilen/Quotes).
+
+	Zerlegt den ganzen Text mit einem split und rechnet spaltenweise über map; None, sobald
+	irgendetwas vom Regelfall abweicht - dann sammelt der zeilenweise Pfad die Fehler.
+	"""
+	header, _, body = text.replace('\r\n', '\n').partition('\n')
+	body = body.rstrip('\n')
+	if header != ';'.join(PLAN_COLUMNS) or not body or '"' in body or '\n\n' in body:
+		return None
+	fields = body.replace('\n', ';').split(';')
+	if len(fields) % 3:
+		return None
+	dates, names, nums = fields[0::3], fields[1::3], fields[2::3]
+	if set(map(len, dates)) != {10} or set(map(itemgetter(2), dates)) != {'.'} or set(map(itemgetter(5), dates)) != {'.'}:
+		return None
+	keys = list(map(_MONTH, dates))
+	months: Dict[str, Tuple[int, int]] = {}
+	for key in set(keys):
+		if _month_entry(months, key) is None:
+			return None
+	try:
+		days = list(map(int, map(_DAY, dates)))
+		departments = array('i', map(int, nums))
+	except ValueError:
+		return None
+	entries = list(map(months.__getitem__, keys))
+	if min(days) < 1 or not all(map(le, days, map(itemgetter(1), entries))):
+		return None
+	ordinals = array('i', map(add, map(itemgetter(0), entries), days))
+	if not set(names) <= _PLAN_WEEKDAYS or (strict and len(set(ordinals)) != len(ordinals)):
+		return None
+	rows = PlanRows()
+	rows.ordinals = ordinals
+	rows.departments = departments
+	rows.lines = array('i', range(2, len(ordinals) + 2))
+	rows.weekday_names = names
+	return rows
+
+
+def parse_plan_text(text: str, source: str = '<plan>', strict: bool = False) -> Tuple[PlanRows, List[InputIssue]]:
+	"""Plan-CSV-Text -> (PlanRows, Fehler). Nicht verwertbare Zeilen fehlen in PlanRows.
+
+	Fehler werden immer gesammelt (strict bestimmt nur, ob auch doppelte Tage und unbekannte
+	Wochentagsnamen als Fehler gelten); Datumsangaben der Form dd.mm.yyyy werden über eine
+	Monatstabelle ohne date-Objekt je Zeile in Ordinale umgerechnet.
+	"""
+	fast = _parse_plan_fast(text, strict)
+	if fast is not None:
+		return fast, []
+	rows = PlanRows()
+	issues: List[InputIssue] = []
+	lines = text.split('\n')
+	if '"' in text:
+		# Seltene Quotierung: auf das csv-Modul ausweichen
+		import csv
+		reader = csv.reader(lines, delimiter=';')
+		records: Iterator[Tuple[int, List[str]]] = ((reader.line_num, r) for r in reader)
+	else:
+		records = ((n, line.rstrip('\r').split(';')) for n, line in enumerate(lines, 1))
+	header = next(records, None)
+	if header is None:
+		return rows, issues
+	col = {name.strip(): i for i, name in enumerate(header[1])}
+	missing = [c for c in PLAN_COLUMNS if c not in col]
+	if missing:
+		issues.append(InputIssue(source, header[0], f"Spalte(n) fehlen im Kopf: {', '.join(missing)}"))
+	i_datum, i_wtag, i_abt = (col.get(c, -1) for c in PLAN_COLUMNS)
+
+	months: Dict[str, Tuple[int, int]] = {}
+	seen: Dict[int, int] = {}
+	ordinals, departments, line_nums, weekday_names = rows.ordinals, rows.departments, rows.lines, rows.weekday_names
+	for lineno, r in records:
+		n = len(r)
+		if n == 1 and not r[0].strip():
+			continue
+		datum = r[i_datum].strip() if 0 <= i_datum < n else ''
+		wtag = r[i_wtag].strip() if 0 <= i_wtag < n else ''
+		abt_s = r[i_abt].strip() if 0 <= i_abt < n else ''
+		o = 0
+		if len(datum) == 10 and datum[2] == '.' and datum[:2].isdigit():
+			entry = months.get(datum[3:]) or _month_entry(months, datum[3:])
+			if entry is not None:
+				day = int(datum[:2])
+				if 1 <= day <= entry[1]:
+					o = entry[0] + day
+		if not o:
+			try:
+				o = parse_date_de(datum).toordinal()
+			except (ValueError, TypeError):
+				issues.append(InputIssue(source, lineno, f"Ungültiges Datum: '{datum}'"))
+				continue
+		try:
+			num = int(abt_s)
+		except ValueError:
+			issues.append(InputIssue(source, lineno, f"Ungültige Abteilungsnummer: '{abt_s}'"))
+			continue
+		if strict:
+			if wtag and wtag not in WEEKDAY_INDEX:
+				issues.append(InputIssue(source, lineno, f"Unbekannter Wochentag: '{wtag}'"))
+			first = seen.setdefault(o, lineno)
+			if first != lineno:
+				issues.append(InputIssue(source, lineno, f"Datum {datum} doppelt belegt (zuerst Zeile {first})"))
+		ordinals.append(o)
+		departments.append(num)
+		line_nums.append(lineno)
+		weekday_names.append(wtag)
+	return rows, issues
+
+
+def check_inputs(plan_path: Optional[str], testdaten_path: Optional[str]) -> List[InputIssue]:
+	"""Alle Eingabefehler beider Dateien (strenger Modus); leere Liste = Eingaben sauber."""
+	issues: List[InputIssue] = []
+	if testdaten_path:
+		text, _ = read_text(testdaten_path)
+		issues.extend(parse_testdaten_lines(text.splitlines(), testdaten_path, strict=True)[1])
+	if plan_path:
+		text, _ = read_text(plan_path)
+		issues.extend(parse_plan_text(text, plan_path, strict=True)[1])
+	return issues
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Eingaben streng prüfen (alle Fehler mit Datei:Zeile)')
+	parser.add_argument('--plan', default=None, help='Plan-CSV')
+	parser.add_argument('--testdaten', default=None, help='Testdaten.csv')
+	args = parser.parse_args()
+	if not (args.plan or args.testdaten):
+		parser.error('--plan und/oder --testdaten angeben')
+	started = time.perf_counter()
+	found = check_inputs(args.plan, args.testdaten)
+	for issue in found:
+		print(issue)
+	print(f"{len(found)} Eingabefehler ({(time.perf_counter() - started) * 1000:.1f} ms)", file=sys.stderr)
+	sys.exit(2 if found else 0)
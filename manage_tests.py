@@ -1,17 +1,40 @@
 #!/usr/bin/env python3
 import argparse
+import contextlib
+import functools
+import io
 import json
 import os
 import shutil
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-import subprocess
+from typing import Callable, Dict, List, Optional, Tuple
+
+import plan_binary
+import profiling
+import validate_plan
+import visualize_reports
+import xlsx_export
+from calendar_service import calendar_fingerprint
+from metrics_index import METRICS, MetricsIndex
+from plan_diff import diff_plans, print_diff, write_diff_csvs
+from snapshot_cache import DEFAULT_MAX_MB, MAX_MB_ENV, SnapshotCache, artifact_names, combine_hashes, detach, file_sha256, sources_sha256
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TESTS_DIR = os.path.join(BASE_DIR, 'tests')
 
 INPUT_FILE = os.path.join(BASE_DIR, 'Testdaten.csv')
 OUTPUT_FILE = os.path.join(BASE_DIR, 'Jahresdienstplan_2026.csv')
-VALIDATOR = os.path.join(BASE_DIR, 'validate_plan.py')
+CACHE_DIR = os.path.join(TESTS_DIR, '.cache')
+TIMINGS_FILE = 'timings.json'  # Phasenzeiten des letzten Validator-Laufs je Version
+VISUALIZE_TIMINGS_FILE = 'timings_visualize.json'
+
+# Quelltexte, deren Hash als Werkzeug-Version in den Cache-Schlüssel eingeht
+VALIDATOR_SOURCES = [os.path.join(BASE_DIR, n) for n in ('validate_plan.py', 'calendar_service.py', 'input_parser.py', 'plan_binary.py', 'thresholds.py', 'xlsx_export.py', 'profiling.py')]
+VISUALIZER_SOURCES = [os.path.join(BASE_DIR, 'visualize_reports.py')]
 
 
 def ensure_tests_dir():
@@ -22,27 +45,144 @@ def timestamp_version() -> str:
 	return 'v' + datetime.now().strftime('%Y-%m-%d_%H%M%S')
 
 
-def run_validator(plan_path: str, test_path: str, report_path: str, out_dir: str) -> None:
-	"""Runs the validator and writes stdout to report_path; also writes CSV/MD to out_dir."""
+def is_report_artifact(name: str) -> bool:
+	return name.startswith('validation_')
+
+
+def is_chart_artifact(name: str) -> bool:
+	return name.endswith('.png') or name == visualize_reports.FIGURE_MANIFEST
+
+
+def plan_years(plan_path: str) -> List[int]:
+	years = set()
+	for datum, _, _ in validate_plan.iter_plan_rows(plan_path):
+		year = datum.strip().rsplit('.', 1)[-1]
+		if year.isdigit():
+			years.add(int(year))
+	return validate_plan.quota_years(years)  # Monats-/Q4-Soll: Planjahre, leerer Plan -> 2026
+
+
+def snapshot_hashes(plan_path: str, test_path: str) -> Dict[str, str]:
+	"""Hashes von Eingaben, Kalender und Validator-Version; 'key' adressiert den Cache-Eintrag."""
+	hashes = {
+		'testdaten': file_sha256(test_path),
+		'plan': file_sha256(plan_path),
+		'calendar': calendar_fingerprint(plan_years(plan_path)),
+		'validator': sources_sha256(VALIDATOR_SOURCES),
+	}
+	hashes['key'] = combine_hashes(hashes)
+	return hashes
+
+
+def chart_cache_key(report_key: str) -> str:
+	return combine_hashes({'reports': report_key, 'visualizer': sources_sha256(VISUALIZER_SOURCES)})
+
+
+def read_metadata(version_dir: str) -> Dict:
 	try:
-		with open(report_path, 'w', encoding='utf-8') as fout:
-			proc = subprocess.run(
-				['python3', VALIDATOR, plan_path, test_path, '--out-dir', out_dir],
-				stdout=fout,
-				stderr=subprocess.STDOUT,
-				cwd=BASE_DIR,
-				check=False,
-			)
-			# append exit code for traceability
-			with open(report_path, 'a', encoding='utf-8') as fappend:
-				fappend.write(f"\n\n[validator-exit-code]: {proc.returncode}\n")
-	except FileNotFoundError:
-		# validator missing
-		with open(report_path, 'w', encoding='utf-8') as fout:
-			fout.write('Validator-Skript nicht gefunden. Übersprungen.\n')
-
-
-def create_snapshot(version: str = None, note: str = '') -> str:
+		with open(os.path.join(version_dir, 'metadata.json'), encoding='utf-8') as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+def write_metadata(version_dir: str, metadata: Dict) -> None:
+	with open(os.path.join(version_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
+		json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+
+def run_validator(plan_path: str, test_path: str, report_path: str, out_dir: str, recorder: Optional[profiling.PhaseRecorder] = None) -> Tuple[int, Optional[validate_plan.ValidationResult]]:
+	"""Runs the validator in-process and writes its console report to report_path; also writes CSV/MD/XLSX to out_dir.
+
+	Returns the validator exit code (0 = ok, 2 = rule violations, 1 = validator error) and the result.
+	"""
+	rec = recorder or profiling.PhaseRecorder()
+	result = None
+	# Aus dem Cache verlinkte Berichte nicht in-place überschreiben
+	detach([report_path] + [os.path.join(out_dir, n) for n in artifact_names(out_dir, is_report_artifact)])
+	with open(report_path, 'w', encoding='utf-8') as fout:
+		try:
+			timings: Dict[str, float] = {}
+			with rec.phase('validierung') as phase:
+				result = validate_plan.validate(plan_path, validate_plan.parse_abteilungen_csv(test_path), timings=timings)
+				phase.rows = result.total_days
+			for name, seconds in timings.items():
+				rec.add(f'validierung.{name}', seconds)
+			with rec.phase('bericht'):
+				validate_plan.print_report(result, fout)
+			with rec.phase('export_csv'):
+				validate_plan.write_csv_reports(result, out_dir)
+			with rec.phase('export_markdown'):
+				validate_plan.write_markdown_report(result, out_dir)
+			with rec.phase('export_xlsx'):
+				xlsx_export.write_xlsx_report(result, out_dir, plan_path)
+			code = result.exit_code
+		except Exception:
+			# Fehler im Validator wie einen abgebrochenen Lauf protokollieren
+			fout.write(traceback.format_exc())
+			code = 1
+		# append exit code for traceability
+		fout.write(f"\n\n[validator-exit-code]: {code}\n")
+	return code, result
+
+
+def _phase_seconds(recorder: profiling.PhaseRecorder, name: str) -> Optional[float]:
+	return next((p.seconds for p in recorder.phases if p.name == name), None)
+
+
+def validate_cached(version_dir: str, use_cache: bool = True, recorder: Optional[profiling.PhaseRecorder] = None) -> Dict:
+	"""Validiert den Plan eines Versionsordners; gleiche Eingaben werden aus dem Cache verlinkt.
+
+	Liefert exit_code, days, metrics, hashes und cache ('hit', 'miss' oder 'off'); nach einem echten
+	Lauf zusätzlich result (ValidationResult, nur im selben Prozess verwenden). Die Phasenzeiten
+	landen in <version>/timings.json; bei einem Treffer mit der gemessenen Validierungszeit der Quelle.
+	"""
+	rec = recorder or profiling.PhaseRecorder()
+	plan_path = os.path.join(version_dir, 'Jahresdienstplan_2026.csv')
+	test_path = os.path.join(version_dir, 'Testdaten.csv')
+	with rec.phase('hashes'):
+		hashes = snapshot_hashes(plan_path, test_path)
+	cache = SnapshotCache(CACHE_DIR)
+	with rec.phase('cache_lookup'):
+		entry = cache.lookup(hashes['key']) if use_cache else None
+	if entry is not None:
+		with rec.phase('cache_restore', rows=len(entry['files'])):
+			detach(os.path.join(version_dir, n) for n in entry['files'])
+			cache.restore(entry, version_dir)
+			charts = cache.lookup(chart_cache_key(hashes['key']))
+			if charts is not None:
+				detach(os.path.join(version_dir, n) for n in charts['files'])
+				cache.restore(charts, version_dir)
+		row = {'exit_code': entry['exit_code'], 'days': entry.get('days'), 'metrics': entry.get('metrics', {}), 'hashes': hashes, 'cache': 'hit', 'source': entry.get('source_version')}
+		validation_seconds = entry.get('validation_seconds')
+	else:
+		code, result = run_validator(plan_path, test_path, os.path.join(version_dir, 'validation_report.txt'), version_dir, rec)
+		row = {'exit_code': code, 'days': None, 'metrics': {}, 'hashes': hashes, 'cache': 'miss' if use_cache else 'off', 'source': None}
+		validation_seconds = _phase_seconds(rec, 'validierung')
+		if result is not None:
+			row['result'] = result
+			row['days'] = result.total_days
+			row['metrics'] = validate_plan.summary_metrics(result)
+			if use_cache:
+				with rec.phase('cache_store'):
+					cache.store(hashes['key'], version_dir, artifact_names(version_dir, is_report_artifact), {
+						'source_version': os.path.basename(version_dir), 'exit_code': code, 'days': row['days'], 'metrics': row['metrics'], 'hashes': hashes,
+						'validation_seconds': validation_seconds,
+					})
+	rec.write_json(os.path.join(version_dir, TIMINGS_FILE), 'manage_tests', version=os.path.basename(version_dir), cache=row['cache'], source=row['source'], validation_seconds=None if validation_seconds is None else round(validation_seconds, 6))
+	return row
+
+
+def store_charts(version_dir: str) -> None:
+	"""Grafiken zu den aktuellen Berichten cachen (Schlüssel: Berichts-Key + Visualisierer-Version)."""
+	report_key = read_metadata(version_dir).get('hashes', {}).get('key')
+	charts = artifact_names(version_dir, is_chart_artifact)
+	if report_key and charts:
+		SnapshotCache(CACHE_DIR).store(chart_cache_key(report_key), version_dir, charts, {'source_version': os.path.basename(version_dir)})
+
+
+def create_snapshot(version: str = None, note: str = '', use_cache: bool = True, recorder: Optional[profiling.PhaseRecorder] = None, charts: bool = False) -> str:
+	rec = recorder or profiling.PhaseRecorder()
 	ensure_tests_dir()
 	if not version:
 		version = timestamp_version()
@@ -54,16 +194,24 @@ def create_snapshot(version: str = None, note: str = '') -> str:
 	# Kopiere vorhandene Dateien
 	copied_input = False
 	copied_output = False
-	if os.path.exists(INPUT_FILE):
-		shutil.copy2(INPUT_FILE, os.path.join(version_dir, 'Testdaten.csv'))
-		copied_input = True
-	else:
-		print('Warnung: Testdaten.csv nicht gefunden, Snapshot ohne Eingabedatei.')
-	if os.path.exists(OUTPUT_FILE):
-		shutil.copy2(OUTPUT_FILE, os.path.join(version_dir, 'Jahresdienstplan_2026.csv'))
-		copied_output = True
-	else:
-		print('Hinweis: Jahresdienstplan_2026.csv nicht gefunden, Snapshot ohne Output-Datei.')
+	with rec.phase('kopieren'):
+		if os.path.exists(INPUT_FILE):
+			shutil.copy2(INPUT_FILE, os.path.join(version_dir, 'Testdaten.csv'))
+			copied_input = True
+		else:
+			print('Warnung: Testdaten.csv nicht gefunden, Snapshot ohne Eingabedatei.')
+		if os.path.exists(OUTPUT_FILE):
+			shutil.copy2(OUTPUT_FILE, os.path.join(version_dir, 'Jahresdienstplan_2026.csv'))
+			copied_output = True
+		else:
+			print('Hinweis: Jahresdienstplan_2026.csv nicht gefunden, Snapshot ohne Output-Datei.')
+	if copied_output:
+		# Kompakte Binärfassung neben der CSV (nur für verlustfrei darstellbare Pläne)
+		with rec.phase('binaerplan'):
+			try:
+				plan_binary.csv_to_binary(os.path.join(version_dir, 'Jahresdienstplan_2026.csv'))
+			except ValueError as e:
+				print(f'Hinweis: kein Binärplan ({e})')
 
 	# Metadata schreiben
 	metadata = {
@@ -71,19 +219,36 @@ def create_snapshot(version: str = None, note: str = '') -> str:
 		'timestamp': datetime.now().isoformat(timespec='seconds'),
 		'note': note,
 	}
-	with open(os.path.join(version_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
-		json.dump(metadata, f, ensure_ascii=False, indent=2)
+	write_metadata(version_dir, metadata)
 
-	# Validator ausführen, wenn beide Dateien vorhanden sind
+	# Validator ausführen (oder Ergebnis aus dem Cache übernehmen), wenn beide Dateien vorhanden sind
 	if copied_input and copied_output:
 		report_path = os.path.join(version_dir, 'validation_report.txt')
-		run_validator(
-			plan_path=os.path.join(version_dir, 'Jahresdienstplan_2026.csv'),
-			test_path=os.path.join(version_dir, 'Testdaten.csv'),
-			report_path=report_path,
-			out_dir=version_dir,
-		)
-		print(f'Validator-Bericht gespeichert: {report_path}')
+		run = validate_cached(version_dir, use_cache, rec)
+		metadata['hashes'] = run['hashes']
+		metadata['cache'] = run['cache']
+		write_metadata(version_dir, metadata)
+		if run['cache'] == 'hit':
+			print(f"Validator-Bericht aus Cache übernommen (gleiche Eingaben wie {run['source']}): {report_path}")
+		else:
+			print(f'Validator-Bericht gespeichert: {report_path}')
+		with rec.phase('metrik_index'), MetricsIndex(TESTS_DIR) as index:
+			index.update_version(version)
+		if charts:
+			# Direkt aus dem Ergebnis im Speicher; bei Cache-Treffern aus den übernommenen Berichten
+			with rec.phase('grafiken'):
+				detach(os.path.join(version_dir, n) for n in artifact_names(version_dir, is_chart_artifact))
+				plan_path = os.path.join(version_dir, 'Jahresdienstplan_2026.csv')
+				try:
+					if run.get('result') is not None:
+						visualize_reports.render_result(run['result'], version_dir, plan_path, rec)
+					else:
+						visualize_reports.render_reports(version_dir, plan_csv=plan_path, recorder=rec)
+				except ImportError as e:
+					print(f'Grafiken übersprungen ({e}); siehe requirements.txt')
+				else:
+					if use_cache:
+						store_charts(version_dir)
 	else:
 		print('Validator übersprungen (benötigt sowohl Testdaten.csv als auch Jahresdienstplan_2026.csv).')
 
@@ -91,29 +256,300 @@ def create_snapshot(version: str = None, note: str = '') -> str:
 	return version
 
 
-def list_versions():
+def version_names() -> List[str]:
 	ensure_tests_dir()
 	entries = [d for d in os.listdir(TESTS_DIR) if d.startswith('v') and os.path.isdir(os.path.join(TESTS_DIR, d))]
-	for d in sorted(entries):
-		print(d)
+	return sorted(entries)
+
+
+DEFAULT_TREND_METRICS = ['violations', 'max_abs_diff', 'monthly_abs_diff', 'q4_abs_diff', 'folgetage', 'favorite_rate', 'validate_ms']
+
+
+def _fmt(value) -> str:
+	if value is None:
+		return '-'
+	return f'{value:.2f}' if isinstance(value, float) else str(value)
+
+
+def _delta(value, before) -> str:
+	"""' (+3)' bzw. ' (-1.25)' gegenüber der Vorversion; leer ohne Änderung oder ohne Werte."""
+	if value is None or before is None or value == before:
+		return ''
+	return f' ({value - before:+.2f})' if isinstance(value, float) or isinstance(before, float) else f' ({value - before:+d})'
+
+
+def list_versions(sort_by: Optional[str] = None, descending: bool = False):
+	if not sort_by:
+		for d in version_names():
+			print(d)
+		return
+	metrics = list(METRICS)
+	with MetricsIndex(TESTS_DIR) as index:
+		index.refresh(version_names())
+		rows = index.rows(metrics, sort_by, descending)
+	print_table(['Version'] + [METRICS[m] for m in metrics], [[r[0]] + [_fmt(v) for v in r[2:]] for r in rows])
+
+
+def trend(metrics: Optional[List[str]] = None) -> int:
+	"""Kennzahlen aller Versionen in zeitlicher Reihenfolge (aus dem Metrik-Index)."""
+	metrics = metrics or DEFAULT_TREND_METRICS
+	with MetricsIndex(TESTS_DIR) as index:
+		index.refresh(version_names())
+		rows = index.rows(metrics)
+	if not rows:
+		print('Keine indizierten Versionen gefunden.')
+		return 0
+	header = ['Version', 'Zeitstempel'] + [METRICS[m] for m in metrics]
+	table = []
+	prev = None
+	for r in rows:
+		cells = [r[0], r[1] or '-']
+		for i, value in enumerate(r[2:]):
+			before = prev[2 + i] if prev else None
+			cells.append(_fmt(value) + _delta(value, before))
+		table.append(cells)
+		prev = r
+	print_table(header, table)
+	return 0
+
+
+# Spalten der Übersicht nach validate-all (Schlüssel aus validate_plan.summary_metrics)
+SUMMARY_COLUMNS = [
+	('violations', 'Verstöße'),
+	('abs_diff', '|Diff|'),
+	('monthly_abs_diff', 'Monat |Diff|'),
+	('q4_abs_diff', 'Q4 |Diff|'),
+	('folgetage', 'Folgetage'),
+	('favorite_hits', 'Lieblingstage'),
+]
+
+
+def validate_version(version: str, use_cache: bool = True) -> Dict:
+	"""Validiert tests/<version> neu (Bericht + Exporte im Versionsordner); liefert Kennzahlen."""
+	started = time.perf_counter()
+	version_dir = os.path.join(TESTS_DIR, version)
+	row: Dict = {'version': version, 'exit_code': None, 'days': None, 'metrics': {}, 'cache': None}
+	if os.path.exists(os.path.join(version_dir, 'Jahresdienstplan_2026.csv')) and os.path.exists(os.path.join(version_dir, 'Testdaten.csv')):
+		row.update(validate_cached(version_dir, use_cache))
+		row.pop('result', None)
+		metadata = read_metadata(version_dir)
+		if metadata.get('hashes') != row['hashes']:
+			metadata['hashes'] = row['hashes']
+			write_metadata(version_dir, metadata)
+	row['seconds'] = time.perf_counter() - started
+	return row
+
+
+def validate_version_uncached(version: str) -> Dict:
+	return validate_version(version, use_cache=False)
+
+
+def visualize_version(version: str, figure_workers: Optional[int] = None) -> Dict:
+	"""Erzeugt die Grafiken für tests/<version>; Ausgaben des Renderers landen im Ergebnis statt auf stdout.
+
+	Grafiken mit unveränderten Eingaben bleiben stehen; figure_workers wie bei render_inputs.
+	"""
+	started = time.perf_counter()
+	os.environ.setdefault('MPLBACKEND', 'Agg')
+	log = io.StringIO()
+	row: Dict = {'version': version, 'exit_code': 0}
+	version_dir = os.path.join(TESTS_DIR, version)
+	rec = profiling.PhaseRecorder()
+	status: Dict[str, str] = {}
+	try:
+		detach(os.path.join(version_dir, n) for n in artifact_names(version_dir, is_chart_artifact))
+		with contextlib.redirect_stdout(log):
+			status = visualize_reports.render_reports(version_dir, recorder=rec, workers=figure_workers)
+		rec.write_json(os.path.join(version_dir, VISUALIZE_TIMINGS_FILE), 'visualize_reports', version=version)
+	except Exception:
+		log.write(traceback.format_exc())
+		row['exit_code'] = 1
+	else:
+		store_charts(version_dir)
+	row['figures'] = sum(1 for s in status.values() if s == 'saved')
+	row['unchanged'] = sum(1 for s in status.values() if s == 'unchanged')
+	row['log'] = log.getvalue()
+	row['seconds'] = time.perf_counter() - started
+	return row
+
+
+def run_all(task: Callable[[str], Dict], versions: List[str], workers: Optional[int] = None) -> List[Dict]:
+	"""Führt task je Version in einem Prozesspool aus (workers=1: im aktuellen Prozess) mit Fortschrittsausgabe."""
+	rows: List[Dict] = []
+	total = len(versions)
+
+	def progress(row: Dict) -> None:
+		rows.append(row)
+		code = '-' if row['exit_code'] is None else row['exit_code']
+		print(f"[{len(rows)}/{total}] {row['version']}: exit {code} ({row['seconds']:.2f} s)", flush=True)
+
+	if workers == 1 or total <= 1:
+		for version in versions:
+			progress(task(version))
+	else:
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			futures = [pool.submit(task, version) for version in versions]
+			for fut in as_completed(futures):
+				progress(fut.result())
+	rows.sort(key=lambda r: r['version'])
+	return rows
+
+
+def print_table(header: List[str], rows: List[List]) -> None:
+	cells = [[str(c) for c in r] for r in [header] + rows]
+	widths = [max(len(r[i]) for r in cells) for i in range(len(header))]
+	for k, r in enumerate(cells):
+		print('  '.join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(r, widths))))
+		if k == 0:
+			print('  '.join('-' * w for w in widths))
+
+
+def _overall_exit_code(rows: List[Dict]) -> int:
+	# 1 (Fehler) vor 2 (Regelverstöße) vor 0
+	codes = {r['exit_code'] for r in rows if r['exit_code'] is not None}
+	return 1 if 1 in codes else (2 if 2 in codes else 0)
+
+
+def validate_all(workers: Optional[int] = None, versions: Optional[List[str]] = None, use_cache: bool = True) -> int:
+	versions = versions or version_names()
+	if not versions:
+		print('Keine Versionen gefunden.')
+		return 0
+	started = time.perf_counter()
+	rows = run_all(validate_version if use_cache else validate_version_uncached, versions, workers)
+	print()
+	header = ['Version', 'Exit', 'Tage'] + [label for _, label in SUMMARY_COLUMNS] + ['Sekunden']
+	table = []
+	for r in rows:
+		if r['exit_code'] is None:
+			table.append([r['version'], '-', '-'] + ['-'] * len(SUMMARY_COLUMNS) + [f"{r['seconds']:.2f}"])
+			continue
+		m = r['metrics']
+		table.append([r['version'], r['exit_code'], r['days'] if r['days'] is not None else '-'] + [m.get(k, '-') for k, _ in SUMMARY_COLUMNS] + [f"{r['seconds']:.2f}"])
+	print_table(header, table)
+	with MetricsIndex(TESTS_DIR) as index:
+		for r in rows:
+			index.update_version(r['version'], commit=False)
+		index.conn.commit()
+	skipped = sum(1 for r in rows if r['exit_code'] is None)
+	hits = sum(1 for r in rows if r.get('cache') == 'hit')
+	print(f"\n{len(rows)} Versionen in {time.perf_counter() - started:.2f} s validiert" + (f", {hits} aus Cache" if hits else '') + (f" ({skipped} ohne Plan/Testdaten übersprungen)" if skipped else ''))
+	return _overall_exit_code(rows)
+
+
+def visualize_all(workers: Optional[int] = None, versions: Optional[List[str]] = None) -> int:
+	versions = versions or version_names()
+	if not versions:
+		print('Keine Versionen gefunden.')
+		return 0
+	started = time.perf_counter()
+	# Laufen mehrere Versionen parallel, zeichnet jede ihre Grafiken im eigenen Prozess
+	task = visualize_version if workers == 1 or len(versions) <= 1 else functools.partial(visualize_version, figure_workers=1)
+	rows = run_all(task, versions, workers)
+	print()
+	print_table(['Version', 'Exit', 'Grafiken', 'Unverändert', 'Sekunden'], [[r['version'], r['exit_code'], r['figures'], r['unchanged'], f"{r['seconds']:.2f}"] for r in rows])
+	for r in rows:
+		if r['exit_code']:
+			print(f"\n--- {r['version']} ---\n{r['log']}", file=sys.stderr)
+	print(f"\n{len(rows)} Versionen in {time.perf_counter() - started:.2f} s visualisiert")
+	return _overall_exit_code(rows)
+
+
+def cache_command(max_mb: Optional[float] = None, clear: bool = False) -> int:
+	cache = SnapshotCache(CACHE_DIR)
+	if clear or max_mb is not None:
+		removed = cache.evict(0 if clear else int(max_mb * 1024 * 1024))
+		print(f'{len(removed)} Cache-Einträge entfernt.')
+	entries = cache.entries()
+	total = sum(size for _, _, size in entries)
+	print(f'{len(entries)} Einträge, {total / 1024:.1f} KiB (Limit {cache.max_bytes / 1024 / 1024:.0f} MiB): {CACHE_DIR}')
+	return 0
+
+
+def diff_versions(version_a: str, version_b: str, out_dir: Optional[str] = None, limit: int = 50) -> int:
+	"""Vergleicht die Pläne zweier Versionen tageweise (ohne erneute Validierung)."""
+	paths = {}
+	for version in (version_a, version_b):
+		version_dir = os.path.join(TESTS_DIR, version)
+		plan_path = os.path.join(version_dir, 'Jahresdienstplan_2026.csv')
+		test_path = os.path.join(version_dir, 'Testdaten.csv')
+		if not (os.path.exists(plan_path) and os.path.exists(test_path)):
+			print(f'Version {version} enthält nicht sowohl Testdaten.csv als auch Jahresdienstplan_2026.csv.', file=sys.stderr)
+			return 1
+		paths[version] = (plan_path, test_path)
+	(plan_a, test_a), (plan_b, test_b) = paths[version_a], paths[version_b]
+	abt_a = validate_plan.parse_abteilungen_csv(test_a)
+	abt_b = abt_a if file_sha256(test_a) == file_sha256(test_b) else validate_plan.parse_abteilungen_csv(test_b)
+	result = diff_plans(plan_a, plan_b, abt_a, abt_b)
+	print_diff(result, version_a, version_b, limit)
+	out_dir = out_dir or os.path.join(TESTS_DIR, version_b)
+	written = write_diff_csvs(result, out_dir, f'diff_{version_a}')
+	print(f"\nDiff-CSV gespeichert: {', '.join(written)}")
+	return 0
 
 
 def main():
 	parser = argparse.ArgumentParser(description='Verwalte versionierte Test-Snapshots')
 	sub = parser.add_subparsers(dest='cmd', required=True)
+	# --profile/--metrics-json/--cprofile stehen hinter jedem Unterbefehl zur Verfügung
+	common = argparse.ArgumentParser(add_help=False)
+	profiling.add_arguments(common)
 
-	p_snap = sub.add_parser('snapshot', help='Erzeuge einen Snapshot (Version)')
+	p_snap = sub.add_parser('snapshot', help='Erzeuge einen Snapshot (Version)', parents=[common])
 	p_snap.add_argument('--version', help='Versionsname (Default: Zeitstempel)')
 	p_snap.add_argument('--note', default='', help='Kommentar zur Version')
+	p_snap.add_argument('--no-cache', action='store_true', help='Validator immer neu ausführen (Cache weder lesen noch schreiben)')
+	p_snap.add_argument('--charts', action='store_true', help='Grafiken direkt aus dem Validierungsergebnis erzeugen (benötigt pandas/seaborn/matplotlib)')
+
+	p_list = sub.add_parser('list', help='Liste vorhandene Test-Versionen', parents=[common])
+	p_list.add_argument('--sort-by', choices=list(METRICS), default=None, help='Als Tabelle aus dem Metrik-Index, sortiert nach dieser Kennzahl')
+	p_list.add_argument('--desc', action='store_true', help='Absteigend sortieren')
 
-	sub.add_parser('list', help='Liste vorhandene Test-Versionen')
+	p_trend = sub.add_parser('trend', help='Kennzahlen aller Versionen chronologisch (mit Änderung zur Vorversion)', parents=[common])
+	p_trend.add_argument('--metric', action='append', choices=list(METRICS), help=f"Kennzahl (mehrfach möglich; Default: {', '.join(DEFAULT_TREND_METRICS)})")
+
+	for name, help_text in (('validate-all', 'Validiere alle Versionen neu (parallel) und zeige eine Übersicht'), ('visualize-all', 'Erzeuge die Grafiken aller Versionen neu (parallel)')):
+		p_all = sub.add_parser(name, help=help_text, parents=[common])
+		p_all.add_argument('--workers', type=int, default=None, help='Anzahl Prozesse (Default: CPU-Anzahl; 1 = ohne Pool)')
+		p_all.add_argument('versions', nargs='*', help='Nur diese Versionen (Default: alle unter tests/)')
+		if name == 'validate-all':
+			p_all.add_argument('--no-cache', action='store_true', help='Alle Versionen neu validieren (Cache ignorieren)')
+
+	p_diff = sub.add_parser('diff', help='Vergleiche die Pläne zweier Versionen (geänderte Tage, Kennzahl-Deltas)', parents=[common])
+	p_diff.add_argument('version_a', help='Alte Version')
+	p_diff.add_argument('version_b', help='Neue Version')
+	p_diff.add_argument('--out-dir', default=None, help='Ordner für die Diff-CSVs (Default: tests/<version_b>)')
+	p_diff.add_argument('--limit', type=int, default=50, help='Höchstens so viele geänderte Tage auf der Konsole')
+
+	p_cache = sub.add_parser('cache', help='Zeige bzw. verkleinere den Ergebnis-Cache (tests/.cache)', parents=[common])
+	p_cache.add_argument('--max-mb', type=float, default=None, help=f'Auf diese Größe verkleinern (LRU; Default: ${MAX_MB_ENV} oder {DEFAULT_MAX_MB})')
+	p_cache.add_argument('--clear', action='store_true', help='Cache vollständig leeren')
 
 	args = parser.parse_args()
+	rec = profiling.recorder_from_args(args)
+	with rec.phase(args.cmd):
+		code = profiling.run_profiled(args.cprofile, _dispatch, args, rec)
+	profiling.report(rec, args, 'manage_tests', cmd=args.cmd, exit_code=code)
+	return code
+
+
+def _dispatch(args: argparse.Namespace, recorder: profiling.PhaseRecorder) -> int:
 	if args.cmd == 'snapshot':
-		create_snapshot(args.version, args.note)
+		create_snapshot(args.version, args.note, not args.no_cache, recorder, args.charts)
 	elif args.cmd == 'list':
-		list_versions()
+		list_versions(args.sort_by, args.desc)
+	elif args.cmd == 'trend':
+		return trend(args.metric)
+	elif args.cmd == 'validate-all':
+		return validate_all(args.workers, args.versions, not args.no_cache)
+	elif args.cmd == 'visualize-all':
+		return visualize_all(args.workers, args.versions)
+	elif args.cmd == 'diff':
+		return diff_versions(args.version_a, args.version_b, args.out_dir, args.limit)
+	elif args.cmd == 'cache':
+		return cache_command(args.max_mb, args.clear)
+	return 0
 
 
 if __name__ == '__main__':
-	main()
+	sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""SQLite-Index der Kennzahlen aller Test-Snapshots (tests/<version>).
+
+Die Kennzahlen stammen aus den Validator-Ausgaben im Versionsordner: validation_report.txt
+(Plan-Tage, Verstöße, Proportionalität, Folgetage, Lieblingstage, Exit-Code) sowie
+validation_monthly_quota_deviation.csv und validation_q4_skew.csv (fehlen bei alten Versionen ->
+NULL); die Validierungsdauer stammt aus timings.json (manage_tests). Je Version wird eine
+Signatur (Größe/mtime der Quelldateien) gespeichert; refresh() liest nur Versionen neu ein,
+deren Signatur sich geändert hat.
+"""
+import csv
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+INDEX_FILE = '.metrics.sqlite'
+SCHEMA_VERSION = 3  # 3: Q4-Kennzahlen neu einlesen (waren durch falschen Pfad NULL)
+
+# Kennzahl -> Bezeichnung (Reihenfolge = Spaltenreihenfolge in Übersichten)
+METRICS = {
+	'exit_code': 'Exit',
+	'days': 'Tage',
+	'violations': 'Verstöße',
+	'max_abs_diff': 'max |Diff|',
+	'abs_diff': '|Diff|',
+	'monthly_abs_diff': 'Monat |Diff|',
+	'monthly_max_abs_diff': 'Monat max',
+	'q4_abs_diff': 'Q4 |Diff|',
+	'q4_max_abs_diff': 'Q4 max',
+	'folgetage': 'Folgetage',
+	'favorite_rate': 'Lieblingstage %',
+	'validate_ms': 'Validierung ms',
+}
+REAL_METRICS = frozenset({'favorite_rate', 'validate_ms'})
+
+SOURCE_FILES = ('metadata.json', 'validation_report.txt', 'validation_monthly_quota_deviation.csv', 'validation_q4_skew.csv', 'timings.json')
+
+_DEVIATION_RE = re.compile(r'^- Abt (-?\d+): Ziel (-?\d+), Ist (-?\d+), Diff ([+-]?\d+)$')
+_COUNT_RE = re.compile(r'^- Abt (-?\d+): (\d+)$')
+_FAVORITE_RE = re.compile(r'^- Abt (-?\d+): (\d+)/(\d+)$')
+_EXIT_RE = re.compile(r'^\[validator-exit-code\]: (-?\d+)$')
+
+
+def _read_lines(path: str) -> List[str]:
+	with open(path, encoding='utf-8') as f:
+		return f.read().splitlines()
+
+
+def parse_report(path: str) -> Dict[str, Optional[float]]:
+	"""Kennzahlen aus dem Konsolenbericht des Validators (validation_report.txt)."""
+	m: Dict[str, Optional[float]] = {'exit_code': None, 'days': None, 'violations': 0}
+	diffs: List[int] = []
+	folgetage = 0
+	fav_hits = fav_total = 0
+	section = None
+	for line in _read_lines(path):
+		if line.startswith('Plan-Tage:'):
+			m['days'] = int(line.split(':', 1)[1])
+		elif line == 'Regelverstöße:':
+			section = 'violations'
+		elif line.startswith('Proportionalität'):
+			section = 'deviations'
+		elif line.startswith('Folgetage je Abteilung'):
+			section = 'folgetage'
+		elif line.startswith('Lieblingstage-Treffer'):
+			section = 'favorites'
+		elif not line.startswith('- '):
+			section = None
+			hit = _EXIT_RE.match(line)
+			if hit:
+				m['exit_code'] = int(hit.group(1))
+		elif section == 'violations':
+			m['violations'] += 1
+		elif section == 'deviations':
+			hit = _DEVIATION_RE.match(line)
+			if hit:
+				diffs.append(abs(int(hit.group(4))))
+		elif section == 'folgetage':
+			hit = _COUNT_RE.match(line)
+			if hit:
+				folgetage += int(hit.group(2))
+		elif section == 'favorites':
+			hit = _FAVORITE_RE.match(line)
+			if hit:
+				fav_hits += int(hit.group(2))
+				fav_total += int(hit.group(3))
+	m['abs_diff'] = sum(diffs)
+	m['max_abs_diff'] = max(diffs, default=0)
+	m['folgetage'] = folgetage
+	m['favorite_rate'] = round(100.0 * fav_hits / fav_total, 2) if fav_total else None
+	return m
+
+
+def _abs_diffs(path: str) -> Optional[List[int]]:
+	if not os.path.exists(path):
+		return None
+	with open(path, newline='', encoding='utf-8') as f:
+		return [abs(int(row['Diff'])) for row in csv.DictReader(f, delimiter=';')]
+
+
+def metrics_from_dir(version_dir: str) -> Optional[Dict[str, Optional[float]]]:
+	"""Alle Kennzahlen einer Version oder None, wenn kein Validator-Bericht vorliegt."""
+	report = os.path.join(version_dir, 'validation_report.txt')
+	if not os.path.exists(report):
+		return None
+	m = parse_report(report)
+	monthly = _abs_diffs(os.path.join(version_dir, 'validation_monthly_quota_deviation.csv'))
+	q4 = _abs_diffs(os.path.join(version_dir, 'validation_q4_skew.csv'))
+	m['monthly_abs_diff'] = sum(monthly) if monthly is not None else None
+	m['monthly_max_abs_diff'] = max(monthly, default=0) if monthly is not None else None
+	m['q4_abs_diff'] = sum(q4) if q4 is not None else None
+	m['q4_max_abs_diff'] = max(q4, default=0) if q4 is not None else None
+	m['validate_ms'] = _validate_ms(os.path.join(version_dir, 'timings.json'))
+	return m
+
+
+def _validate_ms(path: str) -> Optional[float]:
+	"""Gemessene Validierungsdauer (bei Cache-Treffern die der Quellversion) oder None."""
+	try:
+		with open(path, encoding='utf-8') as f:
+			seconds = json.load(f).get('validation_seconds')
+	except (OSError, ValueError):
+		return None
+	return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def _signature(version_dir: str) -> str:
+	parts = []
+	for name in SOURCE_FILES:
+		try:
+			st = os.stat(os.path.join(version_dir, name))
+			parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}")
+		except FileNotFoundError:
+			parts.append(f"{name}:-")
+	return '|'.join(parts)
+
+
+class MetricsIndex:
+	def __init__(self, tests_dir: str, path: Optional[str] = None):
+		self.tests_dir = tests_dir
+		self.path = path or os.path.join(tests_dir, INDEX_FILE)
+		os.makedirs(os.path.dirname(self.path), exist_ok=True)
+		self.conn = sqlite3.connect(self.path)
+		self._ensure_schema()
+
+	def close(self) -> None:
+		self.conn.close()
+
+	def __enter__(self) -> 'MetricsIndex':
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	def _ensure_schema(self) -> None:
+		version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+		if version != SCHEMA_VERSION:
+			self.conn.execute('DROP TABLE IF EXISTS versions')
+		columns = ', '.join(f"{name} {'REAL' if name in REAL_METRICS else 'INTEGER'}" for name in METRICS)
+		self.conn.execute(f"CREATE TABLE IF NOT EXISTS versions (version TEXT PRIMARY KEY, timestamp TEXT, note TEXT, {columns}, signature TEXT, indexed_at TEXT)")
+		self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+		self.conn.commit()
+
+	def update_version(self, version: str, commit: bool = True) -> bool:
+		"""(Neu-)Indiziert eine Version; False, wenn es keinen Validator-Bericht gibt."""
+		version_dir = os.path.join(self.tests_dir, version)
+		metrics = metrics_from_dir(version_dir)
+		if metrics is None:
+			self.conn.execute('DELETE FROM versions WHERE version = ?', (version,))
+		else:
+			try:
+				with open(os.path.join(version_dir, 'metadata.json'), encoding='utf-8') as f:
+					meta = json.load(f)
+			except (OSError, ValueError):
+				meta = {}
+			names = ['version', 'timestamp', 'note'] + list(METRICS) + ['signature', 'indexed_at']
+			values = [version, meta.get('timestamp'), meta.get('note')] + [metrics.get(k) for k in METRICS] + [_signature(version_dir), datetime.now().isoformat(timespec='seconds')]
+			self.conn.execute(f"INSERT OR REPLACE INTO versions ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})", values)
+		if commit:
+			self.conn.commit()
+		return metrics is not None
+
+	def refresh(self, versions: List[str]) -> int:
+		"""Gleicht den Index mit den vorhandenen Versionen ab; liefert die Zahl neu gelesener Versionen."""
+		known = dict(self.conn.execute('SELECT version, signature FROM versions'))
+		updated = 0
+		for version in versions:
+			if known.pop(version, None) != _signature(os.path.join(self.tests_dir, version)):
+				self.update_version(version, commit=False)
+				updated += 1
+		for gone in known:
+			self.conn.execute('DELETE FROM versions WHERE version = ?', (gone,))
+		self.conn.commit()
+		return updated
+
+	def rows(self, metrics: List[str], sort_by: Optional[str] = None, descending: bool = False) -> List[Tuple]:
+		"""(version, timestamp, *metrics) je Version; Default-Sortierung: Zeitstempel, dann Name."""
+		for name in metrics + ([sort_by] if sort_by else []):
+			if name not in METRICS:
+				raise ValueError(f"Unbekannte Kennzahl: {name} (verfügbar: {', '.join(METRICS)})")
+		order = f"{sort_by} IS NULL, {sort_by} {'DESC' if descending else 'ASC'}, version" if sort_by else 'timestamp IS NULL, timestamp, version'
+		cols = ', '.join(['version', 'timestamp'] + metrics)
+		return self.conn.execute(f'SELECT {cols} FROM versions ORDER BY {order}').fetchall()
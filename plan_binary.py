@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Kompaktes Binärformat für Pläne (.dpb) neben der Plan-CSV.
+
+Aufbau (Little Endian):
+- Kopf (HEADER): Magic b'DPB1', Formatversion, erstes/letztes Jahr, Bundesland, Anzahl
+  Arbeitstage, Anzahl Abteilungen und die ersten 32 Zeichen des Kalender-Fingerprints
+- Abteilungstabelle: int32 je Abteilungsnummer (aufsteigend)
+- Tage: uint16 je Arbeitstag der Jahre (WorkingDayAxis) -> Index in die Abteilungstabelle,
+  NO_ENTRY für Arbeitstage ohne Eintrag
+
+BinaryPlan lädt die Datei per mmap und liest Tabelle und Tage als memoryview, ohne Parsing je
+Zeile. Die Umwandlung ist in beiden Richtungen verlustfrei: csv_to_binary erzeugt aus dem
+Binärplan testweise wieder den CSV-Text und lehnt Pläne ab, die sich so nicht byte-genau
+darstellen lassen (unsortiert, Nicht-Arbeitstage, doppelte Tage, abweichende Schreibweise).
+Solche Pläne bleiben CSV; der Validator meldet ihre Fehler wie gewohnt.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import date
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from calendar_service import WorkingDayAxis, calendar_fingerprint
+from validate_plan import BINARY_PLAN_SUFFIX, GERMAN_WEEKDAYS, format_date_de, iter_plan_rows, parse_date_de
+
+BINARY_SUFFIX = BINARY_PLAN_SUFFIX
+MAGIC = b'DPB1'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHH2sII32s')
+NO_ENTRY = 0xFFFF
+CSV_HEADER = 'Datum;Wochentag;Abteilungsnummer'
+DEFAULT_YEAR = 2026
+
+
+def binary_path_for(csv_path: str) -> str:
+	return os.path.splitext(csv_path)[0] + BINARY_SUFFIX
+
+
+def is_binary_plan(path: str) -> bool:
+	return os.fspath(path).endswith(BINARY_SUFFIX)
+
+
+def resolve_plan(path: str) -> str:
+	"""path, oder das gleichnamige Gegenstück (.csv <-> .dpb), falls nur dieses existiert."""
+	if os.path.exists(path):
+		return path
+	base = os.path.splitext(path)[0]
+	other = base + ('.csv' if is_binary_plan(path) else BINARY_SUFFIX)
+	return other if os.path.exists(other) else path
+
+
+def _fingerprint(start_year: int, end_year: int, state: str) -> bytes:
+	return calendar_fingerprint(range(start_year, end_year + 1), state)[:32].encode('ascii')
+
+
+def encode(entries: Iterable[Tuple[date, int]], state: str = 'BE') -> bytes:
+	"""(Datum, Abteilung) aufsteigend nach Datum, nur Arbeitstage -> Dateiinhalt; sonst ValueError."""
+	entries = list(entries)
+	start_year = entries[0][0].year if entries else DEFAULT_YEAR
+	end_year = entries[-1][0].year if entries else DEFAULT_YEAR
+	axis = WorkingDayAxis(start_year, end_year, state)
+	nums = sorted({num for _, num in entries})
+	if len(nums) >= NO_ENTRY:
+		raise ValueError(f"Zu viele Abteilungen für das Binärformat: {len(nums)}")
+	slot_of = {num: k for k, num in enumerate(nums)}
+	days = array('H', [NO_ENTRY]) * len(axis)
+	last = -1
+	for d, num in entries:
+		i = axis.index(d)
+		if i < 0:
+			raise ValueError(f"Kein Arbeitstag: {format_date_de(d)}")
+		if i <= last:
+			raise ValueError(f"Plan nicht streng aufsteigend sortiert bei {format_date_de(d)}")
+		days[i] = slot_of[num]
+		last = i
+	table = array('i', nums)
+	if sys.byteorder != 'little':
+		days.byteswap()
+		table.byteswap()
+	header = HEADER.pack(MAGIC, FORMAT_VERSION, start_year, end_year, state.encode('ascii'), len(days), len(table), _fingerprint(start_year, end_year, state))
+	return header + table.tobytes() + days.tobytes()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+	parent = os.path.dirname(path)
+	if parent:
+		os.makedirs(parent, exist_ok=True)
+	with open(path + '.tmp', 'wb') as f:
+		f.write(data)
+	os.replace(path + '.tmp', path)
+
+
+def write_plan_binary(path: str, plan: Iterable[Tuple[date, str, int]]) -> None:
+	"""Schreibt einen Plan aus (Datum, Wochentag, Abteilung)-Einträgen (wie write_plan_csv)."""
+	_write_atomic(path, encode((d, num) for d, _, num in plan))
+
+
+class BinaryPlan:
+	"""Per mmap geladener Binärplan; days/depts sind memoryviews (uint16/int32) ohne Kopie."""
+
+	def __init__(self, path: str):
+		self.path = path
+		with open(path, 'rb') as f:
+			size = os.fstat(f.fileno()).st_size
+			if size < HEADER.size:
+				raise ValueError(f"Kein Binärplan (zu kurz): {path}")
+			self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		try:
+			magic, version, self.start_year, self.end_year, state, n_days, n_depts, fingerprint = HEADER.unpack_from(self._mm, 0)
+			if magic != MAGIC or version != FORMAT_VERSION:
+				raise ValueError(f"Kein Binärplan im Format {MAGIC.decode()} v{FORMAT_VERSION}: {path}")
+			self.state = state.decode('ascii')
+			if size != HEADER.size + 4 * n_depts + 2 * n_days:
+				raise ValueError(f"Binärplan unvollständig oder beschädigt: {path}")
+			if fingerprint != _fingerprint(self.start_year, self.end_year, self.state):
+				raise ValueError(f"Feiertagskalender hat sich geändert; Binärplan aus der CSV neu erzeugen: {path}")
+			self.axis = WorkingDayAxis(self.start_year, self.end_year, self.state)
+			if len(self.axis) != n_days:
+				raise ValueError(f"Arbeitstage passen nicht zum Kalender: {path}")
+			self._views: List[memoryview] = []
+			view = memoryview(self._mm)
+			self._views.append(view)
+			self.depts = self._view(view[HEADER.size:HEADER.size + 4 * n_depts], 'i')
+			self.days = self._view(view[HEADER.size + 4 * n_depts:], 'H')
+		except Exception:
+			self.close()
+			raise
+
+	def _view(self, raw: memoryview, fmt: str):
+		self._views.append(raw)
+		if sys.byteorder == 'little':
+			view = raw.cast(fmt)
+			self._views.append(view)
+			return view
+		# Big-Endian-Host: einmalig kopieren und drehen
+		values = array(fmt, raw.tobytes())
+		values.byteswap()
+		return values
+
+	def close(self) -> None:
+		for view in reversed(getattr(self, '_views', [])):
+			view.release()
+		self._views = []
+		if not self._mm.closed:
+			self._mm.close()
+
+	def __enter__(self) -> 'BinaryPlan':
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	def __len__(self) -> int:
+		"""Anzahl belegter Arbeitstage."""
+		return len(self.days) - self.days.tolist().count(NO_ENTRY)
+
+	def entries(self) -> Iterator[Tuple[date, str, int]]:
+		"""(Datum, Wochentag, Abteilung) je belegtem Arbeitstag, aufsteigend."""
+		ordinals = self.axis.ordinals
+		depts = self.depts
+		weekdays = GERMAN_WEEKDAYS
+		for i, k in enumerate(self.days):
+			if k != NO_ENTRY:
+				d = date.fromordinal(ordinals[i])
+				yield d, weekdays[d.weekday()], depts[k]
+
+	def rows(self) -> Iterator[Tuple[str, str, str]]:
+		"""Dieselben Einträge als CSV-Felder (wie iter_plan_rows)."""
+		for d, weekday_name, num in self.entries():
+			yield format_date_de(d), weekday_name, str(num)
+
+	def csv_text(self) -> str:
+		return ''.join(f"{line}\n" for line in [CSV_HEADER] + [';'.join(r) for r in self.rows()])
+
+
+def iter_binary_entries(path: str) -> Iterator[Tuple[date, str, int]]:
+	with BinaryPlan(path) as plan:
+		yield from plan.entries()
+
+
+def iter_binary_rows(path: str) -> Iterator[Tuple[str, str, str]]:
+	with BinaryPlan(path) as plan:
+		yield from plan.rows()
+
+
+def csv_to_binary(csv_path: str, out_path: Optional[str] = None) -> str:
+	"""Schreibt den Binärplan neben die CSV (oder nach out_path); ValueError, wenn nicht verlustfrei."""
+	with open(csv_path, newline='', encoding='utf-8') as f:
+		text = f.read()
+	entries = []
+	for datum, _, abt in iter_plan_rows(csv_path):
+		try:
+			entries.append((parse_date_de(datum), int(abt)))
+		except ValueError:
+			raise ValueError(f"Nicht binär darstellbar (Datum '{datum}', Abteilung '{abt}'): {csv_path}") from None
+	data = encode(entries)
+	out_path = out_path or binary_path_for(csv_path)
+	_write_atomic(out_path, data)
+	with BinaryPlan(out_path) as plan:
+		same = plan.csv_text() == text
+	if not same:
+		os.remove(out_path)
+		raise ValueError(f"Nicht verlustfrei binär darstellbar (Schreibweise, Wochentage oder Leerzeilen weichen ab): {csv_path}")
+	return out_path
+
+
+def binary_to_csv(bin_path: str, out_path: Optional[str] = None) -> str:
+	out_path = out_path or os.path.splitext(bin_path)[0] + '.csv'
+	with BinaryPlan(bin_path) as plan:
+		text = plan.csv_text()
+	parent = os.path.dirname(out_path)
+	if parent:
+		os.makedirs(parent, exist_ok=True)
+	with open(out_path, 'w', newline='', encoding='utf-8') as f:
+		f.write(text)
+	return out_path
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description='Plan-CSV <-> Binärplan (.dpb)')
+	sub = parser.add_subparsers(dest='cmd', required=True)
+	p_enc = sub.add_parser('encode', help='Binärplan neben jede Plan-CSV schreiben')
+	p_enc.add_argument('csv', nargs='+', help='Plan-CSV(s), z. B. tests/*/Jahresdienstplan_*.csv')
+	p_dec = sub.add_parser('decode', help='Binärplan zurück in CSV wandeln')
+	p_dec.add_argument('dpb', help='Binärplan')
+	p_dec.add_argument('--out', default=None, help='Ziel-CSV (Default: gleicher Name mit .csv)')
+	p_info = sub.add_parser('info', help='Kopfdaten eines Binärplans anzeigen')
+	p_info.add_argument('dpb', help='Binärplan')
+	args = parser.parse_args()
+
+	if args.cmd == 'encode':
+		failed = 0
+		for path in args.csv:
+			try:
+				print(f"Binärplan gespeichert: {csv_to_binary(path)}")
+			except (OSError, ValueError) as e:
+				print(f"Übersprungen: {e}", file=sys.stderr)
+				failed += 1
+		return 1 if failed else 0
+	try:
+		if args.cmd == 'decode':
+			print(f"CSV gespeichert: {binary_to_csv(args.dpb, args.out)}")
+		else:
+			with BinaryPlan(args.dpb) as plan:
+				print(f"Jahre: {plan.start_year}–{plan.end_year} ({plan.state})")
+				print(f"Arbeitstage: {len(plan.days)}, belegt: {len(plan)}")
+				print(f"Abteilungen: {len(plan.depts)}")
+				print(f"Dateigröße: {os.path.getsize(args.dpb)} Bytes")
+	except (OSError, ValueError) as e:
+		print(f"Fehler: {e}", file=sys.stderr)
+		return 1
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Unterschiede zwischen zwei Plänen (z. B. zwei Snapshots) in einem Merge-Durchlauf.
+
+Beide Pläne werden nach Datum zusammengeführt (sortierte Eingaben werden nicht neu sortiert).
+Geänderte Tage (umbesetzt, hinzugekommen, weggefallen) ergeben direkt die Deltas für Ist je
+Abteilung, Monats-Ist, Q4-Ist und Lieblingstage-Treffer; eine vollständige Validierung beider
+Pläne ist nicht nötig. Folgetage werden im selben Durchlauf für beide Pläne mitgezählt.
+Lieblingstage werden je Seite mit deren Testdaten bewertet.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+from typing import Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from validate_plan import (
+	BINARY_PLAN_SUFFIX,
+	Abteilung,
+	Q4_MONTHS,
+	format_date_de,
+	iter_plan_rows,
+	parse_abteilungen_csv,
+	parse_plan_rows,
+	write_csv,
+)
+
+
+class DayChange(NamedTuple):
+	datum: str
+	alt: Optional[int]  # None: Tag fehlt in Plan A
+	neu: Optional[int]  # None: Tag fehlt in Plan B
+	verhindert_neu: bool  # neue Abteilung ist an dem Tag verhindert (Testdaten B)
+
+
+class PlanDiff:
+	__slots__ = ('days_a', 'days_b', 'changes', 'ist_a', 'delta', 'monthly_delta', 'q4_delta', 'favorite_delta', 'folgetage_a', 'folgetage_b')
+
+	def __init__(self):
+		self.days_a = 0
+		self.days_b = 0
+		self.changes: List[DayChange] = []
+		self.ist_a: Dict[int, int] = {}
+		self.delta: Dict[int, int] = {}
+		self.monthly_delta: Dict[Tuple[str, int], int] = {}
+		self.q4_delta: Dict[int, int] = {}
+		self.favorite_delta: Dict[int, int] = {}
+		self.folgetage_a = 0
+		self.folgetage_b = 0
+
+	def department_rows(self) -> List[List[int]]:
+		"""[Abteilung, Ist A, Ist B, Delta, Q4 Delta, Lieblingstage Delta] für alle betroffenen Abteilungen."""
+		nums = sorted(set(self.delta) | set(self.q4_delta) | set(self.favorite_delta))
+		return [[n, self.ist_a.get(n, 0), self.ist_a.get(n, 0) + self.delta.get(n, 0), self.delta.get(n, 0), self.q4_delta.get(n, 0), self.favorite_delta.get(n, 0)] for n in nums]
+
+	def monthly_rows(self) -> List[List]:
+		return [[month, num, d] for (month, num), d in sorted(self.monthly_delta.items()) if d]
+
+
+def plan_entries(path: str) -> List[Tuple[date, int]]:
+	"""(Datum, Abteilung) je verwertbarer Planzeile, nach Datum sortiert (stabil)."""
+	if path.endswith(BINARY_PLAN_SUFFIX):
+		# Binärpläne sind sortiert und geprüft
+		from plan_binary import iter_binary_entries
+		return [(d, num) for d, _, num in iter_binary_entries(path)]
+	entries = [(d, num) for d, _, num in parse_plan_rows(iter_plan_rows(path), frozenset(), None)]
+	if any(entries[i][0] > entries[i + 1][0] for i in range(len(entries) - 1)):
+		entries.sort(key=lambda e: e[0])
+	return entries
+
+
+def _merge(a: List[Tuple[date, int]], b: List[Tuple[date, int]]) -> Iterator[Tuple[date, Optional[int], Optional[int]]]:
+	i = j = 0
+	while i < len(a) or j < len(b):
+		if j >= len(b) or (i < len(a) and a[i][0] < b[j][0]):
+			yield a[i][0], a[i][1], None
+			i += 1
+		elif i >= len(a) or b[j][0] < a[i][0]:
+			yield b[j][0], None, b[j][1]
+			j += 1
+		else:
+			yield a[i][0], a[i][1], b[j][1]
+			i += 1
+			j += 1
+
+
+def diff_plans(plan_a: str, plan_b: str, abteilungen_a: List[Abteilung], abteilungen_b: List[Abteilung]) -> PlanDiff:
+	by_num_a = {x.nummer: x for x in abteilungen_a}
+	by_num_b = by_num_a if abteilungen_b is abteilungen_a else {x.nummer: x for x in abteilungen_b}
+
+	def is_fav(by_num: Dict[int, Abteilung], num: int, d: date) -> bool:
+		x = by_num.get(num)
+		return bool(x and x.verfuegbarkeit.is_favorite(d))
+
+	diff = PlanDiff()
+	prev_a = prev_b = None
+	for d, num_a, num_b in _merge(plan_entries(plan_a), plan_entries(plan_b)):
+		if num_a is not None:
+			diff.days_a += 1
+			diff.ist_a[num_a] = diff.ist_a.get(num_a, 0) + 1
+			if num_a == prev_a:
+				diff.folgetage_a += 1
+			prev_a = num_a
+		if num_b is not None:
+			diff.days_b += 1
+			if num_b == prev_b:
+				diff.folgetage_b += 1
+			prev_b = num_b
+		if num_a == num_b:
+			# Gleiche Besetzung; bei abweichenden Testdaten kann sich nur der Lieblingstag-Status ändern
+			if by_num_a is not by_num_b and num_a is not None:
+				change = is_fav(by_num_b, num_a, d) - is_fav(by_num_a, num_a, d)
+				if change:
+					diff.favorite_delta[num_a] = diff.favorite_delta.get(num_a, 0) + change
+			continue
+		x = by_num_b.get(num_b) if num_b is not None else None
+		diff.changes.append(DayChange(format_date_de(d), num_a, num_b, bool(x and x.verfuegbarkeit.is_blocked(d))))
+		month = f"{d.year}-{d.month:02d}"
+		for num, sign, fav in ((num_a, -1, num_a is not None and is_fav(by_num_a, num_a, d)), (num_b, 1, num_b is not None and is_fav(by_num_b, num_b, d))):
+			if num is None:
+				continue
+			diff.delta[num] = diff.delta.get(num, 0) + sign
+			diff.monthly_delta[(month, num)] = diff.monthly_delta.get((month, num), 0) + sign
+			if d.month in Q4_MONTHS:
+				diff.q4_delta[num] = diff.q4_delta.get(num, 0) + sign
+			if fav:
+				diff.favorite_delta[num] = diff.favorite_delta.get(num, 0) + sign
+	return diff
+
+
+def print_diff(diff: PlanDiff, label_a: str, label_b: str, limit: int = 50, out: Optional[TextIO] = None) -> None:
+	out = out or sys.stdout
+	moved = sum(1 for c in diff.changes if c.alt is not None and c.neu is not None)
+	added = sum(1 for c in diff.changes if c.alt is None)
+	removed = sum(1 for c in diff.changes if c.neu is None)
+	print(f"== Plan-Diff {label_a} → {label_b} ==", file=out)
+	print(f"Plan-Tage: {diff.days_a} → {diff.days_b}", file=out)
+	print(f"Geänderte Tage: {len(diff.changes)} (umbesetzt {moved}, neu {added}, entfallen {removed})", file=out)
+	print(f"Folgetage gesamt: {diff.folgetage_a} → {diff.folgetage_b} ({diff.folgetage_b - diff.folgetage_a:+d})", file=out)
+	if not diff.changes:
+		return
+	print(file=out)
+	print(f"Geänderte Tage{f' (erste {limit})' if len(diff.changes) > limit else ''}:", file=out)
+	for c in diff.changes[:limit]:
+		alt = '-' if c.alt is None else c.alt
+		neu = '-' if c.neu is None else c.neu
+		print(f"- {c.datum}: {alt} → {neu}{' (verhindert!)' if c.verhindert_neu else ''}", file=out)
+	print(file=out)
+	print("Abteilungen (Ist A → Ist B, Delta; Q4-Delta; Lieblingstage-Delta):", file=out)
+	for num, ist_a, ist_b, d, q4, fav in diff.department_rows():
+		print(f"- Abt {num}: {ist_a} → {ist_b} ({d:+d}); Q4 {q4:+d}; Lieblingstage {fav:+d}", file=out)
+	monthly = diff.monthly_rows()
+	if monthly:
+		print(file=out)
+		print("Monats-Ist-Änderungen (Top 10 nach |Delta|):", file=out)
+		for month, num, d in sorted(monthly, key=lambda r: abs(r[2]), reverse=True)[:10]:
+			print(f"- {month} Abt {num}: {d:+d}", file=out)
+
+
+def write_diff_csvs(diff: PlanDiff, out_dir: str, prefix: str) -> List[str]:
+	paths = [os.path.join(out_dir, f"{prefix}_{name}.csv") for name in ('days', 'departments', 'monthly')]
+	write_csv(paths[0], ['Datum', 'Alt', 'Neu', 'Verhindert_Neu'], [[c.datum, '' if c.alt is None else c.alt, '' if c.neu is None else c.neu, int(c.verhindert_neu)] for c in diff.changes])
+	write_csv(paths[1], ['Abteilung', 'Ist_A', 'Ist_B', 'Delta', 'Q4_Delta', 'Favoriten_Delta'], diff.department_rows())
+	write_csv(paths[2], ['Monat', 'Abteilung', 'Delta'], diff.monthly_rows())
+	return paths
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Vergleiche zwei Plan-CSVs tageweise')
+	parser.add_argument('plan_a', help='Alter Plan (CSV oder .dpb)')
+	parser.add_argument('plan_b', help='Neuer Plan (CSV oder .dpb)')
+	parser.add_argument('testdaten_a', help='Testdaten.csv zu Plan A')
+	parser.add_argument('testdaten_b', nargs='?', default=None, help='Testdaten.csv zu Plan B (Default: wie A)')
+	parser.add_argument('--out-dir', default=None, help='Ordner für diff_*.csv')
+	args = parser.parse_args()
+	abt_a = parse_abteilungen_csv(args.testdaten_a)
+	abt_b = parse_abteilungen_csv(args.testdaten_b) if args.testdaten_b else abt_a
+	result = diff_plans(args.plan_a, args.plan_b, abt_a, abt_b)
+	print_diff(result, os.path.basename(args.plan_a), os.path.basename(args.plan_b))
+	if args.out_dir:
+		write_diff_csvs(result, args.out_dir, 'diff')
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Zustandsbehafteter Plan für Was-wäre-wenn-Fragen (einzelne Tage umbesetzen, tauschen, rückgängig).
+
+PlanState hält alle Aggregate des Validators live: Ist je Abteilung, Monats-Ist, Q4-Ist,
+Folgetage, Lieblingstage-Treffer und Verhinderungen. assign/swap/undo ändern nur die Zähler der
+betroffenen Abteilungen und Nachbartage (O(1), Verhinderung per bisect in O(log n)) und liefern
+sofort die neuen Abweichungen der betroffenen Abteilungen. repair_plan.RepairState baut darauf auf.
+
+Interaktiv: python3 plan_state.py Jahresdienstplan_2026.csv Testdaten.csv
+"""
+import argparse
+import shlex
+import sys
+from datetime import date
+from typing import Dict, List, NamedTuple, Set, Tuple, Union
+
+from calendar_service import HolidaySet
+from generate_plan import PlanEntry, write_plan_csv
+from validate_plan import (
+	Abteilung,
+	Deviation,
+	GERMAN_WEEKDAYS,
+	MonthlyQuotaRow,
+	Q4_MONTHS,
+	Q4SkewRow,
+	Violation,
+	iter_plan_rows,
+	largest_remainder_targets,
+	parse_abteilungen_csv,
+	parse_date_de,
+	parse_plan_rows,
+	quota_years,
+	working_days_by_month,
+)
+
+Day = Union[date, int]  # Datum oder Position im Plan
+
+
+class StateChange(NamedTuple):
+	"""Ergebnis einer Änderung: neue Abweichungen der betroffenen Abteilungen plus Gesamtzähler."""
+	deviations: List[Deviation]
+	monthly: List[MonthlyQuotaRow]
+	q4: List[Q4SkewRow]
+	violations: int
+	folgetage: int
+	favorite_hits: int
+
+
+def load_plan(plan_csv: str) -> Tuple[List[date], List[int], List[Violation]]:
+	"""Gültige Planzeilen stabil nach Datum sortiert; nicht verwertbare Zeilen als Verstöße."""
+	problems: List[Violation] = []
+	rows = sorted(((d, num) for d, _, num in parse_plan_rows(iter_plan_rows(plan_csv), HolidaySet(), problems)), key=lambda x: x[0])
+	return [d for d, _ in rows], [num for _, num in rows], problems
+
+
+class PlanState:
+	"""Plan als Zuweisungsliste (Tag -> Abteilungsindex) mit laufend gepflegten Aggregaten."""
+
+	def __init__(self, days: List[date], nums: List[int], abteilungen: List[Abteilung]):
+		abt_by_num: Dict[int, Abteilung] = {a.nummer: a for a in abteilungen}
+		self.nums: List[int] = list(abt_by_num.keys())
+		self.depts: List[Abteilung] = list(abt_by_num.values())
+		self.n = len(self.depts)
+		self.idx_by_num = {num: i for i, num in enumerate(self.nums)}
+		# Unbekannte Nummern aus dem Plan erhalten eigene Indizes ohne Soll (nicht als Ziel wählbar)
+		for num in nums:
+			if num not in self.idx_by_num:
+				self.idx_by_num[num] = len(self.nums)
+				self.nums.append(num)
+		n_all = len(self.nums)
+		self.n_all = n_all
+
+		self.days = days
+		self.ordinals = [d.toordinal() for d in days]
+		self.weekdays = [d.weekday() for d in days]
+		# Soll je (Jahr, Monat) für alle Planjahre; Slot = Jahresindex * 12 + Monat - 1
+		self.years = quota_years(d.year for d in days)
+		year_idx = {year: y for y, year in enumerate(self.years)}
+		self.month_slot = [year_idx[d.year] * 12 + d.month - 1 for d in days]
+		self.q4_slot = [year_idx[d.year] if d.month in Q4_MONTHS else -1 for d in days]
+		self.fav_masks = [a.verfuegbarkeit.favorite_mask for a in self.depts] + [0] * (n_all - self.n)
+		self.avail = [a.verfuegbarkeit for a in self.depts]
+		self.position: Dict[int, int] = {}
+		for k, o in enumerate(self.ordinals):
+			self.position.setdefault(o, k)
+
+		self.assign = [self.idx_by_num[num] for num in nums]
+
+		targets = largest_remainder_targets(abteilungen, len(days))
+		self.ziel = [targets.get(num, 0) for num in self.nums]
+		n_years = len(self.years)
+		self.soll = [0] * (12 * n_years * n_all)
+		self.q4_soll = [0] * (n_years * n_all)
+		for y, year in enumerate(self.years):
+			monthly_days = working_days_by_month(year)
+			for month in range(1, 13):
+				mt = largest_remainder_targets(abteilungen, len(monthly_days[month]))
+				base = (y * 12 + month - 1) * n_all
+				for i, num in enumerate(self.nums):
+					self.soll[base + i] = mt.get(num, 0)
+			q4_targets = largest_remainder_targets(abteilungen, sum(len(monthly_days[m]) for m in Q4_MONTHS))
+			for i, num in enumerate(self.nums):
+				self.q4_soll[y * n_all + i] = q4_targets.get(num, 0)
+
+		self.count = [0] * n_all
+		self.month_ist = [0] * (12 * n_years * n_all)
+		self.q4 = [0] * (n_years * n_all)
+		self.consecutive = [0] * n_all
+		self.favorites = [0] * n_all
+		self.blocked = [False] * len(days)  # Verhinderung der aktuellen Besetzung je Tag
+		for k, a in enumerate(self.assign):
+			self.count[a] += 1
+			self.month_ist[self.month_slot[k] * n_all + a] += 1
+			if self.q4_slot[k] >= 0:
+				self.q4[self.q4_slot[k] * n_all + a] += 1
+			if k > 0 and self.assign[k - 1] == a:
+				self.consecutive[a] += 1
+			self.favorites[a] += self.fav_masks[a] >> self.weekdays[k] & 1
+			self.blocked[k] = self._blocked(k, a)
+		self.violations = sum(self.blocked)
+		self.folgetage = sum(self.consecutive)  # laufende Summen, in _move gepflegt
+		self.favorite_hits = sum(self.favorites)
+		self.history: List[List[Tuple[int, int]]] = []
+
+	@classmethod
+	def from_files(cls, plan_csv: str, testdaten_csv: str) -> 'PlanState':
+		days, nums, _ = load_plan(plan_csv)
+		return cls(days, nums, parse_abteilungen_csv(testdaten_csv))
+
+	def _blocked(self, k: int, a: int) -> bool:
+		return a < self.n and self.avail[a].is_blocked_ordinal(self.ordinals[k])
+
+	def _move(self, k: int, b: int) -> None:
+		"""Tag k an Abteilungsindex b; pflegt alle Aggregate in O(1)."""
+		assign = self.assign
+		a = assign[k]
+		if a == b:
+			return
+		n_all = self.n_all
+		blocked = self._blocked(k, b)
+		self.violations += blocked - self.blocked[k]
+		self.blocked[k] = blocked
+		if k > 0:
+			prev = assign[k - 1]
+			if prev == a:
+				self.consecutive[a] -= 1
+				self.folgetage -= 1
+			elif prev == b:
+				self.consecutive[b] += 1
+				self.folgetage += 1
+		if k + 1 < len(assign):
+			nxt = assign[k + 1]
+			if nxt == a:
+				self.consecutive[a] -= 1
+				self.folgetage -= 1
+			elif nxt == b:
+				self.consecutive[b] += 1
+				self.folgetage += 1
+		wd = self.weekdays[k]
+		fav_a = self.fav_masks[a] >> wd & 1
+		fav_b = self.fav_masks[b] >> wd & 1
+		self.favorites[a] -= fav_a
+		self.favorites[b] += fav_b
+		self.favorite_hits += fav_b - fav_a
+		assign[k] = b
+		self.count[a] -= 1
+		self.count[b] += 1
+		slot = self.month_slot[k] * n_all
+		self.month_ist[slot + a] -= 1
+		self.month_ist[slot + b] += 1
+		y = self.q4_slot[k]
+		if y >= 0:
+			self.q4[y * n_all + a] -= 1
+			self.q4[y * n_all + b] += 1
+
+	# --- Was-wäre-wenn --------------------------------------------------------------------
+
+	def index_of(self, day: Day) -> int:
+		if isinstance(day, date):
+			k = self.position.get(day.toordinal())
+			if k is None:
+				raise KeyError(f"Tag nicht im Plan: {day}")
+			return k
+		if not 0 <= day < len(self.assign):
+			raise IndexError(f"Position außerhalb des Plans: {day}")
+		return day
+
+	def dept_index(self, num: int) -> int:
+		i = self.idx_by_num.get(num)
+		if i is None or i >= self.n:
+			raise ValueError(f"Abteilung nicht in den Testdaten: {num}")
+		return i
+
+	def assign_day(self, day: Day, num: int) -> StateChange:
+		"""Besetzt einen Tag mit Abteilung num (Nummer aus den Testdaten)."""
+		k, b = self.index_of(day), self.dept_index(num)
+		a = self.assign[k]
+		self.history.append([(k, a)])
+		self._move(k, b)
+		return self._change([(k, a, b)])
+
+	def swap(self, day1: Day, day2: Day) -> StateChange:
+		"""Tauscht die Abteilungen zweier Tage."""
+		k, j = self.index_of(day1), self.index_of(day2)
+		a, b = self.assign[k], self.assign[j]
+		self.history.append([(k, a), (j, b)])
+		self._move(k, b)
+		self._move(j, a)
+		return self._change([(k, a, b), (j, b, a)])
+
+	def undo(self) -> StateChange:
+		"""Nimmt die letzte Änderung (assign_day oder swap) zurück."""
+		if not self.history:
+			raise ValueError('Keine Änderung zum Rückgängigmachen')
+		moves = []
+		for k, a in reversed(self.history.pop()):
+			moves.append((k, self.assign[k], a))
+			self._move(k, a)
+		return self._change(moves)
+
+	def _change(self, moves: List[Tuple[int, int, int]]) -> StateChange:
+		depts: Set[int] = set()
+		slots: Set[Tuple[int, int]] = set()
+		q4_slots: Set[Tuple[int, int]] = set()
+		for k, a, b in moves:
+			for i in (a, b):
+				if i >= self.n:
+					continue
+				depts.add(i)
+				slots.add((self.month_slot[k], i))
+				if self.q4_slot[k] >= 0:
+					q4_slots.add((self.q4_slot[k], i))
+		return StateChange(
+			[self.deviation(i) for i in sorted(depts)],
+			[self.monthly_row(m, i) for m, i in sorted(slots)],
+			[self.q4_row(y, i) for y, i in sorted(q4_slots)],
+			self.violations,
+			self.folgetage,
+			self.favorite_hits,
+		)
+
+	# --- Abweichungen ---------------------------------------------------------------------
+
+	def deviation(self, i: int) -> Deviation:
+		return Deviation(self.nums[i], self.ziel[i], self.count[i], self.count[i] - self.ziel[i])
+
+	def monthly_row(self, m: int, i: int) -> MonthlyQuotaRow:
+		"""m: Slot Jahresindex * 12 + Monat - 1."""
+		base = m * self.n_all + i
+		return MonthlyQuotaRow(f"{self.years[m // 12]}-{m % 12 + 1:02d}", self.nums[i], self.soll[base], self.month_ist[base], self.month_ist[base] - self.soll[base])
+
+	def q4_row(self, y: int, i: int) -> Q4SkewRow:
+		"""y: Index in self.years."""
+		base = y * self.n_all + i
+		return Q4SkewRow(self.nums[i], self.q4[base], self.q4_soll[base], self.q4[base] - self.q4_soll[base], self.years[y])
+
+	def deviations(self) -> List[Deviation]:
+		return [self.deviation(i) for i in range(self.n)]
+
+	def metrics(self) -> Dict[str, int]:
+		n_all = self.n_all
+		return {
+			'violations': self.violations,
+			'abs_diff': sum(abs(self.count[i] - self.ziel[i]) for i in range(self.n)),
+			'monthly_abs_diff': sum(abs(self.month_ist[m * n_all + i] - self.soll[m * n_all + i]) for m in range(12 * len(self.years)) for i in range(self.n)),
+			'q4_abs_diff': sum(abs(self.q4[y * n_all + i] - self.q4_soll[y * n_all + i]) for y in range(len(self.years)) for i in range(self.n)),
+			'folgetage': self.folgetage,
+			'favorite_hits': self.favorite_hits,
+		}
+
+	def plan(self) -> List[PlanEntry]:
+		return [(d, GERMAN_WEEKDAYS[d.weekday()], self.nums[a]) for d, a in zip(self.days, self.assign)]
+
+
+def _print_change(change: StateChange, multi_year: bool = False) -> None:
+	for dev in change.deviations:
+		print(f"- Abt {dev.abteilung}: Ziel {dev.ziel}, Ist {dev.ist}, Diff {dev.diff:+d}")
+	for row in change.monthly:
+		print(f"  {row.monat} Abt {row.abteilung}: Soll {row.soll}, Ist {row.ist}, Diff {row.diff:+d}")
+	for row in change.q4:
+		print(f"  Q4 {f'{row.jahr} ' if multi_year else ''}Abt {row.abteilung}: Soll {row.soll}, Ist {row.ist}, Diff {row.diff:+d}")
+	print(f"Verhinderungen: {change.violations}, Folgetage: {change.folgetage}, Lieblingstage: {change.favorite_hits}")
+
+
+def _parse_day(token: str) -> Day:
+	return parse_date_de(token) if '.' in token else int(token)
+
+
+def interactive(state: PlanState) -> int:
+	"""Einfache Kommandoschleife auf stdin (assign/swap/undo/show/save/quit)."""
+	print("Befehle: assign <TT.MM.JJJJ> <Abt> | swap <Tag> <Tag> | undo | show | save <Pfad> | quit")
+	multi_year = len(state.years) > 1
+	for line in sys.stdin:
+		args = shlex.split(line)
+		if not args:
+			continue
+		cmd = args[0]
+		try:
+			if cmd == 'assign' and len(args) == 3:
+				_print_change(state.assign_day(_parse_day(args[1]), int(args[2])), multi_year)
+			elif cmd == 'swap' and len(args) == 3:
+				_print_change(state.swap(_parse_day(args[1]), _parse_day(args[2])), multi_year)
+			elif cmd == 'undo':
+				_print_change(state.undo(), multi_year)
+			elif cmd == 'show':
+				for key, value in state.metrics().items():
+					print(f"- {key}: {value}")
+			elif cmd == 'save' and len(args) == 2:
+				write_plan_csv(args[1], state.plan())
+				print(f"Plan gespeichert: {args[1]}")
+			elif cmd in ('quit', 'exit'):
+				break
+			else:
+				print(f"Unbekannter Befehl: {line.strip()}")
+		except (KeyError, IndexError, ValueError) as e:
+			print(f"Fehler: {e.args[0] if e.args else e}")
+	return 0
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Was-wäre-wenn-Änderungen an einem Dienstplan (interaktiv)')
+	parser.add_argument('plan_csv', help='Pfad zur Plan-CSV (Jahresdienstplan_2026.csv)')
+	parser.add_argument('testdaten_csv', help='Pfad zu Testdaten.csv')
+	args = parser.parse_args()
+	sys.exit(interactive(PlanState.from_files(args.plan_csv, args.testdaten_csv)))
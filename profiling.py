@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Messung benannter Phasen (Laufzeit, Zeilen, Spitzenspeicher) für die Kommandozeilenwerkzeuge.
+
+validate_plan.py, visualize_reports.py und manage_tests.py teilen sich die Optionen --profile
+(Tabelle auf stderr), --metrics-json (Messwerte als JSON) und --cprofile (cProfile-Dump des Hot
+Paths, auswerten mit `python3 -m pstats <datei>`). Spitzenspeicher wird nur gemessen, wenn
+--profile oder --metrics-json gesetzt ist, weil tracemalloc den Lauf spürbar verlangsamt.
+"""
+import argparse
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO
+
+
+class Phase:
+	__slots__ = ('name', 'seconds', 'rows', 'peak_bytes')
+
+	def __init__(self, name: str, seconds: float = 0.0, rows: Optional[int] = None, peak_bytes: Optional[int] = None):
+		self.name = name
+		self.seconds = seconds
+		self.rows = rows
+		self.peak_bytes = peak_bytes  # Spitzenspeicher über dem Stand bei Phasenbeginn
+
+	def as_dict(self) -> Dict[str, Any]:
+		return {'name': self.name, 'seconds': round(self.seconds, 6), 'rows': self.rows, 'peak_kib': None if self.peak_bytes is None else round(self.peak_bytes / 1024, 1)}
+
+
+class PhaseRecorder:
+	def __init__(self, memory: bool = False):
+		self.memory = memory
+		self.phases: List[Phase] = []
+		self.started = time.perf_counter()
+		self._peaks: List[int] = []  # absolute Spitzen der offenen (verschachtelten) Phasen
+		self._owns_tracing = memory and not tracemalloc.is_tracing()
+		if self._owns_tracing:
+			tracemalloc.start()
+
+	@contextmanager
+	def phase(self, name: str, rows: Optional[int] = None) -> Iterator[Phase]:
+		"""Misst den Block als Phase name; rows kann im Block über das gelieferte Objekt gesetzt werden."""
+		rec = Phase(name, rows=rows)
+		base = 0
+		if self.memory:
+			# reset_peak würde die Spitze einer umschließenden Phase verwerfen -> vorher sichern
+			if self._peaks:
+				self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+			tracemalloc.reset_peak()
+			base = tracemalloc.get_traced_memory()[0]
+			self._peaks.append(base)
+		started = time.perf_counter()
+		try:
+			yield rec
+		finally:
+			rec.seconds = time.perf_counter() - started
+			if self.memory:
+				peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+				rec.peak_bytes = max(0, peak - base)
+				if self._peaks:
+					self._peaks[-1] = max(self._peaks[-1], peak)
+			self.phases.append(rec)
+
+	def add(self, name: str, seconds: float, rows: Optional[int] = None) -> None:
+		"""Von außen gemessene Teilphase (z. B. die Phasenzeiten aus validate(timings=...))."""
+		self.phases.append(Phase(name, seconds, rows))
+
+	def stop(self) -> None:
+		if self._owns_tracing:
+			tracemalloc.stop()
+			self._owns_tracing = False
+
+	def as_dict(self, tool: str, **meta: Any) -> Dict[str, Any]:
+		return {
+			'tool': tool,
+			'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+			'total_seconds': round(time.perf_counter() - self.started, 6),
+			'memory': self.memory,
+			**meta,
+			'phases': [p.as_dict() for p in self.phases],
+		}
+
+	def print_table(self, out: Optional[TextIO] = None) -> None:
+		out = out or sys.stderr
+		print('\n== Profil (Phasen) ==', file=out)
+		width = max([len(p.name) for p in self.phases] + [5])
+		print(f"{'Phase'.ljust(width)}  {'ms':>10}  {'Zeilen':>8}  {'Spitze KiB':>10}", file=out)
+		for p in self.phases:
+			rows = '' if p.rows is None else str(p.rows)
+			peak = '' if p.peak_bytes is None else f"{p.peak_bytes / 1024:.1f}"
+			print(f"{p.name.ljust(width)}  {p.seconds * 1000:>10.1f}  {rows:>8}  {peak:>10}", file=out)
+		print(f"{'gesamt'.ljust(width)}  {(time.perf_counter() - self.started) * 1000:>10.1f}", file=out)
+
+	def write_json(self, path: str, tool: str, **meta: Any) -> None:
+		parent = os.path.dirname(path)
+		if parent:
+			os.makedirs(parent, exist_ok=True)
+		with open(path, 'w', encoding='utf-8') as f:
+			json.dump(self.as_dict(tool, **meta), f, ensure_ascii=False, indent=2)
+
+
+def run_profiled(path: Optional[str], fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+	"""Ruft fn auf; mit path unter cProfile und schreibt die Statistik dorthin."""
+	if not path:
+		return fn(*args, **kwargs)
+	profiler = cProfile.Profile()
+	try:
+		return profiler.runcall(fn, *args, **kwargs)
+	finally:
+		parent = os.path.dirname(path)
+		if parent:
+			os.makedirs(parent, exist_ok=True)
+		profiler.dump_stats(path)
+		print(f"cProfile-Dump gespeichert: {path}", file=sys.stderr)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+	parser.add_argument('--profile', action='store_true', help='Laufzeit, Zeilen und Spitzenspeicher (tracemalloc) je Phase auf stderr ausgeben')
+	parser.add_argument('--metrics-json', default=None, help='Phasen-Messwerte als JSON in diese Datei schreiben')
+	parser.add_argument('--cprofile', default=None, help='cProfile-Dump des Hot Paths in diese Datei schreiben')
+
+
+def recorder_from_args(args: argparse.Namespace) -> PhaseRecorder:
+	return PhaseRecorder(memory=bool(args.profile or args.metrics_json))
+
+
+def report(recorder: PhaseRecorder, args: argparse.Namespace, tool: str, **meta: Any) -> None:
+	"""Gibt die Messwerte gemäß --profile/--metrics-json aus und beendet tracemalloc."""
+	recorder.stop()
+	if args.profile:
+		recorder.print_table()
+	if args.metrics_json:
+		recorder.write_json(args.metrics_json, tool, **meta)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Reparatur bestehender Pläne per lokaler Suche (Move/Swap, Simulated Annealing).
+
+Ausgangspunkt ist ein vorhandener Plan plus Testdaten.csv. Bewertet wird mit denselben Metriken
+wie bei der Variantensuche in generate_plan.py (Verhinderungen, |Diff|, Monatsquoten, Q4-Skew,
+Folgetage, Lieblingstage) plus einem Strafterm je geändertem Tag gegenüber dem Original.
+Jeder Zug ändert nur wenige Zähler; der Score wird daher inkrementell in O(1) (Verhinderung
+per bisect in O(log n)) fortgeschrieben statt den Validator erneut laufen zu lassen. Die
+Aggregate selbst pflegt plan_state.PlanState.
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from generate_plan import DEFAULT_SCORE_WEIGHTS, write_plan_csv
+from plan_state import PlanState, load_plan
+from validate_plan import Abteilung, parse_abteilungen_csv
+
+DEFAULT_CHANGE_WEIGHT = 1.0
+
+
+class RepairState(PlanState):
+	"""PlanState plus gewichteter Score und Änderungsstrafe gegenüber dem Originalplan."""
+
+	def __init__(self, days: List[date], nums: List[int], abteilungen: List[Abteilung], weights: Optional[Dict[str, float]] = None, change_weight: float = DEFAULT_CHANGE_WEIGHT):
+		super().__init__(days, nums, abteilungen)
+		w = DEFAULT_SCORE_WEIGHTS if weights is None else weights
+		self.w_viol = w.get('violations', 0.0)
+		self.w_diff = w.get('abs_diff', 0.0)
+		self.w_month = w.get('monthly_abs_diff', 0.0)
+		self.w_q4 = w.get('q4_abs_diff', 0.0)
+		self.w_cons = w.get('folgetage', 0.0)
+		self.w_fav = w.get('favorite_hits', 0.0)
+		self.w_change = change_weight
+		self.original = list(self.assign)
+		self.score = self.full_score()
+
+	# --- Bewertung ------------------------------------------------------------------------
+
+	def metrics(self) -> Dict[str, int]:
+		m = super().metrics()
+		m['changes'] = self.changes()
+		return m
+
+	def changes(self) -> int:
+		return sum(1 for a, o in zip(self.assign, self.original) if a != o)
+
+	def full_score(self) -> float:
+		m = self.metrics()
+		return (self.w_viol * m['violations'] + self.w_diff * m['abs_diff'] + self.w_month * m['monthly_abs_diff']
+			+ self.w_q4 * m['q4_abs_diff'] + self.w_cons * m['folgetage'] + self.w_fav * m['favorite_hits']
+			+ self.w_change * m['changes'])
+
+	def move_delta(self, k: int, b: int) -> float:
+		"""Score-Änderung, wenn Tag k von seiner Abteilung an Abteilung b geht."""
+		a = self.assign[k]
+		if a == b:
+			return 0.0
+		delta = 0.0
+		# Verhinderung
+		delta += self.w_viol * (self._blocked(k, b) - self._blocked(k, a))
+		# Jahres-Soll/Ist (nur Abteilungen aus den Testdaten)
+		count, ziel = self.count, self.ziel
+		if a < self.n:
+			delta += self.w_diff * (abs(count[a] - 1 - ziel[a]) - abs(count[a] - ziel[a]))
+		if b < self.n:
+			delta += self.w_diff * (abs(count[b] + 1 - ziel[b]) - abs(count[b] - ziel[b]))
+		# Monats-Soll/Ist
+		base = self.month_slot[k] * self.n_all
+		ist, soll = self.month_ist, self.soll
+		if a < self.n:
+			delta += self.w_month * (abs(ist[base + a] - 1 - soll[base + a]) - abs(ist[base + a] - soll[base + a]))
+		if b < self.n:
+			delta += self.w_month * (abs(ist[base + b] + 1 - soll[base + b]) - abs(ist[base + b] - soll[base + b]))
+		# Q4 (je Planjahr)
+		y = self.q4_slot[k]
+		if y >= 0:
+			base = y * self.n_all
+			q4, q4_soll = self.q4, self.q4_soll
+			if a < self.n:
+				delta += self.w_q4 * (abs(q4[base + a] - 1 - q4_soll[base + a]) - abs(q4[base + a] - q4_soll[base + a]))
+			if b < self.n:
+				delta += self.w_q4 * (abs(q4[base + b] + 1 - q4_soll[base + b]) - abs(q4[base + b] - q4_soll[base + b]))
+		# Folgetage (Nachbarzeilen)
+		assign = self.assign
+		cons = 0
+		if k > 0:
+			cons += (assign[k - 1] == b) - (assign[k - 1] == a)
+		if k + 1 < len(assign):
+			cons += (assign[k + 1] == b) - (assign[k + 1] == a)
+		delta += self.w_cons * cons
+		# Lieblingstage
+		wd = self.weekdays[k]
+		delta += self.w_fav * ((self.fav_masks[b] >> wd & 1) - (self.fav_masks[a] >> wd & 1))
+		# Änderungen gegenüber dem Original
+		o = self.original[k]
+		delta += self.w_change * ((b != o) - (a != o))
+		return delta
+
+	def apply(self, k: int, b: int, delta: float) -> None:
+		self._move(k, b)
+		self.score += delta
+
+
+def anneal(state: RepairState, iterations: int, seed: int = 0, t_start: float = 2.0, t_end: float = 0.01, swap_ratio: float = 0.5) -> Dict[str, float]:
+	"""Simulated Annealing über Move- (Tag -> andere Abteilung) und Swap-Züge (zwei Tage tauschen).
+
+	t_start=0 ergibt reines Hill Climbing. Das beste gefundene Ergebnis wird am Ende wiederhergestellt.
+	"""
+	rng = random.Random(seed)
+	n_days = len(state.assign)
+	if n_days == 0 or state.n == 0 or iterations <= 0:
+		return {'iterations': 0, 'accepted': 0, 'seconds': 0.0}
+	rand = rng.random
+	randrange = rng.randrange
+	best_score = state.score
+	best_assign = list(state.assign)
+	cooling = (t_end / t_start) ** (1.0 / iterations) if t_start > 0 and t_end > 0 else 0.0
+	temp = t_start
+	accepted = 0
+	started = time.perf_counter()
+	for _ in range(iterations):
+		k = randrange(n_days)
+		a = state.assign[k]
+		if rand() < swap_ratio:
+			j = randrange(n_days)
+			b = state.assign[j]
+			if a == b:
+				temp *= cooling
+				continue
+			d1 = state.move_delta(k, b)
+			state.apply(k, b, d1)
+			d2 = state.move_delta(j, a)
+			delta = d1 + d2
+			if delta <= 0 or (temp > 0 and rand() < math.exp(-delta / temp)):
+				state.apply(j, a, d2)
+				accepted += 1
+			else:
+				state.apply(k, a, -d1)
+		else:
+			b = randrange(state.n)
+			if a == b:
+				temp *= cooling
+				continue
+			delta = state.move_delta(k, b)
+			if delta <= 0 or (temp > 0 and rand() < math.exp(-delta / temp)):
+				state.apply(k, b, delta)
+				accepted += 1
+		if state.score < best_score - 1e-9:
+			best_score = state.score
+			best_assign = list(state.assign)
+		temp *= cooling
+	elapsed = time.perf_counter() - started
+	# Besten Stand wiederherstellen
+	for k, b in enumerate(best_assign):
+		if state.assign[k] != b:
+			state.apply(k, b, state.move_delta(k, b))
+	return {'iterations': iterations, 'accepted': accepted, 'seconds': elapsed}
+
+
+def main(plan_csv: str, testdaten_csv: str, out_path: str, iterations: int, seed: int, t_start: float, change_weight: float) -> int:
+	abteilungen = parse_abteilungen_csv(testdaten_csv)
+	days, nums, problems = load_plan(plan_csv)
+	state = RepairState(days, nums, abteilungen, change_weight=change_weight)
+	before = state.metrics()
+	stats = anneal(state, iterations, seed=seed, t_start=t_start)
+	state.score = state.full_score()
+	after = state.metrics()
+
+	print("== Plan-Reparatur ==")
+	if problems:
+		print(f"Hinweis: {len(problems)} Verstöße in nicht reparierbaren Zeilen (Datum/Wochenende/Feiertag/Nummer):")
+		for p in problems[:10]:
+			print(f"- {p}")
+	print(f"Züge: {stats['iterations']}, angenommen: {stats['accepted']}, Dauer: {stats['seconds']:.2f}s", end='')
+	if stats['seconds'] > 0:
+		print(f" ({stats['iterations'] / stats['seconds'] * 60:,.0f} Züge/min)")
+	else:
+		print()
+	print("Metrik | Vorher | Nachher")
+	for key in before:
+		print(f"- {key}: {before[key]} -> {after[key]}")
+	write_plan_csv(out_path, state.plan())
+	print(f"Reparierter Plan gespeichert: {out_path}")
+	return 0
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Repariere bestehenden Dienstplan per lokaler Suche (Simulated Annealing)')
+	parser.add_argument('plan_csv', help='Pfad zur Plan-CSV (Jahresdienstplan_2026.csv)')
+	parser.add_argument('testdaten_csv', help='Pfad zu Testdaten.csv')
+	parser.add_argument('--out', required=True, help='Ziel-CSV für den reparierten Plan')
+	parser.add_argument('--iterations', type=int, default=200000, help='Anzahl Züge (Default: 200000)')
+	parser.add_argument('--seed', type=int, default=0, help='Seed für die Zugauswahl')
+	parser.add_argument('--temperature', type=float, default=2.0, help='Starttemperatur (0 = Hill Climbing)')
+	parser.add_argument('--change-weight', type=float, default=DEFAULT_CHANGE_WEIGHT, help='Strafgewicht je geändertem Tag')
+	args = parser.parse_args()
+	sys.exit(main(args.plan_csv, args.testdaten_csv, args.out, args.iterations, args.seed, args.temperature, args.change_weight))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Inhaltsadressierter Cache für Snapshot-Artefakte (Validator-Berichte, Grafiken).
+
+Ein Eintrag ist ein Ordner <root>/<key>/ mit den Artefakten und entry.json. Der Schlüssel ist
+ein Hash über die Eingabedateien, den Kalender und die Version des erzeugenden Werkzeugs;
+gleiche Eingaben liefern also dieselben Dateien. Treffer werden per Hardlink in den
+Versionsordner übernommen (Fallback: Kopie), die Größe wird per LRU begrenzt (Zeitpunkt der
+letzten Nutzung = mtime des Eintrags-Ordners).
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+ENTRY_FILE = 'entry.json'
+MAX_MB_ENV = 'DIENSTPLAN_SNAPSHOT_CACHE_MB'
+DEFAULT_MAX_MB = 200
+
+
+def file_sha256(path: str) -> str:
+	h = hashlib.sha256()
+	with open(path, 'rb') as f:
+		for chunk in iter(lambda: f.read(1 << 16), b''):
+			h.update(chunk)
+	return h.hexdigest()
+
+
+def sources_sha256(paths: Iterable[str]) -> str:
+	"""Hash über mehrere Quelldateien (Name + Inhalt), z. B. als Werkzeug-Version."""
+	h = hashlib.sha256()
+	for path in paths:
+		h.update(os.path.basename(path).encode('utf-8') + b'\0')
+		h.update(file_sha256(path).encode('ascii'))
+	return h.hexdigest()
+
+
+def combine_hashes(hashes: Dict[str, str]) -> str:
+	return hashlib.sha256(json.dumps(hashes, sort_keys=True).encode('ascii')).hexdigest()
+
+
+def link_or_copy(src: str, dst: str) -> None:
+	if os.path.lexists(dst):
+		os.unlink(dst)
+	try:
+		os.link(src, dst)
+	except OSError:
+		# z. B. anderes Dateisystem oder keine Hardlink-Unterstützung
+		shutil.copy2(src, dst)
+
+
+def detach(paths: Iterable[str]) -> None:
+	"""Löst Hardlinks vor dem Überschreiben: Schreiben in eine verlinkte Datei änderte sonst auch den Cache."""
+	for path in paths:
+		try:
+			if os.stat(path).st_nlink > 1:
+				os.unlink(path)
+		except FileNotFoundError:
+			pass
+
+
+class SnapshotCache:
+	def __init__(self, root: str, max_bytes: Optional[int] = None):
+		self.root = root
+		if max_bytes is None:
+			max_bytes = int(float(os.environ.get(MAX_MB_ENV, DEFAULT_MAX_MB)) * 1024 * 1024)
+		self.max_bytes = max_bytes
+
+	def _entry_dir(self, key: str) -> str:
+		return os.path.join(self.root, key)
+
+	def lookup(self, key: str) -> Optional[Dict]:
+		"""Eintrag (Inhalt von entry.json plus 'dir') oder None; markiert ihn als zuletzt genutzt."""
+		entry_dir = self._entry_dir(key)
+		try:
+			with open(os.path.join(entry_dir, ENTRY_FILE), encoding='utf-8') as f:
+				entry = json.load(f)
+		except (OSError, ValueError):
+			return None
+		if any(not os.path.exists(os.path.join(entry_dir, name)) for name in entry.get('files', [])):
+			shutil.rmtree(entry_dir, ignore_errors=True)
+			return None
+		os.utime(entry_dir)
+		entry['dir'] = entry_dir
+		return entry
+
+	def store(self, key: str, src_dir: str, names: List[str], info: Optional[Dict] = None) -> Dict:
+		"""Übernimmt die Dateien names aus src_dir als Eintrag key (ersetzt einen vorhandenen)."""
+		os.makedirs(self.root, exist_ok=True)
+		tmp = os.path.join(self.root, f".tmp-{key}-{os.getpid()}")
+		shutil.rmtree(tmp, ignore_errors=True)
+		os.makedirs(tmp)
+		for name in names:
+			link_or_copy(os.path.join(src_dir, name), os.path.join(tmp, name))
+		entry = dict(info or {})
+		entry.update({'key': key, 'files': sorted(names), 'created': time.strftime('%Y-%m-%dT%H:%M:%S')})
+		with open(os.path.join(tmp, ENTRY_FILE), 'w', encoding='utf-8') as f:
+			json.dump(entry, f, ensure_ascii=False, indent=2)
+		entry_dir = self._entry_dir(key)
+		shutil.rmtree(entry_dir, ignore_errors=True)
+		try:
+			os.replace(tmp, entry_dir)
+		except OSError:
+			# Ein paralleler Lauf hat denselben Schlüssel (= gleichen Inhalt) schon abgelegt
+			shutil.rmtree(tmp, ignore_errors=True)
+		self.evict()
+		entry['dir'] = entry_dir
+		return entry
+
+	def restore(self, entry: Dict, dst_dir: str) -> List[str]:
+		"""Verlinkt die Dateien eines Eintrags nach dst_dir; liefert die Dateinamen."""
+		for name in entry['files']:
+			link_or_copy(os.path.join(entry['dir'], name), os.path.join(dst_dir, name))
+		return list(entry['files'])
+
+	def entries(self) -> List[Tuple[str, float, int]]:
+		"""(key, zuletzt genutzt, Bytes) je Eintrag, älteste zuerst."""
+		if not os.path.isdir(self.root):
+			return []
+		result = []
+		for key in os.listdir(self.root):
+			entry_dir = self._entry_dir(key)
+			if key.startswith('.') or not os.path.isdir(entry_dir):
+				continue
+			try:
+				size = sum(os.path.getsize(os.path.join(entry_dir, n)) for n in os.listdir(entry_dir))
+				result.append((key, os.path.getmtime(entry_dir), size))
+			except OSError:
+				continue  # gerade von einem parallelen Lauf entfernt
+		result.sort(key=lambda e: e[1])
+		return result
+
+	def evict(self, max_bytes: Optional[int] = None) -> List[str]:
+		"""Entfernt zuletzt ungenutzte Einträge, bis die Gesamtgröße <= max_bytes ist."""
+		limit = self.max_bytes if max_bytes is None else max_bytes
+		entries = self.entries()
+		total = sum(size for _, _, size in entries)
+		removed: List[str] = []
+		for key, _, size in entries:
+			if total <= limit:
+				break
+			shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+			total -= size
+			removed.append(key)
+		return removed
+
+
+def artifact_names(directory: str, predicate: Callable[[str], bool]) -> List[str]:
+	return sorted(n for n in os.listdir(directory) if predicate(n) and os.path.isfile(os.path.join(directory, n)))
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Exakter Solver-Modus: Plan als Min-Cost-Flow (Transportproblem), reines Python.
+
+Netz: Quelle -> Arbeitstag (Kap. 1) -> (Abteilung, Monat) -> [Q4: (Abteilung, Q4 des Jahres)] -> Abteilung -> Senke.
+- Tag -> (Abteilung, Monat) nur, wenn die Abteilung an dem Tag nicht verhindert ist; Lieblingstage
+  erhalten negative Kosten.
+- (Abteilung, Monat) -> weiter: Kapazität = Monats-Soll (Largest Remainder) zu Kosten 0, darüber
+  hinaus Überlauf mit Strafkosten. Gleiches Muster für Q4-Soll (je Planjahr, wie im Validator) und
+  Jahres-Ziel.
+Da Soll-Summen je Ebene der Anzahl Tage entsprechen, erzeugt jede Einheit Überlauf genau eine
+Unterdeckung an anderer Stelle; minimale Kosten sind damit minimale gewichtete Summe aus
+|Monats-Diff|, |Q4-Diff|, |Jahres-Diff| abzüglich Lieblingstage (Gewichte aus DEFAULT_SCORE_WEIGHTS).
+Folgetage sind nicht linear abbildbar; sie werden danach durch kostenneutrale Tausche im Monat reduziert.
+"""
+import argparse
+import heapq
+import random
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from calendar_service import working_days_between
+from generate_plan import DEFAULT_SCORE_WEIGHTS, PlanEntry, working_days_2026, write_plan_csv
+from validate_plan import (
+	Abteilung,
+	GERMAN_WEEKDAYS,
+	Q4_MONTHS,
+	Verhinderung,
+	largest_remainder_targets,
+	parse_abteilungen_csv,
+)
+
+INF = float('inf')
+# Gewichte werden mit COST_SCALE multipliziert und gerundet, damit alle Kosten ganzzahlig sind
+COST_SCALE = 2
+
+
+class MinCostFlow:
+	"""Successive Shortest Paths mit Dijkstra und Knotenpotentialen (negative Kanten erlaubt, keine negativen Zyklen)."""
+
+	def __init__(self, n: int):
+		self.n = n
+		self.adj: List[List[int]] = [[] for _ in range(n)]
+		self.to: List[int] = []
+		self.cap: List[int] = []
+		self.cost: List[int] = []
+
+	def add_edge(self, u: int, v: int, cap: int, cost: int) -> int:
+		"""Fügt Kante u->v hinzu; Rückgabe: Kanten-ID (Rückkante = ID ^ 1)."""
+		eid = len(self.to)
+		self.to += [v, u]
+		self.cap += [cap, 0]
+		self.cost += [cost, -cost]
+		self.adj[u].append(eid)
+		self.adj[v].append(eid + 1)
+		return eid
+
+	def _initial_potentials(self, s: int) -> List[float]:
+		# SPFA/Bellman-Ford über Kanten mit Restkapazität
+		dist = [INF] * self.n
+		dist[s] = 0
+		queue = [s]
+		in_queue = [False] * self.n
+		in_queue[s] = True
+		head = 0
+		while head < len(queue):
+			u = queue[head]
+			head += 1
+			in_queue[u] = False
+			du = dist[u]
+			for e in self.adj[u]:
+				if self.cap[e] > 0:
+					v = self.to[e]
+					nd = du + self.cost[e]
+					if nd < dist[v]:
+						dist[v] = nd
+						if not in_queue[v]:
+							in_queue[v] = True
+							queue.append(v)
+		return [0 if d == INF else d for d in dist]
+
+	def solve(self, s: int, t: int, max_flow: int) -> Tuple[int, int]:
+		"""Schickt bis zu max_flow Einheiten zu minimalen Kosten; Rückgabe (Fluss, Kosten)."""
+		n = self.n
+		to, cap, cost, adj = self.to, self.cap, self.cost, self.adj
+		potential = self._initial_potentials(s)
+		flow = 0
+		total_cost = 0
+		while flow < max_flow:
+			dist = [INF] * n
+			prev_edge = [-1] * n
+			dist[s] = 0
+			heap = [(0, s)]
+			while heap:
+				d, u = heapq.heappop(heap)
+				if d > dist[u]:
+					continue
+				pu = potential[u]
+				for e in adj[u]:
+					if cap[e] > 0:
+						v = to[e]
+						nd = d + cost[e] + pu - potential[v]
+						if nd < dist[v]:
+							dist[v] = nd
+							prev_edge[v] = e
+							heapq.heappush(heap, (nd, v))
+			if dist[t] == INF:
+				break
+			for v in range(n):
+				if dist[v] < INF:
+					potential[v] += dist[v]
+			# Engpass entlang des Pfads
+			push = max_flow - flow
+			v = t
+			while v != s:
+				e = prev_edge[v]
+				push = min(push, cap[e])
+				v = to[e ^ 1]
+			v = t
+			while v != s:
+				e = prev_edge[v]
+				cap[e] -= push
+				cap[e ^ 1] += push
+				total_cost += push * cost[e]
+				v = to[e ^ 1]
+			flow += push
+		return flow, total_cost
+
+
+def _month_key(d: date) -> Tuple[int, int]:
+	return (d.year, d.month)
+
+
+def solve_plan(abteilungen: List[Abteilung], working_days: Optional[List[date]] = None, weights: Optional[Dict[str, float]] = None) -> Tuple[List[PlanEntry], Dict[str, int]]:
+	"""Quoten-optimaler Plan per Min-Cost-Flow; Rückgabe (Plan, Solver-Statistik)."""
+	if working_days is None:
+		working_days = working_days_2026()
+	w = DEFAULT_SCORE_WEIGHTS if weights is None else weights
+	# Kosten je Einheit Überlauf: jede Einheit über Soll bedeutet eine Einheit unter Soll woanders (|Diff| x2)
+	cost_fav = round(COST_SCALE * w.get('favorite_hits', 0.0))
+	cost_month = round(COST_SCALE * 2 * w.get('monthly_abs_diff', 0.0))
+	cost_q4 = round(COST_SCALE * 2 * w.get('q4_abs_diff', 0.0))
+	cost_year = round(COST_SCALE * 2 * w.get('abs_diff', 0.0))
+
+	abt_by_num: Dict[int, Abteilung] = {a.nummer: a for a in abteilungen}
+	depts = list(abt_by_num.values())
+	nums = [a.nummer for a in depts]
+	n = len(depts)
+	days = sorted(working_days)
+	n_days = len(days)
+	if n == 0 or n_days == 0:
+		return [], {'nodes': 0, 'edges': 0, 'flow': 0, 'cost': 0}
+
+	months: List[Tuple[int, int]] = sorted({_month_key(d) for d in days})
+	month_idx = {m: i for i, m in enumerate(months)}
+	days_per_month = [0] * len(months)
+	for d in days:
+		days_per_month[month_idx[_month_key(d)]] += 1
+	month_soll = [largest_remainder_targets(abteilungen, c) for c in days_per_month]
+	q4_years: List[int] = sorted({d.year for d in days if d.month in Q4_MONTHS})
+	q4_idx = {year: y for y, year in enumerate(q4_years)}
+	q4_days = [0] * len(q4_years)
+	for d in days:
+		if d.month in Q4_MONTHS:
+			q4_days[q4_idx[d.year]] += 1
+	q4_soll = [largest_remainder_targets(abteilungen, c) for c in q4_days]
+	ziel = largest_remainder_targets(abteilungen, n_days)
+
+	# Knoten
+	S, T = 0, 1
+	day_base = 2
+	dm_base = day_base + n_days  # (Abteilung, Monat): dm_base + m * n + i
+	q4_base = dm_base + len(months) * n  # (Abteilung, Q4-Jahr): q4_base + y * n + i
+	dept_base = q4_base + len(q4_years) * n
+	g = MinCostFlow(dept_base + n)
+
+	for k in range(n_days):
+		g.add_edge(S, day_base + k, 1, 0)
+	day_edges: List[List[Tuple[int, int]]] = []  # je Tag: (Kanten-ID, Abteilungsindex)
+	for k, d in enumerate(days):
+		o = d.toordinal()
+		wd = d.weekday()
+		m = month_idx[_month_key(d)]
+		edges = []
+		for i, a in enumerate(depts):
+			idx = a.verfuegbarkeit
+			if idx.is_blocked_ordinal(o):
+				continue
+			c = cost_fav if idx.favorite_mask >> wd & 1 else 0
+			edges.append((g.add_edge(day_base + k, dm_base + m * n + i, 1, c), i))
+		day_edges.append(edges)
+	for m, (year, month) in enumerate(months):
+		nxt = q4_base + q4_idx[year] * n if month in Q4_MONTHS else dept_base
+		for i in range(n):
+			soll = month_soll[m].get(nums[i], 0)
+			node = dm_base + m * n + i
+			if soll > 0:
+				g.add_edge(node, nxt + i, soll, 0)
+			g.add_edge(node, nxt + i, n_days, cost_month)
+	for y in range(len(q4_years)):
+		for i in range(n):
+			node = q4_base + y * n + i
+			soll = q4_soll[y].get(nums[i], 0)
+			if soll > 0:
+				g.add_edge(node, dept_base + i, soll, 0)
+			g.add_edge(node, dept_base + i, n_days, cost_q4)
+	for i in range(n):
+		z = ziel.get(nums[i], 0)
+		if z > 0:
+			g.add_edge(dept_base + i, T, z, 0)
+		g.add_edge(dept_base + i, T, n_days, cost_year)
+
+	flow, total_cost = g.solve(S, T, n_days)
+
+	assign: List[int] = [-1] * n_days
+	for k, edges in enumerate(day_edges):
+		for eid, i in edges:
+			if g.cap[eid] == 0:
+				assign[k] = i
+				break
+	swaps = _reduce_folgetage(days, assign, depts)
+	plan = [(d, GERMAN_WEEKDAYS[d.weekday()], nums[i]) for d, i in zip(days, assign) if i >= 0]
+	stats = {'nodes': g.n, 'edges': len(g.to) // 2, 'flow': flow, 'cost': total_cost, 'folgetage_swaps': swaps}
+	return plan, stats
+
+
+def _reduce_folgetage(days: List[date], assign: List[int], depts: List[Abteilung]) -> int:
+	"""Tauscht Tage innerhalb eines Monats, wenn das Folgetage senkt und Quoten, Verhinderungen und
+	Lieblingstage unverändert lässt (der Flow-Optimalwert bleibt also erhalten)."""
+	n_days = len(days)
+	ordinals = [d.toordinal() for d in days]
+	weekdays = [d.weekday() for d in days]
+	by_month: Dict[Tuple[int, int], List[int]] = {}
+	for k, d in enumerate(days):
+		by_month.setdefault(_month_key(d), []).append(k)
+
+	def ok(k: int, i: int) -> bool:
+		return i >= 0 and not depts[i].verfuegbarkeit.is_blocked_ordinal(ordinals[k])
+
+	def fav(k: int, i: int) -> int:
+		return depts[i].verfuegbarkeit.favorite_mask >> weekdays[k] & 1 if i >= 0 else 0
+
+	def pairs_cost(ks: List[int]) -> int:
+		pairs = set()
+		for k in ks:
+			if k > 0:
+				pairs.add(k - 1)
+			if k + 1 < n_days:
+				pairs.add(k)
+		return sum(1 for p in pairs if assign[p] >= 0 and assign[p] == assign[p + 1])
+
+	swaps = 0
+	improved = True
+	while improved:
+		improved = False
+		for k in range(1, n_days):
+			if assign[k] < 0 or assign[k] != assign[k - 1]:
+				continue
+			a = assign[k]
+			for j in by_month[_month_key(days[k])]:
+				b = assign[j]
+				if b < 0 or b == a or not ok(k, b) or not ok(j, a):
+					continue
+				if fav(k, b) + fav(j, a) != fav(k, a) + fav(j, b):
+					continue
+				before = pairs_cost([k, j])
+				assign[k], assign[j] = b, a
+				if pairs_cost([k, j]) < before:
+					swaps += 1
+					improved = True
+					break
+				assign[k], assign[j] = a, b
+	return swaps
+
+
+def _synthetic_departments(n: int, years: int, rng: random.Random) -> List[Abteilung]:
+	abteilungen: List[Abteilung] = []
+	for num in range(1, n + 1):
+		favs = rng.sample(GERMAN_WEEKDAYS[:5], rng.randint(0, 2))
+		verh: List[Verhinderung] = []
+		for _ in range(rng.randint(0, 3) * years):
+			start = date(2026, 1, 1) + timedelta(days=rng.randrange(365 * years))
+			verh.append(Verhinderung('range', start, start + timedelta(days=rng.randint(0, 14))))
+		abteilungen.append(Abteilung(num, rng.choice([25.0, 50.0, 75.0, 100.0]), favs, verh))
+	return abteilungen
+
+
+def benchmark(dept_sizes: List[int], year_counts: List[int], seed: int = 0, time_limit: float = 60.0) -> List[Dict[str, float]]:
+	"""Misst Aufbau- und Lösungszeit über wachsende Abteilungs- und Jahreszahlen.
+
+	Größere Stufen einer Reihe werden übersprungen, sobald eine Stufe time_limit überschreitet.
+	"""
+	rows: List[Dict[str, float]] = []
+	for years in year_counts:
+		days = working_days_between(2026, 2025 + years)
+		for n in dept_sizes:
+			rng = random.Random(seed + n * 1000 + years)
+			abteilungen = _synthetic_departments(n, years, rng)
+			started = time.perf_counter()
+			plan, stats = solve_plan(abteilungen, days)
+			elapsed = time.perf_counter() - started
+			rows.append({'abteilungen': n, 'jahre': years, 'tage': len(days), 'kanten': stats['edges'], 'sekunden': round(elapsed, 3)})
+			print(f"- {n:>5} Abteilungen, {years} Jahr(e), {len(days)} Tage: {stats['edges']} Kanten, {elapsed:.2f}s")
+			if elapsed > time_limit:
+				print(f"  Zeitlimit {time_limit:.0f}s überschritten – größere Stufen übersprungen")
+				break
+	return rows
+
+
+def main(testdaten_csv: str, out_path: str, years: Optional[Tuple[int, int]] = None) -> int:
+	abteilungen = parse_abteilungen_csv(testdaten_csv)
+	started = time.perf_counter()
+	plan, stats = solve_plan(abteilungen, working_days_between(*years) if years else None)
+	elapsed = time.perf_counter() - started
+	write_plan_csv(out_path, plan)
+	print(f"Min-Cost-Flow: {stats['nodes']} Knoten, {stats['edges']} Kanten, Fluss {stats['flow']}, Kosten {stats['cost']}, {elapsed:.2f}s")
+	print(f"Folgetage-Tausche: {stats['folgetage_swaps']}")
+	print(f"Dienstplan erzeugt: {len(plan)} Arbeitstage auf {len(abteilungen)} Abteilungen verteilt → {out_path}")
+	return 0
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Erzeuge quoten-optimalen Jahresdienstplan per Min-Cost-Flow')
+	parser.add_argument('testdaten_csv', nargs='?', help='Pfad zu Testdaten.csv')
+	parser.add_argument('--out', default='Jahresdienstplan_2026.csv', help='Ziel-CSV (Default: Jahresdienstplan_2026.csv)')
+	parser.add_argument('--benchmark', action='store_true', help='Laufzeit über synthetische Größenstufen messen')
+	parser.add_argument('--bench-depts', default='5,20,50,100,200', help='Abteilungsstufen (kommagetrennt)')
+	parser.add_argument('--bench-years', default='1,2,5', help='Jahresstufen (kommagetrennt)')
+	parser.add_argument('--time-limit', type=float, default=60.0, help='Abbruchgrenze je Stufe in Sekunden')
+	parser.add_argument('--years', default=None, help='Planungszeitraum als Jahr oder Spanne, z. B. 2026-2027 (Default: 2026)')
+	args = parser.parse_args()
+	if args.benchmark:
+		benchmark([int(x) for x in args.bench_depts.split(',')], [int(x) for x in args.bench_years.split(',')], time_limit=args.time_limit)
+		sys.exit(0)
+	if not args.testdaten_csv:
+		parser.error('testdaten_csv wird benötigt (außer mit --benchmark)')
+	years = None
+	if args.years:
+		first, _, last = args.years.partition('-')
+		years = (int(first), int(last or first))
+	sys.exit(main(args.testdaten_csv, args.out, years))
@@ -0,0 +1,19 @@
+"""Tests für input_parser (python -m pytest)."""
+import pickle
+
+from input_parser import InputError, InputIssue, parse_plan_text
+
+
+def test_input_error_survives_pickle():
+	issues = [InputIssue('Testdaten.csv', 2, "Ungültiges Jahrespensum: 'abc%'"), InputIssue('Testdaten.csv', 5, 'Zeitraum umgekehrt')]
+	err = pickle.loads(pickle.dumps(InputError(issues)))
+	assert isinstance(err, InputError)
+	assert err.issues == issues
+	assert str(err) == str(InputError(issues))
+
+
+def test_plan_date_separators_are_checked():
+	text = 'Datum;Wochentag;Abteilungsnummer\n01x01.2026;Donnerstag;1\n02.01x2026;Freitag;1\n05.01.2026;Montag;1\n'
+	rows, issues = parse_plan_text(text, 'plan.csv', strict=True)
+	assert [(i.line, i.reason) for i in issues] == [(2, "Ungültiges Datum: '01x01.2026'"), (3, "Ungültiges Datum: '02.01x2026'")]
+	assert len(rows) == 1
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Schwellwert-Regeln mit eigenen Exit-Codes (Deployment-Gates für den Validator).
+
+Regeln stehen in einer JSON-Datei (siehe thresholds.json):
+
+    {"rules": [
+      {"name": "quote", "metric": "max_abs_diff", "max": 1, "exit_code": 3},
+      {"name": "folgetage", "metric": "max_folgetage", "max": 3, "exit_code": 6}
+    ]}
+
+Je Regel: metric aus METRICS, Grenze max (Wert <= max) und/oder min (Wert >= min), exit_code
+(>= 2; 1 bleibt Fehlern vorbehalten) und optional blocking (Default true; false = nur Warnung).
+RuleSet fasst alle Regeln zu einer Auswertung zusammen: jede benötigte Kennzahl wird genau
+einmal aus dem ValidationResult berechnet. Exit-Code ist der der ersten verletzten blockierenden
+Regel (Reihenfolge der Datei), sonst der des Validators (0 oder 2).
+
+Fail-Fast: RuleGuard läuft als Akkumulator im Streaming-Durchlauf mit und bricht mit RuleBreach
+ab, sobald die erste blockierende Regel der Datei sicher verletzt ist. Nur dann steht der
+Exit-Code schon fest: Bei einer späteren Regel könnte eine frühere bis zum Ende noch verletzt
+werden und den Exit-Code bestimmen. Fail-Fast-fähige Regeln gehören daher an den Anfang.
+Fail-Fast-fähig sind max-Regeln für Kennzahlen, die im Durchlauf nicht mehr sinken
+können (METRICS[..].streaming): Verstoßzahlen, Folgetage sowie
+Monats- und Q4-Überhänge (Ist über Soll, das Soll hängt nur vom Kalender ab). Folgetage und
+Mindestabstand hängen von der Reihenfolge ab: Eine spätere Zeile kann noch zwischen zwei
+benachbarte fallen. Sie sind deshalb nur bei garantiert sortierten Quellen (Binärplan .dpb)
+fail-fast-fähig, bei CSV-Plänen werden sie erst am Ende bewertet.
+Proportionalität (Ziel hängt von der Gesamtzahl der Plan-Tage ab) wird erst am Ende bewertet.
+"""
+import json
+import sys
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, TextIO
+
+from validate_plan import (
+	Q4_MONTHS,
+	GapAccumulator,
+	PlanAccumulator,
+	StreamingValidator,
+	ValidationResult,
+	VerhinderungAccumulator,
+	largest_remainder_targets,
+	working_days_by_month,
+)
+
+
+def _max_abs(values: Iterable[int]) -> int:
+	return max(map(abs, values), default=0)
+
+
+class Metric(NamedTuple):
+	label: str
+	compute: Callable[[ValidationResult], float]
+	streaming: bool  # Wert kann im Durchlauf nur wachsen -> max-Regeln sind fail-fast-fähig
+
+
+METRICS: Dict[str, Metric] = {
+	'violations': Metric('Harte Regelverstöße', lambda r: len(r.violations), True),
+	'max_abs_diff': Metric('max |Diff| Proportionalität', lambda r: _max_abs(x.diff for x in r.deviations), False),
+	'abs_diff': Metric('Summe |Diff| Proportionalität', lambda r: sum(abs(x.diff) for x in r.deviations), False),
+	'monthly_max_abs_diff': Metric('max |Diff| Monat', lambda r: _max_abs(x.diff for x in r.monthly_quota_dev_rows), True),
+	'monthly_abs_diff': Metric('Summe |Diff| Monat', lambda r: sum(abs(x.diff) for x in r.monthly_quota_dev_rows), False),
+	'q4_max_abs_diff': Metric('max |Diff| Q4', lambda r: _max_abs(x.diff for x in r.q4_skew_rows), True),
+	'q4_abs_diff': Metric('Summe |Diff| Q4', lambda r: sum(abs(x.diff) for x in r.q4_skew_rows), False),
+	'max_folgetage': Metric('max Folgetage je Abteilung', lambda r: max(r.consecutive_counts.values(), default=0), True),
+	'folgetage': Metric('Folgetage gesamt', lambda r: sum(r.consecutive_counts.values()), True),
+	'min_gap_violations': Metric('Verstöße Mindestabstand', lambda r: len(r.min_gap_violations), True),
+	'favorite_hits': Metric('Lieblingstage-Treffer', lambda r: sum(r.favorite_hits.values()), False),
+}
+
+
+class Rule(NamedTuple):
+	name: str
+	metric: str
+	max: Optional[float]
+	min: Optional[float]
+	exit_code: int
+	blocking: bool = True
+
+	def describe(self) -> str:
+		bounds = [f"≥ {self.min:g}"] if self.min is not None else []
+		if self.max is not None:
+			bounds.append(f"≤ {self.max:g}")
+		return f"{METRICS[self.metric].label} {' und '.join(bounds)}"
+
+
+class RuleOutcome(NamedTuple):
+	rule: Rule
+	value: float
+	passed: bool
+
+
+class RuleBreach(Exception):
+	"""Fail-Fast: blockierende Regel im Durchlauf sicher verletzt (value ist eine untere Schranke)."""
+
+	def __init__(self, rule: Rule, value: float, rows: int):
+		self.rule = rule
+		self.value = value
+		self.rows = rows
+		super().__init__(f"Regel '{rule.name}' verletzt ({METRICS[rule.metric].label} mindestens {value:g}, erlaubt ≤ {rule.max:g}) nach {rows} Planzeilen")
+
+
+def _number(spec: Dict, key: str, where: str) -> Optional[float]:
+	value = spec.get(key)
+	if value is None:
+		return None
+	if isinstance(value, bool) or not isinstance(value, (int, float)):
+		raise ValueError(f"{where}: '{key}' muss eine Zahl sein")
+	return value
+
+
+def parse_rule(spec: Dict, index: int) -> Rule:
+	where = f"Regel {index + 1}"
+	if not isinstance(spec, dict):
+		raise ValueError(f"{where}: Objekt erwartet")
+	unknown = set(spec) - {'name', 'metric', 'max', 'min', 'exit_code', 'blocking'}
+	if unknown:
+		raise ValueError(f"{where}: unbekannte Felder: {', '.join(sorted(unknown))}")
+	metric = spec.get('metric')
+	if metric not in METRICS:
+		raise ValueError(f"{where}: unbekannte Kennzahl '{metric}' (verfügbar: {', '.join(METRICS)})")
+	name = str(spec.get('name') or metric)
+	hi, lo = _number(spec, 'max', where), _number(spec, 'min', where)
+	if hi is None and lo is None:
+		raise ValueError(f"{where} ({name}): 'max' und/oder 'min' angeben")
+	code = spec.get('exit_code')
+	if isinstance(code, bool) or not isinstance(code, int) or not 2 <= code <= 125:
+		raise ValueError(f"{where} ({name}): 'exit_code' muss eine ganze Zahl von 2 bis 125 sein")
+	return Rule(name, metric, hi, lo, code, bool(spec.get('blocking', True)))
+
+
+class RuleSet:
+	"""Kompilierte Regeln: benötigte Kennzahlen einmal berechnen, alle Grenzen in einem Schritt prüfen."""
+
+	def __init__(self, rules: List[Rule]):
+		self.rules = rules
+		self.metrics = list(dict.fromkeys(r.metric for r in rules))
+
+	def evaluate(self, result: ValidationResult) -> List[RuleOutcome]:
+		values = {m: METRICS[m].compute(result) for m in self.metrics}
+		outcomes = []
+		for rule in self.rules:
+			value = values[rule.metric]
+			passed = (rule.max is None or value <= rule.max) and (rule.min is None or value >= rule.min)
+			outcomes.append(RuleOutcome(rule, value, passed))
+		return outcomes
+
+	def fail_fast_rule(self) -> Optional[Rule]:
+		"""Erste blockierende Regel, falls sie im Durchlauf prüfbar ist (sonst None, siehe Modulkommentar)."""
+		first = next((r for r in self.rules if r.blocking), None)
+		if first is None or first.max is None or not METRICS[first.metric].streaming:
+			return None
+		return first
+
+	def guard(self) -> 'RuleGuard':
+		rule = self.fail_fast_rule()
+		return RuleGuard([rule] if rule else [])
+
+
+def load_rules(path: str) -> RuleSet:
+	"""Liest die Regeldatei ({"rules": [...]} oder direkt eine Liste); ValueError bei Fehlern."""
+	with open(path, encoding='utf-8-sig') as f:
+		try:
+			data = json.load(f)
+		except json.JSONDecodeError as e:
+			raise ValueError(f"{path}: kein gültiges JSON ({e})") from None
+	specs = data.get('rules') if isinstance(data, dict) else data
+	if not isinstance(specs, list):
+		raise ValueError(f"{path}: Liste 'rules' erwartet")
+	try:
+		return RuleSet([parse_rule(spec, i) for i, spec in enumerate(specs)])
+	except ValueError as e:
+		raise ValueError(f"{path}: {e}") from None
+
+
+def exit_code(outcomes: List[RuleOutcome], default: int) -> int:
+	"""Exit-Code der ersten verletzten blockierenden Regel, sonst default (Validator: 0/2)."""
+	for o in outcomes:
+		if not o.passed and o.rule.blocking:
+			return o.rule.exit_code
+	return default
+
+
+def print_outcomes(outcomes: List[RuleOutcome], out: Optional[TextIO] = None) -> None:
+	out = out or sys.stdout
+	print(file=out)
+	print("== Schwellwerte ==", file=out)
+	for o in outcomes:
+		if o.passed:
+			status = 'OK'
+		elif o.rule.blocking:
+			status = f"VERLETZT, Exit-Code {o.rule.exit_code}"
+		else:
+			status = 'WARNUNG'
+		print(f"- {o.rule.name}: {o.value:g} ({o.rule.describe()}) -> {status}", file=out)
+
+
+class RuleGuard(PlanAccumulator):
+	"""Fail-Fast im Streaming-Durchlauf: prüft je Planzeile nur die betroffenen Zähler.
+
+	Muss als letzter Akkumulator laufen; Verstoßlisten liest er aus Validator und den übrigen
+	Akkumulatoren, Monats-, Q4- und Folgetage-Zähler führt er selbst.
+	"""
+
+	def __init__(self, rules: List[Rule]):
+		self.rules = rules
+		self.reset()
+
+	def reset(self) -> None:
+		self.rows = 0
+		self._validator: Optional[StreamingValidator] = None
+		self._checks: List[Callable[[object, int], None]] = []
+		self._monthly: Dict[tuple, int] = {}
+		self._q4: Dict[tuple, int] = {}
+		self._consecutive: Dict[int, int] = {}
+		self._folgetage = 0
+		self._prev_abt: Optional[int] = None
+
+	def bind(self, validator: StreamingValidator) -> None:
+		self._validator = validator
+		accs = validator.accumulators
+		verhinderungen = next((a for a in accs if isinstance(a, VerhinderungAccumulator)), None)
+		gaps = next((a for a in accs if isinstance(a, GapAccumulator)), None)
+		abteilungen = list(validator.abt_by_num.values())
+		self._checks = [c for c in (self._compile(rule, verhinderungen, gaps, abteilungen) for rule in self.rules) if c]
+
+	def _compile(self, rule: Rule, verhinderungen: Optional[VerhinderungAccumulator], gaps: Optional[GapAccumulator], abteilungen) -> Optional[Callable[[object, int], None]]:
+		limit = rule.max
+		validator = self._validator
+
+		def breach(value: float) -> None:
+			raise RuleBreach(rule, value, self.rows)
+
+		if rule.metric == 'violations':
+			def check(d, abt_num):
+				n = len(validator.violations) + (len(verhinderungen.violations) if verhinderungen else 0)
+				if n > limit:
+					breach(n)
+		elif rule.metric == 'monthly_max_abs_diff':
+			soll: Dict[int, Dict[int, Dict[int, int]]] = {}  # Jahr -> Monat -> Soll je Abteilung (bei Bedarf)
+
+			def check(d, abt_num):
+				by_month = soll.get(d.year)
+				if by_month is None:
+					days = working_days_by_month(d.year)
+					by_month = soll[d.year] = {m: largest_remainder_targets(abteilungen, len(days[m])) for m in range(1, 13)}
+				diff = self._monthly[(d.year, d.month, abt_num)] - by_month[d.month].get(abt_num, 0)
+				if diff > limit:
+					breach(diff)
+		elif rule.metric == 'q4_max_abs_diff':
+			soll_q4: Dict[int, Dict[int, int]] = {}  # Jahr -> Q4-Soll je Abteilung (bei Bedarf)
+
+			def check(d, abt_num):
+				if d.month not in Q4_MONTHS:
+					return
+				targets = soll_q4.get(d.year)
+				if targets is None:
+					days = working_days_by_month(d.year)
+					targets = soll_q4[d.year] = largest_remainder_targets(abteilungen, sum(len(days[m]) for m in Q4_MONTHS))
+				diff = self._q4[(d.year, abt_num)] - targets.get(abt_num, 0)
+				if diff > limit:
+					breach(diff)
+		elif rule.metric == 'max_folgetage' and validator.presorted:
+			def check(d, abt_num):
+				if self._consecutive.get(abt_num, 0) > limit:
+					breach(self._consecutive[abt_num])
+		elif rule.metric == 'folgetage' and validator.presorted:
+			def check(d, abt_num):
+				if self._folgetage > limit:
+					breach(self._folgetage)
+		elif rule.metric == 'min_gap_violations' and gaps is not None and validator.presorted:
+			def check(d, abt_num):
+				if len(gaps.violations) > limit:
+					breach(len(gaps.violations))
+		else:
+			return None
+		return check
+
+	def add(self, d, abt_num, abt, is_fav):
+		self.rows += 1
+		key = (d.year, d.month, abt_num)
+		self._monthly[key] = self._monthly.get(key, 0) + 1
+		if d.month in Q4_MONTHS:
+			key = (d.year, abt_num)
+			self._q4[key] = self._q4.get(key, 0) + 1
+		if abt_num == self._prev_abt:
+			self._consecutive[abt_num] = self._consecutive.get(abt_num, 0) + 1
+			self._folgetage += 1
+		self._prev_abt = abt_num
+		for check in self._checks:
+			check(d, abt_num)
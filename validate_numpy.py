@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Vektorisiertes NumPy-Backend für validate_plan (Auswahl per --backend numpy).
+
+Der Plan wird in einen Zuweisungsvektor überführt: Spalte = Arbeitstag (stabil nach Datum
+sortiert), Wert = Abteilungscode. Zählungen, Monats-Ist, Lieblingstage, Folgetage,
+Verhinderungen und Soll/Ist-Abweichungen entstehen per bincount/searchsorted statt über
+Python-Schleifen. Die Ergebnisse entsprechen exakt dem Python-Pfad (collect_results).
+"""
+from datetime import date
+from typing import Callable, Container, List, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from calendar_service import HolidaySet, WorkingDayAxis
+from validate_plan import (
+	Abteilung,
+	DEFAULT_MIN_GAP,
+	Deviation,
+	MinGapViolation,
+	MonthlyQuotaRow,
+	Q4SkewRow,
+	RollingWindowRow,
+	Violation,
+	DEFAULT_WINDOWS,
+	Q4_MONTHS,
+	ValidationResult,
+	format_date_de,
+	gap_stats_rows,
+	iter_plan_rows,
+	largest_remainder_targets,
+	parse_plan_rows,
+	quota_years,
+	window_bounds,
+	window_label,
+	working_days_by_month,
+)
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# Schlüsselabstand je Abteilungscode für die kombinierte (Code, Ordinal)-Suche; > date.max.toordinal()
+CODE_STRIDE = 4_000_000
+
+
+def largest_remainder_matrix(abteilungen: List[Abteilung], totals: Sequence[int]) -> np.ndarray:
+	"""largest_remainder_targets für mehrere Gesamtmengen auf einmal; Zeile = total, Spalte = Abteilung."""
+	n = len(abteilungen)
+	totals_v = np.asarray(totals, dtype=np.int64)
+	result = np.zeros((len(totals_v), n), dtype=np.int64)
+	# Gleiche Summenbildung wie largest_remainder_targets (np.sum summiert paarweise)
+	total_weight = sum(a.pensum for a in abteilungen)
+	if n == 0 or total_weight <= 0:
+		return result
+	nums = np.array([a.nummer for a in abteilungen], dtype=np.int64)
+	if len(np.unique(nums)) != n:
+		# Doppelte Nummern: Dict-Semantik des Python-Pfads übernehmen
+		for row, total in enumerate(totals_v.tolist()):
+			targets = largest_remainder_targets(abteilungen, total)
+			result[row] = [targets.get(a.nummer, 0) for a in abteilungen]
+		return result
+	pensum = np.array([a.pensum for a in abteilungen], dtype=np.float64)
+	exact = (pensum / total_weight)[None, :] * totals_v[:, None]
+	floor_v = np.trunc(exact)
+	rest = exact - floor_v
+	result[:] = floor_v.astype(np.int64)
+	remaining = totals_v - result.sum(axis=1)
+	idx = np.arange(n)
+	for row in np.nonzero(remaining > 0)[0]:
+		# Sortierung wie (rest, pensum, -nummer) absteigend, stabil
+		order = np.lexsort((idx, nums, -pensum, -rest[row]))
+		picks = order[np.arange(remaining[row]) % n]
+		np.add.at(result[row], picks, 1)
+	return result
+
+
+def _stable_abs_desc(diff: np.ndarray) -> np.ndarray:
+	return np.argsort(-np.abs(diff), kind='stable')
+
+
+def rolling_window_matrix(ord_v: np.ndarray, code: np.ndarray, ncodes: int, dept_code: np.ndarray, abteilungen: List[Abteilung], windows: Iterable[str]) -> List[RollingWindowRow]:
+	"""Rollierende Fenster (wie RollingWindowAccumulator) über die Zuweisungsmatrix (Arbeitstag x Code).
+
+	Eine kumulierte Summe je Spalte ergibt die Präfixsummen aller Abteilungen; die Ist-Werte aller
+	Fenster einer Größe sind dann eine Zeilendifferenz (Fenster x Abteilung), Maximum/Minimum per
+	argmax/argmin (erstes Vorkommen wie im Python-Pfad).
+	"""
+	total_weight = sum(a.pensum for a in abteilungen)
+	if not len(ord_v) or total_weight <= 0:
+		return []
+	axis = WorkingDayAxis(date.fromordinal(int(ord_v.min())).year, date.fromordinal(int(ord_v.max())).year)
+	size = len(axis)
+	spans = [(window_label(spec), window_bounds(axis, spec)) for spec in windows]
+	axis_ords = np.frombuffer(axis.ordinals, dtype=np.int32).astype(np.int64)
+	pos = np.minimum(np.searchsorted(axis_ords, ord_v), size - 1)
+	working = axis_ords[pos] == ord_v
+	# prefix[t, k] = Einsätze von Abteilung k an den Arbeitstagen [0, t)
+	hits = np.bincount((pos[working] + 1) * ncodes + code[working], minlength=(size + 1) * ncodes).reshape(size + 1, ncodes)
+	prefix = np.cumsum(hits, axis=0)[:, dept_code]
+	share = np.array([a.pensum / total_weight for a in abteilungen], dtype=np.float64)
+	nums = [a.nummer for a in abteilungen]
+	cols = np.arange(len(abteilungen))
+
+	rows: List[RollingWindowRow] = []
+	for label, bounds in spans:
+		if not bounds:
+			continue
+		start, end = np.array(bounds, dtype=np.int64).T
+		soll = (end - start).astype(np.float64)[:, None] * share[None, :]
+		ist = prefix[end] - prefix[start]
+		dev = ist - soll
+		picks = []
+		for best in (dev.argmax(axis=0), dev.argmin(axis=0)):
+			picks.append(zip(
+				ist[best, cols].tolist(), soll[best, cols].tolist(), dev[best, cols].tolist(),
+				start[best].tolist(), end[best].tolist(),
+			))
+		block: List[RollingWindowRow] = []
+		for num, (hi_ist, hi_soll, hi_dev, hi_i, hi_j), (lo_ist, lo_soll, lo_dev, lo_i, lo_j) in zip(nums, *picks):
+			block.append(RollingWindowRow(
+				label, num,
+				hi_ist, round(hi_soll, 2), round(hi_dev, 2), format_date_de(axis.date(hi_i)), format_date_de(axis.date(hi_j - 1)),
+				lo_ist, round(lo_soll, 2), round(lo_dev, 2), format_date_de(axis.date(lo_i)), format_date_de(axis.date(lo_j - 1)),
+			))
+		block.sort(key=lambda r: max(abs(r[4]), abs(r[9])), reverse=True)
+		rows.extend(block)
+	return rows
+
+
+def collect_results_numpy(plan: Union[str, Callable[[], Iterable[Tuple[str, str, str]]]], abteilungen: List[Abteilung], windows: Iterable[str] = DEFAULT_WINDOWS, min_gap: int = DEFAULT_MIN_GAP, holidays: Optional[Container[date]] = None) -> ValidationResult:
+	"""plan: Pfad zur Plan-CSV oder Zeilenquelle wie bei collect_results_from_rows."""
+	# Basischecks zeilenweise (Strings), danach nur noch Arrays
+	rows = iter_plan_rows(plan) if isinstance(plan, str) else plan()
+	violations: List[Violation] = []
+	ords: List[int] = []
+	plan_nums: List[int] = []
+	for d, _, abt_num in parse_plan_rows(rows, HolidaySet() if holidays is None else holidays, violations):
+		ords.append(d.toordinal())
+		plan_nums.append(abt_num)
+	ord_v = np.array(ords, dtype=np.int64)
+	num_v = np.array(plan_nums, dtype=np.int64)
+	order = np.argsort(ord_v, kind='stable')
+	ord_v = ord_v[order]
+	num_v = num_v[order]
+	total_days = len(ord_v)
+
+	# Abteilungscodes: sortierte eindeutige Nummern aus Testdaten und Plan
+	dept_nums = np.array([a.nummer for a in abteilungen], dtype=np.int64)
+	code_space = np.unique(np.concatenate([dept_nums, num_v]))
+	ncodes = len(code_space)
+	code = np.searchsorted(code_space, num_v)  # Zuweisungsvektor: Arbeitstag -> Abteilungscode
+	dept_code = np.searchsorted(code_space, dept_nums)
+
+	abt_by_num: Dict[int, Abteilung] = {a.nummer: a for a in abteilungen}
+	fav_mask = np.zeros(ncodes, dtype=np.int64)
+	iv_keys_start: List[int] = []
+	iv_keys_end: List[int] = []
+	for num, a in abt_by_num.items():
+		c = int(np.searchsorted(code_space, num))
+		fav_mask[c] = a.verfuegbarkeit.favorite_mask
+		base = c * CODE_STRIDE
+		iv_keys_start.extend(base + s for s in a.verfuegbarkeit.starts)
+		iv_keys_end.extend(base + e for e in a.verfuegbarkeit.ends)
+
+	weekday = (ord_v - 1) % 7  # date(1, 1, 1) ist ein Montag
+	is_fav = ((fav_mask[code] >> weekday) & 1).astype(bool)
+
+	# Verhinderungen: Intervalle je Code sind disjunkt und sortiert -> eine searchsorted-Abfrage
+	if iv_keys_start and total_days:
+		starts = np.array(iv_keys_start, dtype=np.int64)
+		ends = np.array(iv_keys_end, dtype=np.int64)
+		iv_order = np.argsort(starts, kind='stable')
+		starts = starts[iv_order]
+		ends = ends[iv_order]
+		keys = code * CODE_STRIDE + ord_v
+		pos = np.searchsorted(starts, keys, side='right') - 1
+		blocked = (pos >= 0) & (keys <= ends[np.maximum(pos, 0)])
+		for i in np.nonzero(blocked)[0].tolist():
+			violations.append(Violation('verhinderung', f"Abteilung {int(num_v[i])} verhindert am {format_date_de(date.fromordinal(int(ord_v[i])))}"))
+
+	counts_v = np.bincount(code, minlength=ncodes)
+	fav_v = np.bincount(code[is_fav], minlength=ncodes)
+	same = code[1:] == code[:-1]
+	cons_v = np.bincount(code[1:][same], minlength=ncodes)
+
+	def to_dict(values: np.ndarray) -> Dict[int, int]:
+		nz = np.nonzero(values)[0]
+		return dict(zip(code_space[nz].tolist(), values[nz].tolist()))
+
+	counts = to_dict(counts_v)
+
+	# Monatsraster: Monate seit 1970 -> (Monat, Code)-Matrix
+	month_abs = (ord_v - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+	monthly: Dict[str, Dict[int, Dict[str, int]]] = {}
+	ist_m = np.zeros((0, ncodes), dtype=np.int64)
+	m_min = 0
+	if total_days:
+		m_min = int(month_abs.min())
+		n_months = int(month_abs.max()) - m_min + 1
+		cell = (month_abs - m_min) * ncodes + code
+		ist_m = np.bincount(cell, minlength=n_months * ncodes).reshape(n_months, ncodes)
+		fav_m = np.bincount(cell[is_fav], minlength=n_months * ncodes).reshape(n_months, ncodes)
+		for mi, c in zip(*(x.tolist() for x in np.nonzero(ist_m))):
+			m_abs = m_min + mi
+			key = f"{1970 + m_abs // 12}-{m_abs % 12 + 1:02d}"
+			monthly.setdefault(key, {})[int(code_space[c])] = {"ist": int(ist_m[mi, c]), "fav": int(fav_m[mi, c])}
+
+	nums_list = dept_nums.tolist()
+
+	# Proportionalität
+	ziel = largest_remainder_matrix(abteilungen, [total_days])[0]
+	ist = counts_v[dept_code]
+	diff = ist - ziel
+	deviations = [Deviation(*r) for r in np.stack([dept_nums, ziel, ist, diff], axis=1)[_stable_abs_desc(diff)].tolist()]
+
+	# Monatsweise Soll/Ist-Quoten je Planjahr: Zeile = (Jahr, Monat)
+	year_v = month_abs // 12 + 1970
+	years = quota_years(np.unique(year_v).tolist())
+	monthly_days = {year: working_days_by_month(year) for year in years}
+	soll_m = largest_remainder_matrix(abteilungen, [len(monthly_days[year][m]) for year in years for m in range(1, 13)])
+	ist_y = np.zeros_like(soll_m)
+	for row in range(len(soll_m)):
+		mi = (years[row // 12] - 1970) * 12 + row % 12 - m_min
+		if 0 <= mi < len(ist_m):
+			ist_y[row] = ist_m[mi][dept_code]
+	diff_m = ist_y - soll_m
+	monthly_quota_dev_rows: List[MonthlyQuotaRow] = []
+	for row in range(len(soll_m)):
+		mon_key = f"{years[row // 12]}-{row % 12 + 1:02d}"
+		for num, soll, i, dv in zip(nums_list, soll_m[row].tolist(), ist_y[row].tolist(), diff_m[row].tolist()):
+			monthly_quota_dev_rows.append(MonthlyQuotaRow(mon_key, num, soll, i, dv))
+
+	# Q4-Skew je Planjahr: (Jahr, Code)-Matrix, Zeilen jahrweise wie im Python-Pfad
+	q4_sel = np.isin(month_abs % 12 + 1, list(Q4_MONTHS))
+	year_i = np.searchsorted(np.array(years, dtype=np.int64), year_v[q4_sel])
+	q4_v = np.bincount(year_i * ncodes + code[q4_sel], minlength=len(years) * ncodes).reshape(len(years), ncodes)
+	q4_soll = largest_remainder_matrix(abteilungen, [sum(len(monthly_days[year][m]) for m in Q4_MONTHS) for year in years]).ravel()
+	q4_ist = q4_v[:, dept_code].ravel()
+	q4_diff = q4_ist - q4_soll
+	q4_year = np.repeat(np.array(years, dtype=np.int64), len(abteilungen))
+	q4_num = np.tile(dept_nums, len(years))
+	q4_skew_rows = [Q4SkewRow(*r) for r in np.stack([q4_num, q4_ist, q4_soll, q4_diff, q4_year], axis=1)[_stable_abs_desc(q4_diff)].tolist()]
+
+	# Rollierende Fenster: Präfixsummen über die Zuweisungsmatrix
+	window_rows = rolling_window_matrix(ord_v, code, ncodes, dept_code, abteilungen, windows)
+
+	# Abstände: Arbeitstag-Index je Zeile, Differenzen innerhalb jedes Codes (Datumsreihenfolge)
+	gap_histogram: Dict[int, Dict[int, int]] = {}
+	min_gap_violations: List[MinGapViolation] = []
+	if total_days:
+		axis = WorkingDayAxis(int(month_abs.min()) // 12 + 1970, int(month_abs.max()) // 12 + 1970)
+		axis_ords = np.frombuffer(axis.ordinals, dtype=np.int32).astype(np.int64)
+		wpos = np.minimum(np.searchsorted(axis_ords, ord_v), len(axis_ords) - 1)
+		working = axis_ords[wpos] == ord_v
+		rows_w = np.nonzero(working)[0]
+		grp = rows_w[np.argsort(code[rows_w], kind='stable')]
+		same_code = code[grp[1:]] == code[grp[:-1]]
+		prev_i, cur_i = grp[:-1][same_code], grp[1:][same_code]
+		gaps = wpos[cur_i] - wpos[prev_i]
+		if len(gaps):
+			pairs, pair_n = np.unique(np.stack([code[cur_i], gaps], axis=1), axis=0, return_counts=True)
+			for (c, gap), n in zip(pairs.tolist(), pair_n.tolist()):
+				gap_histogram.setdefault(int(code_space[c]), {})[gap] = n
+			bad = np.nonzero(gaps < min_gap)[0]
+			for k in bad[np.argsort(cur_i[bad], kind='stable')].tolist():
+				min_gap_violations.append(MinGapViolation(int(num_v[cur_i[k]]), format_date_de(date.fromordinal(int(ord_v[prev_i[k]]))), format_date_de(date.fromordinal(int(ord_v[cur_i[k]]))), int(gaps[k])))
+
+	return ValidationResult(
+		abteilungen=abteilungen,
+		total_days=total_days,
+		violations=violations,
+		deviations=deviations,
+		counts=counts,
+		favorite_hits=to_dict(fav_v),
+		consecutive_counts=to_dict(cons_v),
+		monthly=monthly,
+		monthly_quota_dev_rows=monthly_quota_dev_rows,
+		q4_skew_rows=q4_skew_rows,
+		rolling_window_rows=window_rows,
+		min_gap=min_gap,
+		gap_histogram=gap_histogram,
+		gap_stats_rows=gap_stats_rows(abteilungen, counts, gap_histogram, min_gap_violations),
+		min_gap_violations=min_gap_violations,
+	)
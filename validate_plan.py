@@ -1,16 +1,26 @@
 #!/usr/bin/env python3
 import csv
-from dataclasses import dataclass
+from array import array
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
 from datetime import date, datetime
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Callable, Set, Container, Deque, NamedTuple, Sequence, TextIO, Union
 import sys
 import os
+import time
 import argparse
 
+from calendar_service import HolidaySet, WorkingDayAxis, get_calendar, holidays_for
+import profiling
+
 # Python date.weekday(): Montag=0 .. Sonntag=6
 GERMAN_WEEKDAYS = [
 	"Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"
 ]
+WEEKDAY_INDEX = {name: i for i, name in enumerate(GERMAN_WEEKDAYS)}
+BINARY_PLAN_SUFFIX = '.dpb'  # Binärplan, siehe plan_binary
 
 
 def parse_date_de(d: str) -> date:
@@ -24,20 +34,8 @@ def format_date_de(d: date) -> str:
 
 
 def berlin_holidays_2026() -> List[date]:
-	# Minimal feste Liste passend zur Web-App
-	fixed = [
-		date(2026, 1, 1),   # Neujahr
-		date(2026, 3, 8),   # Internationaler Frauentag (Berlin)
-		date(2026, 4, 3),   # Karfreitag
-		date(2026, 4, 6),   # Ostermontag
-		date(2026, 5, 1),   # Tag der Arbeit
-		date(2026, 5, 14),  # Christi Himmelfahrt
-		date(2026, 5, 25),  # Pfingstmontag
-		date(2026, 10, 3),  # Tag der Deutschen Einheit
-		date(2026, 12, 25), # 1. Weihnachtstag
-		date(2026, 12, 26), # 2. Weihnachtstag
-	]
-	return fixed
+	# Passend zur Web-App; berechnet über den Kalenderdienst
+	return holidays_for(2026)
 
 
 def is_weekday(d: date) -> bool:
@@ -51,50 +49,131 @@ class Verhinderung:
 	end: date = None
 
 
+class AvailabilityIndex:
+	"""Kompakter Verfügbarkeitsindex einer Abteilung.
+
+	Verhinderungen werden als sortierte, verschmolzene Intervalle über date.toordinal()
+	gehalten (Lookup per bisect in O(log n)), Lieblingstage als Bitmaske (Bit 0 = Montag).
+	"""
+	__slots__ = ('starts', 'ends', 'favorite_mask')
+
+	def __init__(self, verhinderungen: Iterable[Verhinderung] = (), lieblingstage: Iterable[str] = ()):
+		intervals: List[Tuple[int, int]] = []
+		for v in verhinderungen:
+			if v.start is None:
+				continue
+			end = v.start if v.type == 'single' or v.end is None else v.end
+			if end < v.start:
+				# umgekehrter Zeitraum blockiert keinen Tag (wie is_verhindert bisher)
+				continue
+			intervals.append((v.start.toordinal(), end.toordinal()))
+		intervals.sort()
+		self.starts: List[int] = []
+		self.ends: List[int] = []
+		for start, end in intervals:
+			if self.ends and start <= self.ends[-1] + 1:
+				if end > self.ends[-1]:
+					self.ends[-1] = end
+			else:
+				self.starts.append(start)
+				self.ends.append(end)
+		mask = 0
+		for name in lieblingstage:
+			idx = WEEKDAY_INDEX.get(name)
+			if idx is not None:
+				mask |= 1 << idx
+		self.favorite_mask = mask
+
+	def is_blocked_ordinal(self, ordinal: int) -> bool:
+		i = bisect_right(self.starts, ordinal) - 1
+		return i >= 0 and ordinal <= self.ends[i]
+
+	def is_blocked(self, d: date) -> bool:
+		return self.is_blocked_ordinal(d.toordinal())
+
+	def is_favorite_weekday(self, weekday: int) -> bool:
+		return bool(self.favorite_mask >> weekday & 1)
+
+	def is_favorite(self, d: date) -> bool:
+		return bool(self.favorite_mask >> d.weekday() & 1)
+
+	def blocked_intervals(self) -> List[Tuple[date, date]]:
+		return [(date.fromordinal(s), date.fromordinal(e)) for s, e in zip(self.starts, self.ends)]
+
+
 @dataclass
 class Abteilung:
 	nummer: int
 	pensum: float
 	lieblingstage: List[str]
 	verhinderungen: List[Verhinderung]
+	verfuegbarkeit: AvailabilityIndex = field(init=False, repr=False, compare=False)
 
+	def __post_init__(self):
+		self.rebuild_index()
 
-def parse_abteilungen_csv(path: str) -> List[Abteilung]:
-	abteilungen: List[Abteilung] = []
-	with open(path, newline='', encoding='utf-8') as f:
-		for raw in f:
-			line = raw.strip().lstrip('\ufeff')  # remove potential BOM
-			if not line or line.startswith("#"):
-				continue
-			parts = [p.strip() for p in line.split(";")]
-			if len(parts) < 4:
-				# toleranter: fehlende Felder auffüllen
-				parts += [""] * (4 - len(parts))
+	def rebuild_index(self) -> None:
+		"""Nach Änderungen an lieblingstage/verhinderungen aufrufen."""
+		self.verfuegbarkeit = AvailabilityIndex(self.verhinderungen, self.lieblingstage)
+
+
+class AvailabilityTable:
+	"""Massenabfragen über die Verfügbarkeit mehrerer Abteilungen (z. B. „wer ist am Tag X frei?")."""
+
+	def __init__(self, abteilungen: List[Abteilung]):
+		self.abteilungen = list(abteilungen)
+
+	def free_on(self, d: date) -> List[int]:
+		o = d.toordinal()
+		return [a.nummer for a in self.abteilungen if not a.verfuegbarkeit.is_blocked_ordinal(o)]
+
+	def blocked_on(self, d: date) -> List[int]:
+		o = d.toordinal()
+		return [a.nummer for a in self.abteilungen if a.verfuegbarkeit.is_blocked_ordinal(o)]
+
+	def favorites_on(self, d: date) -> List[int]:
+		wd = d.weekday()
+		return [a.nummer for a in self.abteilungen if a.verfuegbarkeit.favorite_mask >> wd & 1]
+
+	def free_by_day(self, days: Iterable[date]) -> Dict[date, List[int]]:
+		"""Freie Abteilungen für viele Tage per Sweep über alle Intervalle statt bisect je Tag und Abteilung."""
+		events: List[Tuple[int, int, int]] = []  # (ordinal, +1/-1, position)
+		for pos, a in enumerate(self.abteilungen):
+			idx = a.verfuegbarkeit
+			for s, e in zip(idx.starts, idx.ends):
+				events.append((s, 1, pos))
+				events.append((e + 1, -1, pos))
+		events.sort()
+		blocked = [0] * len(self.abteilungen)
+		result: Dict[date, List[int]] = {}
+		ei = 0
+		for d in sorted(set(days)):
+			o = d.toordinal()
+			while ei < len(events) and events[ei][0] <= o:
+				_, delta, pos = events[ei]
+				blocked[pos] += delta
+				ei += 1
+			result[d] = [a.nummer for pos, a in enumerate(self.abteilungen) if not blocked[pos]]
+		return result
 
-			try:
-				nummer = int(parts[0])
-			except Exception:
-				# Überschrift oder defekte Zeile überspringen (z. B. 'Abteilung', 'Nummer', ...)
-				continue
 
-			pensum_str = parts[1].replace('%', '').strip()
-			pensum = float(pensum_str) if pensum_str else 0.0
-			lieblingstage = [t.strip() for t in parts[2].split(',') if t.strip()]
+def parse_abteilungen_csv(path: str, strict: bool = False) -> List[Abteilung]:
+	"""Liest Testdaten.csv in einem Stück (Encoding/BOM einmal erkannt, siehe input_parser).
 
-			verhinderungen: List[Verhinderung] = []
-			if parts[3].strip():
-				for token in [t.strip() for t in parts[3].split(',') if t.strip()]:
-					if '-' in token:
-						start_s, end_s = [x.strip() for x in token.split('-', 1)]
-						verhinderungen.append(Verhinderung('range', parse_date_de(start_s), parse_date_de(end_s)))
-					else:
-						verhinderungen.append(Verhinderung('single', parse_date_de(token), parse_date_de(token)))
+	strict=True: input_parser.InputError mit allen Fehlern (Datei:Zeile und Grund).
+	"""
+	from input_parser import read_testdaten
+	return read_testdaten(path, strict)
 
-			abteilungen.append(Abteilung(nummer, pensum, lieblingstage, verhinderungen))
-	return abteilungen
+
+def parse_abteilungen_lines(lines: Iterable[str]) -> List[Abteilung]:
+	"""Testdaten-Zeilen (Abteilung;Jahrespensen;Lieblingstage;Verhinderungen) aus beliebiger Quelle."""
+	from input_parser import parse_testdaten_lines
+	return parse_testdaten_lines(lines)[0]
 
 
 def parse_plan_csv(path: str) -> List[Dict[str, str]]:
+	"""Plan-Zeilen als Dicts (Kompatibilität); für große Pläne iter_plan_rows."""
 	rows: List[Dict[str, str]] = []
 	with open(path, newline='', encoding='utf-8') as f:
 		reader = csv.DictReader(f, delimiter=';')
@@ -108,32 +187,60 @@ def parse_plan_csv(path: str) -> List[Dict[str, str]]:
 	return rows
 
 
+def iter_plan_rows(path: str) -> Iterator[Tuple[str, str, str]]:
+	"""Liest die Plan-CSV zeilenweise als (Datum, Wochentag, Abteilungsnummer) ohne Dict je Zeile.
+
+	Binärpläne (.dpb, siehe plan_binary) werden transparent in dieselben Felder umgesetzt.
+	"""
+	if path.endswith(BINARY_PLAN_SUFFIX):
+		from plan_binary import iter_binary_rows
+		yield from iter_binary_rows(path)
+		return
+	with open(path, newline='', encoding='utf-8') as f:
+		yield from iter_plan_lines(f)
+
+
+def iter_plan_lines(lines: Iterable[str]) -> Iterator[Tuple[str, str, str]]:
+	"""Wie iter_plan_rows, aber für CSV-Zeilen aus beliebiger Quelle (z. B. Upload-Text)."""
+	reader = csv.reader(lines, delimiter=';')
+	header = next(reader, None)
+	if header is None:
+		return
+	col = {name: i for i, name in enumerate(header)}
+	i_datum = col.get('Datum', -1)
+	i_wtag = col.get('Wochentag', -1)
+	i_abt = col.get('Abteilungsnummer', -1)
+	for r in reader:
+		if not r:
+			# Leerzeilen überspringen (wie csv.DictReader)
+			continue
+		n = len(r)
+		yield (
+			r[i_datum].strip() if 0 <= i_datum < n else '',
+			r[i_wtag].strip() if 0 <= i_wtag < n else '',
+			r[i_abt].strip() if 0 <= i_abt < n else '',
+		)
+
+
 def is_verhindert(a: Abteilung, d: date) -> bool:
-	for v in a.verhinderungen:
-		if v.type == 'single':
-			if v.start == d:
-				return True
-		else:
-			if v.start <= d <= v.end:
-				return True
-	return False
+	return a.verfuegbarkeit.is_blocked(d)
+
+
+DEFAULT_QUOTA_YEAR = 2026  # Soll-Jahr für Monate und Q4, wenn der Plan keine Zeilen hat
+
+
+def working_days_by_month(year: int) -> Dict[int, List[date]]:
+	"""Gibt für year eine Map {1..12: [arbeitstage im Monat]} zurück."""
+	return get_calendar(year).days_by_month()
 
 
 def working_days_by_month_2026() -> Dict[int, List[date]]:
-	"""Gibt für 2026 eine Map {1..12: [arbeitstage im Monat]} zurück."""
-	holidays = set(berlin_holidays_2026())
-	monthly: Dict[int, List[date]] = {m: [] for m in range(1, 13)}
-	for month in range(1, 13):
-		# Tage im Monat
-		if month == 12:
-			days_in_month = 31
-		else:
-			days_in_month = (date(2026, month + 1, 1) - date(2026, month, 1)).days
-		for day in range(1, days_in_month + 1):
-			d = date(2026, month, day)
-			if is_weekday(d) and d not in holidays:
-				monthly[month].append(d)
-	return monthly
+	return working_days_by_month(2026)
+
+
+def quota_years(years: Iterable[int]) -> List[int]:
+	"""Jahre mit Monats- und Q4-Soll: alle Planjahre, bei leerem Plan DEFAULT_QUOTA_YEAR."""
+	return sorted(set(years)) or [DEFAULT_QUOTA_YEAR]
 
 
 def largest_remainder_targets(abteilungen: List[Abteilung], total_days: int) -> Dict[int, int]:
@@ -155,6 +262,369 @@ def largest_remainder_targets(abteilungen: List[Abteilung], total_days: int) ->
 	return targets
 
 
+class Violation(NamedTuple):
+	"""Harter Regelverstoß; kind ist einer von VIOLATION_KINDS, message der Berichtstext."""
+	kind: str
+	message: str
+
+	def __str__(self) -> str:
+		return self.message
+
+
+VIOLATION_KINDS = ('datum', 'wochentag', 'wochenende', 'feiertag', 'abteilung', 'verhinderung')
+
+
+class Deviation(NamedTuple):
+	abteilung: int
+	ziel: int
+	ist: int
+	diff: int
+
+
+class MonthlyQuotaRow(NamedTuple):
+	monat: str  # 'YYYY-MM'
+	abteilung: int
+	soll: int
+	ist: int
+	diff: int
+
+
+class Q4SkewRow(NamedTuple):
+	abteilung: int
+	ist: int
+	soll: int
+	diff: int
+	jahr: int
+
+
+Q4_HEADER = ['Abteilung', 'Q4_Ist', 'Q4_Soll', 'Diff']
+
+
+def q4_multi_year(rows: Iterable[Q4SkewRow]) -> bool:
+	"""Mehrere Planjahre: Q4-Ausgaben nennen das Jahr; einjährige Pläne behalten das bisherige Format."""
+	return len({r.jahr for r in rows}) > 1
+
+
+def q4_table(rows: List[Q4SkewRow]) -> Tuple[List[str], List[List]]:
+	"""Kopf und Zeilen für Q4-Exporte (CSV, XLSX); Spalte Jahr nur bei mehrjährigen Plänen."""
+	if q4_multi_year(rows):
+		return ['Jahr'] + Q4_HEADER, [[r.jahr, *r[:4]] for r in rows]
+	return Q4_HEADER, [list(r[:4]) for r in rows]
+
+
+class RollingWindowRow(NamedTuple):
+	fenster: str
+	abteilung: int
+	max_ist: int
+	max_soll: float
+	max_diff: float
+	max_von: str
+	max_bis: str
+	min_ist: int
+	min_soll: float
+	min_diff: float
+	min_von: str
+	min_bis: str
+
+
+class GapStatsRow(NamedTuple):
+	abteilung: int
+	einsaetze: int
+	min: Union[int, str]  # '' bei weniger als zwei Einsätzen
+	median: Union[int, float, str]
+	max: Union[int, str]
+	verstoesse: int
+
+
+class MinGapViolation(NamedTuple):
+	abteilung: int
+	von: str
+	bis: str
+	abstand: int
+
+
+class PlanAccumulator:
+	"""Basis für Auswertungen, die im Streaming-Durchlauf je gültiger Planzeile gefüttert werden.
+
+	ordered=True bedeutet: Ergebnis hängt von der Datumsreihenfolge ab. Ist der Plan nicht
+	sortiert, setzt der Validator solche Akkumulatoren zurück und spielt die Zeilen sortiert ein.
+	"""
+	ordered = False
+
+	def reset(self) -> None:
+		pass
+
+	def bind(self, validator: 'StreamingValidator') -> None:
+		"""Wird zu Beginn jedes Durchlaufs nach reset() aufgerufen (Zugriff auf Basisverstöße u. Ä.)."""
+
+	def add(self, d: date, abt_num: int, abt: Optional[Abteilung], is_fav: bool) -> None:
+		raise NotImplementedError
+
+	def finish(self) -> None:
+		pass
+
+
+class VerhinderungAccumulator(PlanAccumulator):
+	"""Zuweisungen an Tagen, an denen die Abteilung verhindert ist."""
+	ordered = True
+
+	def __init__(self):
+		self.reset()
+
+	def reset(self) -> None:
+		self.violations: List[Violation] = []
+
+	def add(self, d, abt_num, abt, is_fav):
+		if abt and is_verhindert(abt, d):
+			self.violations.append(Violation('verhinderung', f"Abteilung {abt_num} verhindert am {format_date_de(d)}"))
+
+
+class CountsAccumulator(PlanAccumulator):
+	"""Einsätze und Lieblingstage-Treffer je Abteilung."""
+
+	def __init__(self):
+		self.reset()
+
+	def reset(self) -> None:
+		self.counts: Dict[int, int] = {}
+		self.favorite_hits: Dict[int, int] = {}
+
+	def add(self, d, abt_num, abt, is_fav):
+		self.counts[abt_num] = self.counts.get(abt_num, 0) + 1
+		if is_fav:
+			self.favorite_hits[abt_num] = self.favorite_hits.get(abt_num, 0) + 1
+
+
+class ConsecutiveAccumulator(PlanAccumulator):
+	"""Folgetage: benachbarte Planzeilen (Arbeitstage) mit gleicher Abteilung."""
+	ordered = True
+
+	def __init__(self):
+		self.reset()
+
+	def reset(self) -> None:
+		self.consecutive_counts: Dict[int, int] = {}
+		self._prev_abt: Optional[int] = None
+
+	def add(self, d, abt_num, abt, is_fav):
+		if abt_num == self._prev_abt:
+			# Plan listet nur Arbeitstage; benachbarte Zeilen sind konsekutive Arbeitstage
+			self.consecutive_counts[abt_num] = self.consecutive_counts.get(abt_num, 0) + 1
+		self._prev_abt = abt_num
+
+
+class MonthlyAccumulator(PlanAccumulator):
+	"""Ist & Favoriten je Monat ('YYYY-MM') und Abteilung."""
+
+	def __init__(self):
+		self.reset()
+
+	def reset(self) -> None:
+		self.monthly: Dict[str, Dict[int, Dict[str, int]]] = {}
+		self._keys: Dict[Tuple[int, int], Dict[int, Dict[str, int]]] = {}
+
+	def add(self, d, abt_num, abt, is_fav):
+		bucket = self._keys.get((d.year, d.month))
+		if bucket is None:
+			bucket = self.monthly.setdefault(f"{d.year}-{d.month:02d}", {})
+			self._keys[(d.year, d.month)] = bucket
+		m = bucket.get(abt_num)
+		if m is None:
+			m = bucket[abt_num] = {"ist": 0, "fav": 0}
+		m["ist"] += 1
+		if is_fav:
+			m["fav"] += 1
+
+
+class MonthSetAccumulator(PlanAccumulator):
+	"""Einsätze je (Jahr, Abteilung) in einer Monatsmenge (z. B. Q4 = {10, 11, 12})."""
+
+	def __init__(self, months: Set[int]):
+		self.months = set(months)
+		self.reset()
+
+	def reset(self) -> None:
+		self.counts: Dict[Tuple[int, int], int] = {}
+
+	def add(self, d, abt_num, abt, is_fav):
+		if d.month in self.months:
+			key = (d.year, abt_num)
+			self.counts[key] = self.counts.get(key, 0) + 1
+
+
+class GapAccumulator(PlanAccumulator):
+	"""Abstände (in Arbeitstagen laut Kalender) zwischen aufeinanderfolgenden Einsätzen je Abteilung.
+
+	Merkt sich je Abteilung nur den letzten Arbeitstag-Index; fehlende Planzeilen verfälschen
+	die Abstände daher nicht. Zeilen an Nicht-Arbeitstagen werden übersprungen (dafür gibt es
+	bereits Basis-Verstöße).
+	"""
+	ordered = True
+
+	def __init__(self, min_gap: int = 0):
+		self.min_gap = min_gap
+		self.reset()
+
+	def reset(self) -> None:
+		self.histogram: Dict[int, Dict[int, int]] = {}
+		self.violations: List[MinGapViolation] = []
+		self._last: Dict[int, Tuple[int, date]] = {}
+		self._anchor: Optional[int] = None
+		self._offsets: Dict[int, int] = {}
+
+	def _year_offset(self, year: int) -> int:
+		offset = self._offsets.get(year)
+		if offset is None:
+			if self._anchor is None:
+				self._anchor = year
+			if year >= self._anchor:
+				offset = sum(len(get_calendar(y)) for y in range(self._anchor, year))
+			else:
+				offset = -sum(len(get_calendar(y)) for y in range(year, self._anchor))
+			self._offsets[year] = offset
+		return offset
+
+	def add(self, d, abt_num, abt, is_fav):
+		i = get_calendar(d.year).working_index(d)
+		if i < 0:
+			return
+		i += self._year_offset(d.year)
+		last = self._last.get(abt_num)
+		self._last[abt_num] = (i, d)
+		if last is None:
+			return
+		gap = i - last[0]
+		hist = self.histogram.get(abt_num)
+		if hist is None:
+			hist = self.histogram[abt_num] = {}
+		hist[gap] = hist.get(gap, 0) + 1
+		if gap < self.min_gap:
+			self.violations.append(MinGapViolation(abt_num, format_date_de(last[1]), format_date_de(d), gap))
+
+
+def parse_plan_rows(rows: Iterable[Tuple[str, str, str]], holidays: Container[date], violations: Optional[List[Violation]]) -> Iterator[Tuple[date, str, int]]:
+	"""Basischecks je Planzeile (Datum, Wochentag, Wochenende/Feiertag, Abteilungsnummer).
+
+	Liefert (Datum, Wochentag, Abteilungsnummer) für verwertbare Zeilen; Verstöße werden in
+	Eingabereihenfolge an violations angehängt (None: Verstöße nicht sammeln).
+	"""
+	for datum, wochentag, abt_s in rows:
+		try:
+			d = parse_date_de(datum)
+		except Exception:
+			if violations is not None:
+				violations.append(Violation('datum', f"Ungültiges Datumsformat: {datum}"))
+			continue
+		weekday_name = GERMAN_WEEKDAYS[d.weekday()]
+		if violations is not None:
+			if wochentag and wochentag != weekday_name:
+				violations.append(Violation('wochentag', f"Wochentag stimmt nicht: {datum} (CSV: {wochentag}, berechnet: {weekday_name})"))
+			if not is_weekday(d):
+				violations.append(Violation('wochenende', f"Wochenend-Zuweisung gefunden: {datum}"))
+			if d in holidays:
+				violations.append(Violation('feiertag', f"Feiertags-Zuweisung gefunden: {datum}"))
+		try:
+			abt_num = int(abt_s)
+		except Exception:
+			if violations is not None:
+				violations.append(Violation('abteilung', f"Ungültige Abteilungsnummer in Plan: {abt_s}"))
+			continue
+		yield d, weekday_name, abt_num
+
+
+class ParsedPlanRows:
+	"""Zeilenquelle aus bereits geprüften (Datum, Wochentag, Abteilung)-Einträgen, z. B. einem Binärplan.
+
+	Die Einträge liegen nur auf Arbeitstagen und haben gültige Abteilungsnummern; der
+	StreamingValidator übernimmt sie ohne Parsing. Aufgerufen liefert die Quelle die
+	gewohnten CSV-Felder (für Verbraucher wie das NumPy-Backend). presorted: Einträge sind
+	garantiert streng aufsteigend nach Datum (Binärplan); reihenfolgeabhängige Zähler sind dann
+	schon im Durchlauf endgültig.
+	"""
+	__slots__ = ('entries', 'presorted')
+
+	def __init__(self, entries: Callable[[], Iterable[Tuple[date, str, int]]], presorted: bool = False):
+		self.entries = entries
+		self.presorted = presorted
+
+	def __call__(self) -> Iterator[Tuple[str, str, str]]:
+		for d, weekday_name, num in self.entries():
+			yield format_date_de(d), weekday_name, str(num)
+
+
+class StreamingValidator:
+	"""Liest Planzeilen genau einmal und füttert alle Akkumulatoren im selben Durchlauf.
+
+	Basischecks (Datum, Wochentag, Wochenende/Feiertag, Abteilungsnummer) laufen direkt im
+	Durchlauf; alles Weitere übernehmen die übergebenen Akkumulatoren. Die Zeilen selbst werden
+	nicht gehalten, der Speicherbedarf folgt den Aggregaten der Akkumulatoren. Zeilenproportional
+	ist nur das Neueinspielen der ordered-Akkumulatoren bei unsortierten Plänen: Es puffert je
+	Zeile ein kompaktes (Ordinalzahl, Abteilung)-Paar und sortiert danach.
+	"""
+
+	def __init__(self, abteilungen: List[Abteilung], accumulators: List[PlanAccumulator], holidays: Optional[Container[date]] = None):
+		self.abt_by_num: Dict[int, Abteilung] = {a.nummer: a for a in abteilungen}
+		self.accumulators = accumulators
+		# Feiertage aller Jahre über den Kalenderdienst (memoisiert je Jahr)
+		self.holidays = HolidaySet() if holidays is None else holidays
+		self.violations: List[Violation] = []
+		self.total_days = 0
+		self.in_order = True
+		self.presorted = False  # Quelle garantiert sortierte Zeilen (siehe ParsedPlanRows)
+
+	def _entry(self, d: date, abt_num: int) -> Tuple[date, int, Optional[Abteilung], bool]:
+		a = self.abt_by_num.get(abt_num)
+		return d, abt_num, a, bool(a and a.verfuegbarkeit.favorite_mask >> d.weekday() & 1)
+
+	def _entries(self, source: Callable[[], Iterable[Tuple[str, str, str]]], violations: Optional[List[Violation]] = None) -> Iterable[Tuple[date, str, int]]:
+		# Vorab geprüfte Einträge (z. B. Binärplan) brauchen keine Basischecks
+		return source.entries() if isinstance(source, ParsedPlanRows) else parse_plan_rows(source(), self.holidays, violations)
+
+	def _parse(self, source: Callable[[], Iterable[Tuple[str, str, str]]], violations: Optional[List[Violation]]) -> Iterator[Tuple[date, int, Optional[Abteilung], bool]]:
+		entry = self._entry
+		for d, _, abt_num in self._entries(source, violations):
+			yield entry(d, abt_num)
+
+	def run(self, source: Callable[[], Iterable[Tuple[str, str, str]]]) -> None:
+		"""source liefert bei jedem Aufruf einen frischen Zeilen-Iterator (z. B. iter_plan_rows)."""
+		self.violations = []
+		self.total_days = 0
+		self.in_order = True
+		self.presorted = isinstance(source, ParsedPlanRows) and source.presorted
+		for acc in self.accumulators:
+			acc.reset()
+			acc.bind(self)
+		accs = self.accumulators
+		last: Optional[date] = None
+		for d, abt_num, a, is_fav in self._parse(source, self.violations):
+			self.total_days += 1
+			if last is not None and d < last:
+				self.in_order = False
+			last = d
+			for acc in accs:
+				acc.add(d, abt_num, a, is_fav)
+
+		ordered = [acc for acc in accs if acc.ordered]
+		if not self.in_order and ordered:
+			# Unsortierter Plan: reihenfolgeabhängige Auswertungen sortiert (stabil) neu einspielen.
+			# Gepuffert wird je Zeile nur Ordinalzahl << 32 | Zeilennummer plus die Abteilung.
+			keys = array('q')
+			nums = array('q')
+			for d, _, abt_num in self._entries(source):
+				keys.append(d.toordinal() << 32 | len(nums))
+				nums.append(abt_num)
+			for acc in ordered:
+				acc.reset()
+			entry = self._entry
+			for key in sorted(keys):
+				row = entry(date.fromordinal(key >> 32), nums[key & 0xFFFFFFFF])
+				for acc in ordered:
+					acc.add(*row)
+
+		for acc in accs:
+			acc.finish()
+
+
 def write_csv(path: str, header: List[str], rows: List[List]):
 	os.makedirs(os.path.dirname(path), exist_ok=True)
 	with open(path, 'w', newline='', encoding='utf-8') as f:
@@ -164,7 +634,7 @@ def write_csv(path: str, header: List[str], rows: List[List]):
 			w.writerow(r)
 
 
-def write_markdown_summary(path: str, total_days: int, violations: List[str], deviations: List[Tuple[int,int,int,int]], consecutive_counts: Dict[int,int], favorite_hits: Dict[int,int], counts: Dict[int,int], monthly: Dict[str, Dict[int, Dict[str,int]]], monthly_quota_dev: List[List], q4_skew: List[List]):
+def write_markdown_summary(path: str, total_days: int, violations: List[Violation], deviations: List[Deviation], consecutive_counts: Dict[int,int], favorite_hits: Dict[int,int], counts: Dict[int,int], monthly: Dict[str, Dict[int, Dict[str,int]]], monthly_quota_dev: List[List], q4_skew: List[Q4SkewRow], rolling_windows: Optional[List[List]] = None, gap_stats: Optional[List[List]] = None, gap_violations: Optional[List[List]] = None, min_gap: int = 0):
 	lines: List[str] = []
 	lines.append('# Validierungsbericht')
 	lines.append('')
@@ -210,193 +680,889 @@ def write_markdown_summary(path: str, total_days: int, violations: List[str], de
 		lines.append(f'{row[0]} | {row[1]} | {row[2]} | {row[3]} | {row[4]:+d}')
 	lines.append('')
 	lines.append('## Q4-Skew (Ende-Jahr-Verteilung)')
-	lines.append('Abteilung | Q4 Ist | Q4 Soll | Diff')
-	lines.append('---|---:|---:|---:')
-	for row in q4_skew:
-		lines.append(f'{row[0]} | {row[1]} | {row[2]} | {row[3]:+d}')
+	if q4_multi_year(q4_skew):
+		lines.append('Jahr | Abteilung | Q4 Ist | Q4 Soll | Diff')
+		lines.append('---|---:|---:|---:|---:')
+		for row in q4_skew:
+			lines.append(f'{row[4]} | {row[0]} | {row[1]} | {row[2]} | {row[3]:+d}')
+	else:
+		lines.append('Abteilung | Q4 Ist | Q4 Soll | Diff')
+		lines.append('---|---:|---:|---:')
+		for row in q4_skew:
+			lines.append(f'{row[0]} | {row[1]} | {row[2]} | {row[3]:+d}')
+	if rolling_windows:
+		lines.append('')
+		lines.append('## Rollierende Fenster (schlechteste Abweichung)')
+		lines.append('Fenster | Abteilung | Max Ist | Max Soll | Max Diff | Von | Bis | Min Ist | Min Soll | Min Diff | Von | Bis')
+		lines.append('---|---:|---:|---:|---:|---|---|---:|---:|---:|---|---')
+		for row in rolling_windows:
+			lines.append(f'{row[0]} | {row[1]} | {row[2]} | {row[3]:.2f} | {row[4]:+.2f} | {row[5]} | {row[6]} | {row[7]} | {row[8]:.2f} | {row[9]:+.2f} | {row[10]} | {row[11]}')
+	if gap_stats:
+		lines.append('')
+		lines.append('## Abstände zwischen Einsätzen (Arbeitstage)')
+		lines.append('Abteilung | Einsätze | Min | Median | Max | Unter Mindestabstand')
+		lines.append('---|---:|---:|---:|---:|---:')
+		for row in gap_stats:
+			lines.append(f'{row[0]} | {row[1]} | {row[2]} | {row[3]} | {row[4]} | {row[5]}')
+		lines.append('')
+		lines.append(f'## Mindestabstand-Verstöße (< {min_gap} Arbeitstage)')
+		if not gap_violations:
+			lines.append('Keine Verstöße gefunden.')
+		else:
+			lines.append('Abteilung | Von | Bis | Abstand')
+			lines.append('---|---|---|---:')
+			for row in gap_violations:
+				lines.append(f'{row[0]} | {row[1]} | {row[2]} | {row[3]}')
 	with open(path, 'w', encoding='utf-8') as f:
 		f.write('\n'.join(lines))
 
 
-def main(plan_csv: str, testdaten_csv: str, out_dir: Optional[str] = None) -> int:
-	holidays = set(berlin_holidays_2026())
-	abteilungen = parse_abteilungen_csv(testdaten_csv)
-	plan = parse_plan_csv(plan_csv)
+Q4_MONTHS = {10, 11, 12}
 
-	# Indexe
-	abt_by_num: Dict[int, Abteilung] = {a.nummer: a for a in abteilungen}
 
-	# 1) Basischecks: Wochenende/Feiertag, Wochentag stimmt
-	violations: List[str] = []
-	parsed_plan: List[Tuple[date, str, int]] = []
-	for row in plan:
-		try:
-			d = parse_date_de(row['Datum'])
-		except Exception:
-			violations.append(f"Ungültiges Datumsformat: {row['Datum']}")
-			continue
-		weekday_name = GERMAN_WEEKDAYS[d.weekday()]
-		if row['Wochentag'] and row['Wochentag'] != weekday_name:
-			violations.append(f"Wochentag stimmt nicht: {row['Datum']} (CSV: {row['Wochentag']}, berechnet: {weekday_name})")
-		if not is_weekday(d):
-			violations.append(f"Wochenend-Zuweisung gefunden: {row['Datum']}")
-		if d in holidays:
-			violations.append(f"Feiertags-Zuweisung gefunden: {row['Datum']}")
-		try:
-			abt = int(row['Abteilungsnummer'])
-		except Exception:
-			violations.append(f"Ungültige Abteilungsnummer in Plan: {row['Abteilungsnummer']}")
-			continue
-		parsed_plan.append((d, weekday_name, abt))
+DEFAULT_MIN_GAP = 2  # 1 = Einsatz am direkt folgenden Arbeitstag (Folgetag)
+
+
+def _median_from_histogram(hist: Dict[int, int]):
+	n = sum(hist.values())
+	lo_pos, hi_pos = (n - 1) // 2, n // 2
+	lo = hi = None
+	seen = 0
+	for gap in sorted(hist):
+		seen += hist[gap]
+		if lo is None and seen > lo_pos:
+			lo = gap
+		if seen > hi_pos:
+			hi = gap
+			break
+	median = (lo + hi) / 2
+	return int(median) if median == int(median) else median
+
+
+def gap_stats_rows(abteilungen: List[Abteilung], counts: Dict[int, int], histogram: Dict[int, Dict[int, int]], violations: List[MinGapViolation]) -> List[GapStatsRow]:
+	"""[Abteilung, Einsätze, Min, Median, Max, Verstöße] je Abteilung (leer, wenn < 2 Einsätze)."""
+	per_dept: Dict[int, int] = {}
+	for v in violations:
+		per_dept[v[0]] = per_dept.get(v[0], 0) + 1
+	rows: List[GapStatsRow] = []
+	for a in abteilungen:
+		hist = histogram.get(a.nummer)
+		if hist:
+			rows.append(GapStatsRow(a.nummer, counts.get(a.nummer, 0), min(hist), _median_from_histogram(hist), max(hist), per_dept.get(a.nummer, 0)))
+		else:
+			rows.append(GapStatsRow(a.nummer, counts.get(a.nummer, 0), '', '', '', 0))
+	return rows
+
+
+DEFAULT_WINDOWS = ('20', '3M')
+ROLLING_WINDOW_HEADER = ['Fenster', 'Abteilung', 'Max_Ist', 'Max_Soll', 'Max_Diff', 'Max_Von', 'Max_Bis', 'Min_Ist', 'Min_Soll', 'Min_Diff', 'Min_Von', 'Min_Bis']
+
+
+def parse_window_spec(spec: str) -> Tuple[str, int]:
+	"""'20' = 20 aufeinanderfolgende Arbeitstage, '3M' = beliebige Spanne von 3 Kalendermonaten."""
+	text = spec.strip().upper()
+	unit = 'months' if text.endswith('M') else 'days'
+	try:
+		n = int(text[:-1] if unit == 'months' else text)
+	except ValueError:
+		raise ValueError(f"Ungültige Fensterangabe: {spec} (erwartet z. B. 20 oder 3M)")
+	if n <= 0:
+		raise ValueError(f"Ungültige Fensterangabe: {spec} (muss > 0 sein)")
+	return unit, n
+
+
+def window_label(spec: str) -> str:
+	unit, n = parse_window_spec(spec)
+	return f"{n} Monate" if unit == 'months' else f"{n} Arbeitstage"
+
+
+def _add_months(d: date, months: int) -> date:
+	y, m = divmod(d.month - 1 + months, 12)
+	year, month = d.year + y, m + 1
+	return date(year, month, min(d.day, monthrange(year, month)[1]))
+
+
+def window_bounds(axis: WorkingDayAxis, spec: str) -> List[Tuple[int, int]]:
+	"""Alle vollständig im Kalender liegenden Fenster als halboffene Indexbereiche [i, j)."""
+	unit, n = parse_window_spec(spec)
+	size = len(axis)
+	if unit == 'days':
+		return [(i, i + n) for i in range(size - n + 1)]
+	bounds: List[Tuple[int, int]] = []
+	limit = date(axis.end_year + 1, 1, 1).toordinal()
+	j = 0
+	for i in range(size):
+		end = _add_months(axis.date(i), n).toordinal()
+		if end > limit:
+			break
+		# Fensterende wächst monoton mit dem Start -> Zwei-Zeiger statt Suche
+		while j < size and axis.ordinals[j] < end:
+			j += 1
+		bounds.append((i, j))
+	return bounds
+
+
+class _WindowSpan:
+	"""Eine Fenstergröße im sortierten Durchlauf (siehe RollingWindowAccumulator)."""
+	__slots__ = ('label', 'unit', 'n', 'known', 'next_end', 'starts')
+
+	def __init__(self, spec: str):
+		self.label = window_label(spec)
+		self.unit, self.n = parse_window_spec(spec)
+		# Monatsfenster: Starts < known haben ihre Breite in starts (Breite -> Starts aufsteigend)
+		self.known = 0
+		self.next_end: Optional[int] = None
+		self.starts: Dict[int, List[int]] = {}
+
+
+class _WindowState:
+	"""Ist und Bestwerte einer Abteilung für eine Fenstergröße."""
+	__slots__ = ('start', 'count', 'pending', 'entered', 'hi', 'lo')
+
+	def __init__(self):
+		self.start = 0  # Beginn des Abschnitts mit gleichbleibendem Ist
+		self.count = 0
+		self.pending: Deque[Tuple[int, int]] = deque()  # (Arbeitstag-Index, erster Fensterstart, der ihn enthält)
+		self.entered = 0  # führende Einsätze in pending, die schon im Ist stecken
+		self.hi: Optional[Tuple[float, int, int, int]] = None  # (Diff, i, j, Ist)
+		self.lo: Optional[Tuple[float, int, int, int]] = None
+
+
+class RollingWindowAccumulator(PlanAccumulator):
+	"""Schlechteste Abweichung je Abteilung über alle gleitenden Fenster (window_bounds).
+
+	Soll eines Fensters [i, j) = (j - i) * Pensum-Anteil, Ist = Einsätze an den Arbeitstagen i..j-1.
+	Das Ist einer Abteilung ändert sich nur, wenn ein Einsatz ins Fenster eintritt oder es verlässt;
+	dazwischen genügt je Fensterbreite der erste Start. Gehalten werden je Abteilung und
+	Fenstergröße nur Ist, Bestwerte und die Einsätze im aktuellen Fenster. Die Achse reicht wie
+	bei window_bounds vom ersten bis zum letzten Planjahr, daher erst in finish() ausgewertet.
+	rows: [Fenster, Abteilung, Max_Ist, Max_Soll, Max_Diff, Max_Von, Max_Bis,
+	Min_Ist, Min_Soll, Min_Diff, Min_Von, Min_Bis], je Fenster sortiert nach größter |Diff|.
+	"""
+	ordered = True
+
+	def __init__(self, abteilungen: List[Abteilung], windows: Iterable[str] = DEFAULT_WINDOWS):
+		self.abteilungen = abteilungen
+		self.windows = list(windows)
+		total_weight = sum(a.pensum for a in abteilungen)
+		self._shares = [a.pensum / total_weight for a in abteilungen] if total_weight > 0 else []
+		self._positions: Dict[int, List[int]] = {}
+		for k, a in enumerate(abteilungen):
+			self._positions.setdefault(a.nummer, []).append(k)
+		self.reset()
+
+	def reset(self) -> None:
+		self.rows: List[RollingWindowRow] = []
+		self._axis: Optional[WorkingDayAxis] = None
+		self._spans: List[_WindowSpan] = []
+		self._states: List[Dict[int, _WindowState]] = []  # je Fenstergröße: Position in abteilungen -> Zustand
+		self._last: Optional[date] = None
+		self._unsorted = False
+
+	def add(self, d, abt_num, abt, is_fav):
+		if self._unsorted:
+			return
+		if self._last is not None and d < self._last:
+			# Erster Durchlauf eines unsortierten Plans; der Validator spielt sortiert neu ein
+			self._unsorted = True
+			return
+		self._last = d
+		axis = self._axis
+		if axis is None:
+			axis = self._axis = WorkingDayAxis(d.year, d.year)
+			self._spans = [_WindowSpan(spec) for spec in self.windows]
+			self._states = [{} for _ in self._spans]
+		elif d.year > axis.end_year:
+			axis = self._axis = WorkingDayAxis(axis.start_year, d.year)
+		positions = self._positions.get(abt_num)
+		if not positions or not self._shares:
+			return
+		h = axis.index(d)
+		if h < 0:
+			return
+		for span, states in zip(self._spans, self._states):
+			if span.unit == 'days':
+				enter = max(0, h - span.n + 1)
+			else:
+				enter = self._month_enter(span, axis.ordinals[h])
+			for k in positions:
+				st = states.get(k)
+				if st is None:
+					st = states[k] = _WindowState()
+				self._advance(span, st, self._shares[k], enter)
+				st.pending.append((h, enter))
+
+	def _month_enter(self, span: _WindowSpan, ordinal: int) -> int:
+		"""Erster Start, dessen Monatsfenster über ordinal hinausreicht (Fensterende wächst monoton)."""
+		axis = self._axis
+		while True:
+			if span.next_end is None:
+				span.next_end = _add_months(axis.date(span.known), span.n).toordinal()
+			if span.next_end > ordinal:
+				return span.known
+			span.starts.setdefault(axis.first_at_or_after(span.next_end) - span.known, []).append(span.known)
+			span.known += 1
+			span.next_end = None
+
+	def _advance(self, span: _WindowSpan, st: _WindowState, share: float, until: int) -> None:
+		"""Ein- und Austritte an Starts < until verbuchen, abgeschlossene Abschnitte bewerten."""
+		pending = st.pending
+		while pending:
+			x = pending[st.entered][1] if st.entered < len(pending) else until
+			if st.entered:
+				x = min(x, pending[0][0] + 1)
+			if x >= until:
+				return
+			if x > st.start:
+				self._close(span, st, share, x)
+			while st.entered < len(pending) and pending[st.entered][1] == x:
+				st.entered += 1
+				st.count += 1
+			while st.entered and pending[0][0] + 1 == x:
+				pending.popleft()
+				st.entered -= 1
+				st.count -= 1
+
+	def _close(self, span: _WindowSpan, st: _WindowState, share: float, end: int) -> None:
+		"""Abschnitt [st.start, end) mit gleichem Ist bewerten; erstes Vorkommen gewinnt wie window_bounds."""
+		ist = st.count
+		if span.unit == 'days':
+			candidates = [(ist - span.n * share, st.start, span.n)]
+		else:
+			candidates = []
+			for width, starts in span.starts.items():
+				p = bisect_left(starts, st.start)
+				if p < len(starts) and starts[p] < end:
+					candidates.append((ist - width * share, starts[p], width))
+		st.start = end
+		for dev, i, width in candidates:
+			if st.hi is None or dev > st.hi[0] or dev == st.hi[0] and i < st.hi[1]:
+				st.hi = (dev, i, i + width, ist)
+			if st.lo is None or dev < st.lo[0] or dev == st.lo[0] and i < st.lo[1]:
+				st.lo = (dev, i, i + width, ist)
+
+	def finish(self) -> None:
+		axis = self._axis
+		if axis is None or not self._shares:
+			return
+		size = len(axis)
+		limit = date(axis.end_year + 1, 1, 1).toordinal()
+		for span, states in zip(self._spans, self._states):
+			if span.unit == 'days':
+				until = max(0, size - span.n + 1)
+			else:
+				# Restliche Starts, deren Fenster noch vollständig im letzten Planjahr endet
+				until = self._month_enter(span, limit)
+			block: List[RollingWindowRow] = []
+			for k, a in enumerate(self.abteilungen):
+				st = states.get(k) or _WindowState()
+				share = self._shares[k]
+				self._advance(span, st, share, until)
+				if until > st.start:
+					self._close(span, st, share, until)
+				if st.hi is None:
+					continue
+				row: List = [span.label, a.nummer]
+				for dev, i, j, ist in (st.hi, st.lo):
+					row += [ist, round((j - i) * share, 2), round(dev, 2), format_date_de(axis.date(i)), format_date_de(axis.date(j - 1))]
+				block.append(RollingWindowRow(*row))
+			block.sort(key=lambda r: max(abs(r[4]), abs(r[9])), reverse=True)
+			self.rows.extend(block)
+		self._states = []
+
+
+class ValidationResult:
+	"""Aggregierte Ergebnisse eines Validierungslaufs (Grundlage für Bericht und Exporte).
+
+	Zeilen sind typisierte NamedTuples; sie bleiben per Index ansprechbar und werden von den
+	CSV-/Markdown-Ausgaben unverändert als Zeilen geschrieben.
+	"""
+	__slots__ = (
+		'abteilungen', 'total_days', 'violations', 'deviations', 'counts', 'favorite_hits',
+		'consecutive_counts', 'monthly', 'monthly_quota_dev_rows', 'q4_skew_rows',
+		'rolling_window_rows', 'min_gap', 'gap_histogram', 'gap_stats_rows', 'min_gap_violations',
+	)
+
+	def __init__(
+		self,
+		abteilungen: List[Abteilung],
+		total_days: int,
+		violations: List[Violation],
+		deviations: List[Deviation],  # sortiert nach |diff|
+		counts: Dict[int, int],
+		favorite_hits: Dict[int, int],
+		consecutive_counts: Dict[int, int],
+		monthly: Dict[str, Dict[int, Dict[str, int]]],
+		monthly_quota_dev_rows: List[MonthlyQuotaRow],
+		q4_skew_rows: List[Q4SkewRow],  # sortiert nach |diff|
+		rolling_window_rows: Optional[List[RollingWindowRow]] = None,
+		min_gap: int = DEFAULT_MIN_GAP,
+		gap_histogram: Optional[Dict[int, Dict[int, int]]] = None,  # Abteilung -> {Abstand: Anzahl}
+		gap_stats_rows: Optional[List[GapStatsRow]] = None,
+		min_gap_violations: Optional[List[MinGapViolation]] = None,  # nach Datum
+	):
+		self.abteilungen = abteilungen
+		self.total_days = total_days
+		self.violations = violations
+		self.deviations = deviations
+		self.counts = counts
+		self.favorite_hits = favorite_hits
+		self.consecutive_counts = consecutive_counts
+		self.monthly = monthly
+		self.monthly_quota_dev_rows = monthly_quota_dev_rows
+		self.q4_skew_rows = q4_skew_rows
+		self.rolling_window_rows = rolling_window_rows if rolling_window_rows is not None else []
+		self.min_gap = min_gap
+		self.gap_histogram = gap_histogram if gap_histogram is not None else {}
+		self.gap_stats_rows = gap_stats_rows if gap_stats_rows is not None else []
+		self.min_gap_violations = min_gap_violations if min_gap_violations is not None else []
+
+	@property
+	def exit_code(self) -> int:
+		"""0 wenn keine harten Regelverstöße, sonst 2 (wie die CLI)."""
+		return 0 if not self.violations else 2
+
+
+def collect_results(plan_csv: str, abteilungen: List[Abteilung], windows: Iterable[str] = DEFAULT_WINDOWS, min_gap: int = DEFAULT_MIN_GAP, holidays: Optional[Container[date]] = None) -> ValidationResult:
+	"""Reines Python-Backend: Streaming-Durchlauf plus Soll/Ist-Auswertungen."""
+	return collect_results_from_rows(lambda: iter_plan_rows(plan_csv), abteilungen, windows, min_gap, holidays)
 
-	parsed_plan.sort(key=lambda x: x[0])
 
-	# 2) Verhinderungen
-	for d, _, abt_num in parsed_plan:
-		a = abt_by_num.get(abt_num)
-		if a and is_verhindert(a, d):
-			violations.append(f"Abteilung {abt_num} verhindert am {format_date_de(d)}")
+def collect_results_from_rows(source: Callable[[], Iterable[Tuple[str, str, str]]], abteilungen: List[Abteilung], windows: Iterable[str] = DEFAULT_WINDOWS, min_gap: int = DEFAULT_MIN_GAP, holidays: Optional[Container[date]] = None, timings: Optional[Dict[str, float]] = None, accumulators: Sequence[PlanAccumulator] = ()) -> ValidationResult:
+	"""Wie collect_results, aber für beliebige Zeilenquellen (z. B. frisch erzeugte Pläne im Speicher).
 
-	# 3) Proportionalität (Largest Remainder Ziel)
-	total_days = len(parsed_plan)
+	timings: falls angegeben, werden die Sekunden je Phase eingetragen (durchlauf inkl. rollierender Fenster, quoten, abstaende).
+	accumulators: zusätzliche Akkumulatoren, die nach den eingebauten im Durchlauf laufen (z. B. thresholds.RuleGuard).
+	"""
+	started = time.perf_counter()
+	# 1)-5) Ein Durchlauf über den Plan: Basischecks, Verhinderungen, Zählungen, Folgetage, Monate, Q4,
+	# rollierende Fenster
+	q4_months = Q4_MONTHS
+	verhinderungen = VerhinderungAccumulator()
+	counter = CountsAccumulator()
+	consecutive = ConsecutiveAccumulator()
+	monthly_acc = MonthlyAccumulator()
+	q4_acc = MonthSetAccumulator(q4_months)
+	window_acc = RollingWindowAccumulator(abteilungen, windows)
+	gaps = GapAccumulator(min_gap)
+	validator = StreamingValidator(abteilungen, [verhinderungen, counter, consecutive, monthly_acc, q4_acc, window_acc, gaps, *accumulators], holidays)
+	validator.run(source)
+	t_pass = time.perf_counter()
+
+	violations: List[Violation] = validator.violations + verhinderungen.violations
+	total_days = validator.total_days
+	counts = counter.counts
+	monthly = monthly_acc.monthly
+
+	# Proportionalität (Largest Remainder Ziel)
 	targets = largest_remainder_targets(abteilungen, total_days)
-	counts: Dict[int, int] = {}
-	favorite_hits: Dict[int, int] = {}
-	for d, weekday_name, abt_num in parsed_plan:
-		counts[abt_num] = counts.get(abt_num, 0) + 1
-		a = abt_by_num.get(abt_num)
-		if a and weekday_name in a.lieblingstage:
-			favorite_hits[abt_num] = favorite_hits.get(abt_num, 0) + 1
-
-	deviations: List[Tuple[int, int, int, int]] = []  # (num, ziel, ist, diff)
+	deviations: List[Deviation] = []
 	for a in abteilungen:
 		ist = counts.get(a.nummer, 0)
 		ziel = targets.get(a.nummer, 0)
-		deviations.append((a.nummer, ziel, ist, ist - ziel))
+		deviations.append(Deviation(a.nummer, ziel, ist, ist - ziel))
 	deviations.sort(key=lambda x: abs(x[3]), reverse=True)
 
-	# 4) Folgetage zählen (über Workingday-Sequenz)
-	consecutive_counts: Dict[int, int] = {}
-	for i in range(1, len(parsed_plan)):
-		prev_d, _, prev_abt = parsed_plan[i - 1]
-		cur_d, _, cur_abt = parsed_plan[i]
-		if cur_abt == prev_abt:
-			# Plan listet nur Arbeitstage; benachbarte Zeilen sind konsekutive Arbeitstage
-			consecutive_counts[cur_abt] = consecutive_counts.get(cur_abt, 0) + 1
-
-	# 5) Monatsweise Auswertung (Ist & Favoriten)
-	monthly: Dict[str, Dict[int, Dict[str, int]]] = {}
-	for d, weekday_name, abt_num in parsed_plan:
-		month_key = f"{d.year}-{d.month:02d}"
-		monthly.setdefault(month_key, {})
-		monthly[month_key].setdefault(abt_num, {"ist": 0, "fav": 0})
-		monthly[month_key][abt_num]["ist"] += 1
-		a = abt_by_num.get(abt_num)
-		if a and weekday_name in a.lieblingstage:
-			monthly[month_key][abt_num]["fav"] += 1
-
-	# 6) Monatsweise Soll/Ist-Quoten (Checker)
-	monthly_days = working_days_by_month_2026()
-	monthly_quota_dev_rows: List[List] = []  # [Monat, Abteilung, Soll, Ist, Diff]
-	for month in range(1, 13):
-		mon_key = f"2026-{month:02d}"
-		days_in_month = len(monthly_days[month])
-		mon_targets = largest_remainder_targets(abteilungen, days_in_month)
+	# 6) Monatsweise Soll/Ist-Quoten (Checker) für jedes Planjahr
+	years = quota_years(int(key[:4]) for key in monthly)
+	monthly_days = {year: working_days_by_month(year) for year in years}
+	monthly_quota_dev_rows: List[MonthlyQuotaRow] = []
+	for year in years:
+		for month in range(1, 13):
+			mon_key = f"{year}-{month:02d}"
+			days_in_month = len(monthly_days[year][month])
+			mon_targets = largest_remainder_targets(abteilungen, days_in_month)
+			for a in abteilungen:
+				ist = monthly.get(mon_key, {}).get(a.nummer, {}).get('ist', 0)
+				soll = mon_targets.get(a.nummer, 0)
+				diff = ist - soll
+				monthly_quota_dev_rows.append(MonthlyQuotaRow(mon_key, a.nummer, soll, ist, diff))
+
+	# 7) Q4-Skew (Ende-Jahr-Verteilung) je Planjahr
+	q4_counts = q4_acc.counts
+	q4_skew_rows: List[Q4SkewRow] = []
+	for year in years:
+		q4_total_days = sum(len(monthly_days[year][m]) for m in q4_months)
+		q4_targets = largest_remainder_targets(abteilungen, q4_total_days)
 		for a in abteilungen:
-			ist = monthly.get(mon_key, {}).get(a.nummer, {}).get('ist', 0)
-			soll = mon_targets.get(a.nummer, 0)
+			ist = q4_counts.get((year, a.nummer), 0)
+			soll = q4_targets.get(a.nummer, 0)
 			diff = ist - soll
-			monthly_quota_dev_rows.append([mon_key, a.nummer, soll, ist, diff])
-
-	# 7) Q4-Skew (Ende-Jahr-Verteilung)
-	q4_months = {10, 11, 12}
-	q4_total_days = sum(len(monthly_days[m]) for m in q4_months)
-	q4_targets = largest_remainder_targets(abteilungen, q4_total_days)
-	q4_counts: Dict[int, int] = {}
-	for d, _, abt_num in parsed_plan:
-		if d.month in q4_months:
-			q4_counts[abt_num] = q4_counts.get(abt_num, 0) + 1
-	q4_skew_rows: List[List] = []  # [Abteilung, Q4 Ist, Q4 Soll, Diff]
-	for a in abteilungen:
-		ist = q4_counts.get(a.nummer, 0)
-		soll = q4_targets.get(a.nummer, 0)
-		diff = ist - soll
-		q4_skew_rows.append([a.nummer, ist, soll, diff])
-	# Sortiere zur besseren Sichtbarkeit nach größter Abweichung
-	q4_skew_rows.sort(key=lambda r: abs(r[3]), reverse=True)
+			q4_skew_rows.append(Q4SkewRow(a.nummer, ist, soll, diff, year))
+	# Sortiere zur besseren Sichtbarkeit nach größter Abweichung (stabil: Jahr, Abteilung)
+	q4_skew_rows.sort(key=lambda r: abs(r.diff), reverse=True)
+	t_quotas = time.perf_counter()
+
+	# 8) Abstände zwischen Einsätzen (Arbeitstag-Indizes) und Mindestabstand
+	gap_rows = gap_stats_rows(abteilungen, counts, gaps.histogram, gaps.violations)
+	if timings is not None:
+		timings.update({
+			'durchlauf': t_pass - started,
+			'quoten': t_quotas - t_pass,
+			'abstaende': time.perf_counter() - t_quotas,
+		})
+
+	return ValidationResult(
+		abteilungen=abteilungen,
+		total_days=total_days,
+		violations=violations,
+		deviations=deviations,
+		counts=counts,
+		favorite_hits=counter.favorite_hits,
+		consecutive_counts=consecutive.consecutive_counts,
+		monthly=monthly,
+		monthly_quota_dev_rows=monthly_quota_dev_rows,
+		q4_skew_rows=q4_skew_rows,
+		rolling_window_rows=window_acc.rows,
+		min_gap=min_gap,
+		gap_histogram=gaps.histogram,
+		gap_stats_rows=gap_rows,
+		min_gap_violations=gaps.violations,
+	)
+
+
+def summary_metrics(result: ValidationResult) -> Dict[str, int]:
+	"""Kennzahlen eines Laufs (Summen der Abweichungen); Grundlage für Scores und Übersichten."""
+	return {
+		'violations': len(result.violations),
+		'abs_diff': sum(abs(r.diff) for r in result.deviations),
+		'monthly_abs_diff': sum(abs(r.diff) for r in result.monthly_quota_dev_rows),
+		'q4_abs_diff': sum(abs(r.diff) for r in result.q4_skew_rows),
+		'folgetage': sum(result.consecutive_counts.values()),
+		'favorite_hits': sum(result.favorite_hits.values()),
+	}
+
+
+BACKENDS = ('python', 'numpy')
+
+PlanInput = Union[str, 'os.PathLike[str]', Callable[[], Iterable[Tuple[str, str, str]]], Sequence[Tuple[str, str, str]]]
+
+
+def _row_source(plan: PlanInput) -> Callable[[], Iterable[Tuple[str, str, str]]]:
+	"""Pfad, Zeilenquelle (Callable) oder Zeilenliste -> wiederholt aufrufbare Zeilenquelle."""
+	if isinstance(plan, (str, os.PathLike)):
+		path = os.fspath(plan)
+		if path.endswith(BINARY_PLAN_SUFFIX):
+			from plan_binary import iter_binary_entries
+			return ParsedPlanRows(lambda: iter_binary_entries(path), presorted=True)
+		return lambda: iter_plan_rows(path)
+	if callable(plan):
+		return plan
+	rows = list(plan)
+	return lambda: iter(rows)
 
-	# Bericht (stdout)
-	print("== Validierungsbericht ==")
-	print(f"Plan-Tage: {total_days}")
-	print(f"Abteilungen: {len(abteilungen)}")
-	print()
+
+def validate(
+	plan: PlanInput,
+	abteilungen: Union[str, List[Abteilung]],
+	calendar: Optional[Container[date]] = None,
+	backend: str = 'python',
+	windows: Iterable[str] = DEFAULT_WINDOWS,
+	min_gap: int = DEFAULT_MIN_GAP,
+	timings: Optional[Dict[str, float]] = None,
+	accumulators: Sequence[PlanAccumulator] = (),
+) -> ValidationResult:
+	"""Validiert einen Plan im Prozess und liefert die strukturierten Ergebnisse (ohne Ausgaben).
+
+	plan: Pfad zur Plan-CSV (oder zum Binärplan .dpb), Liste von (Datum, Wochentag, Abteilung)-Zeilen oder eine Funktion,
+	die bei jedem Aufruf einen frischen Zeilen-Iterator liefert. abteilungen: Liste oder Pfad zur
+	Testdaten.csv. calendar: Feiertagsmenge für `d in calendar` (Default: HolidaySet() für Berlin).
+	Wirft ImportError, wenn backend='numpy' gewählt ist und numpy fehlt. timings: optionales Dict
+	für Sekunden je Phase (Python-Backend je Phase, NumPy-Backend gesamt als 'numpy').
+	accumulators: zusätzliche Akkumulatoren für den Streaming-Durchlauf (nur Python-Backend).
+	"""
+	if backend not in BACKENDS:
+		raise ValueError(f"Unbekanntes Backend: {backend} (verfügbar: {', '.join(BACKENDS)})")
+	if isinstance(abteilungen, (str, os.PathLike)):
+		abteilungen = parse_abteilungen_csv(os.fspath(abteilungen))
+	source = _row_source(plan)
+	if backend == 'numpy':
+		from validate_numpy import collect_results_numpy
+		started = time.perf_counter()
+		result = collect_results_numpy(source, abteilungen, windows, min_gap, calendar)
+		if timings is not None:
+			timings['numpy'] = time.perf_counter() - started
+		return result
+	return collect_results_from_rows(source, abteilungen, windows, min_gap, calendar, timings, accumulators)
+
+
+def print_report(result: ValidationResult, out: Optional[TextIO] = None, show_windows: bool = False, show_gaps: bool = False) -> None:
+	"""Konsolen-Sink: Validierungsbericht als Text (Default: stdout).
+
+	Rollierende Fenster und Abstände stehen immer in CSV und Markdown; auf der Konsole nur mit
+	show_windows/show_gaps (CLI: --windows bzw. --min-gap ausdrücklich angegeben).
+	"""
+	out = out or sys.stdout
+	abteilungen = result.abteilungen
+	violations = result.violations
+	counts = result.counts
+	favorite_hits = result.favorite_hits
+	consecutive_counts = result.consecutive_counts
+	gap_rows = result.gap_stats_rows
+	gap_violations = result.min_gap_violations
+
+	print("== Validierungsbericht ==", file=out)
+	print(f"Plan-Tage: {result.total_days}", file=out)
+	print(f"Abteilungen: {len(abteilungen)}", file=out)
+	print(file=out)
 
 	if violations:
-		print("Regelverstöße:")
+		print("Regelverstöße:", file=out)
 		for v in violations:
-			print(f"- {v}")
+			print(f"- {v}", file=out)
 	else:
-		print("Keine harten Regelverstöße (Wochenende/Feiertag/Verhinderung/Wochentag) gefunden.")
-	print()
+		print("Keine harten Regelverstöße (Wochenende/Feiertag/Verhinderung/Wochentag) gefunden.", file=out)
+	print(file=out)
 
-	print("Proportionalität (Ziel vs. Ist, diff=Ist-Ziel):")
-	for num, ziel, ist, diff in deviations:
-		print(f"- Abt {num}: Ziel {ziel}, Ist {ist}, Diff {diff:+d}")
-	print()
+	print("Proportionalität (Ziel vs. Ist, diff=Ist-Ziel):", file=out)
+	for num, ziel, ist, diff in result.deviations:
+		print(f"- Abt {num}: Ziel {ziel}, Ist {ist}, Diff {diff:+d}", file=out)
+	print(file=out)
 
-	print("Folgetage je Abteilung (Anzahl benachbarter Zuweisungen):")
+	print("Folgetage je Abteilung (Anzahl benachbarter Zuweisungen):", file=out)
 	for a in abteilungen:
-		print(f"- Abt {a.nummer}: {consecutive_counts.get(a.nummer, 0)}")
-	print()
+		print(f"- Abt {a.nummer}: {consecutive_counts.get(a.nummer, 0)}", file=out)
+	print(file=out)
 
-	print("Lieblingstage-Treffer:")
+	print("Lieblingstage-Treffer:", file=out)
 	for a in abteilungen:
-		print(f"- Abt {a.nummer}: {favorite_hits.get(a.nummer, 0)}/{counts.get(a.nummer, 0)}")
-	print()
+		print(f"- Abt {a.nummer}: {favorite_hits.get(a.nummer, 0)}/{counts.get(a.nummer, 0)}", file=out)
+	print(file=out)
+
+	print("Monatliche Soll/Ist-Abweichungen (Top 10 nach |Diff|):", file=out)
+	for row in sorted(result.monthly_quota_dev_rows, key=lambda r: abs(r.diff), reverse=True)[:10]:
+		print(f"- {row.monat} Abt {row.abteilung}: Soll {row.soll}, Ist {row.ist}, Diff {row.diff:+d}", file=out)
+	print(file=out)
 
-	print("Monatliche Soll/Ist-Abweichungen (Top 10 nach |Diff|):")
-	for row in sorted(monthly_quota_dev_rows, key=lambda r: abs(r[4]), reverse=True)[:10]:
-		print(f"- {row[0]} Abt {row[1]}: Soll {row[2]}, Ist {row[3]}, Diff {row[4]:+d}")
-	print()
+	print("Q4-Skew (Top 10 nach |Diff|):", file=out)
+	year = q4_multi_year(result.q4_skew_rows)
+	for row in result.q4_skew_rows[:10]:
+		print(f"- {f'{row.jahr} ' if year else ''}Abt {row.abteilung}: Q4 Soll {row.soll}, Ist {row.ist}, Diff {row.diff:+d}", file=out)
+
+	if show_windows and result.rolling_window_rows:
+		print(file=out)
+		print("Rollierende Fenster (schlechteste Abweichung, Top 10 nach |Diff|):", file=out)
+		for row in sorted(result.rolling_window_rows, key=lambda r: max(abs(r.max_diff), abs(r.min_diff)), reverse=True)[:10]:
+			if abs(row.max_diff) >= abs(row.min_diff):
+				dev, ist, soll, von, bis = row.max_diff, row.max_ist, row.max_soll, row.max_von, row.max_bis
+			else:
+				dev, ist, soll, von, bis = row.min_diff, row.min_ist, row.min_soll, row.min_von, row.min_bis
+			print(f"- {row.fenster} Abt {row.abteilung}: {von}–{bis} Soll {soll:.2f}, Ist {ist}, Diff {dev:+.2f}", file=out)
+
+	if show_gaps and any(row.min != '' for row in gap_rows):
+		print(file=out)
+		print("Abstände zwischen Einsätzen (Arbeitstage, min/Median/max):", file=out)
+		for row in gap_rows:
+			if row.min != '':
+				print(f"- Abt {row.abteilung}: {row.min}/{row.median}/{row.max}, unter Mindestabstand: {row.verstoesse}", file=out)
+		print(f"Mindestabstand {result.min_gap} Arbeitstage: {len(gap_violations)} Verstöße" + (" (erste 10):" if gap_violations else ""), file=out)
+		for v in gap_violations[:10]:
+			print(f"- Abt {v.abteilung}: {v.von} → {v.bis} (Abstand {v.abstand})", file=out)
+
+
+def write_csv_reports(result: ValidationResult, out_dir: str) -> None:
+	"""CSV-Sink: alle validation_*.csv-Exporte nach out_dir."""
+	abteilungen = result.abteilungen
+	counts = result.counts
+	os.makedirs(out_dir, exist_ok=True)
+	# Proportionalität CSV
+	write_csv(os.path.join(out_dir, 'validation_proportionality.csv'), ['Abteilung', 'Ziel', 'Ist', 'Diff'], result.deviations)
+	# Folgetage CSV
+	write_csv(os.path.join(out_dir, 'validation_consecutive.csv'), ['Abteilung', 'Folgetage'], [[a.nummer, result.consecutive_counts.get(a.nummer, 0)] for a in abteilungen])
+	# Favoriten CSV
+	write_csv(os.path.join(out_dir, 'validation_favorites.csv'), ['Abteilung', 'Treffer', 'Gesamt'], [[a.nummer, result.favorite_hits.get(a.nummer, 0), counts.get(a.nummer, 0)] for a in abteilungen])
+	# Monatsweise CSV (Ist & Favoriten)
+	monthly = result.monthly
+	monthly_rows: List[List] = []
+	for month in sorted(monthly.keys()):
+		for num in sorted(monthly[month].keys()):
+			m = monthly[month][num]
+			monthly_rows.append([month, num, m.get('ist', 0), m.get('fav', 0)])
+	write_csv(os.path.join(out_dir, 'validation_monthly_summary.csv'), ['Monat', 'Abteilung', 'Ist', 'Favoriten'], monthly_rows)
+	# Monatsweise Soll/Ist-Quoten CSV
+	write_csv(os.path.join(out_dir, 'validation_monthly_quota_deviation.csv'), ['Monat', 'Abteilung', 'Soll', 'Ist', 'Diff'], result.monthly_quota_dev_rows)
+	# Q4-Skew CSV
+	write_csv(os.path.join(out_dir, 'validation_q4_skew.csv'), *q4_table(result.q4_skew_rows))
+	# Rollierende Fenster CSV
+	write_csv(os.path.join(out_dir, 'validation_rolling_windows.csv'), ROLLING_WINDOW_HEADER, result.rolling_window_rows)
+	# Abstände CSV (Kennzahlen, Histogramm, Mindestabstand-Verstöße)
+	write_csv(os.path.join(out_dir, 'validation_gaps.csv'), ['Abteilung', 'Einsaetze', 'Min', 'Median', 'Max', 'Verstoesse'], result.gap_stats_rows)
+	write_csv(os.path.join(out_dir, 'validation_gap_histogram.csv'), ['Abteilung', 'Abstand', 'Anzahl'], [[num, gap, n] for num in sorted(result.gap_histogram) for gap, n in sorted(result.gap_histogram[num].items())])
+	write_csv(os.path.join(out_dir, 'validation_min_gap_violations.csv'), ['Abteilung', 'Von', 'Bis', 'Abstand'], result.min_gap_violations)
 
-	print("Q4-Skew (Top 10 nach |Diff|):")
-	for row in q4_skew_rows[:10]:
-		print(f"- Abt {row[0]}: Q4 Soll {row[2]}, Ist {row[1]}, Diff {row[3]:+d}")
+
+def write_markdown_report(result: ValidationResult, out_dir: str) -> None:
+	"""Markdown-Sink: validation_summary.md nach out_dir."""
+	os.makedirs(out_dir, exist_ok=True)
+	write_markdown_summary(
+		os.path.join(out_dir, 'validation_summary.md'), result.total_days, result.violations, result.deviations,
+		result.consecutive_counts, result.favorite_hits, result.counts, result.monthly, result.monthly_quota_dev_rows,
+		result.q4_skew_rows, result.rolling_window_rows, result.gap_stats_rows, result.min_gap_violations, result.min_gap,
+	)
+
+
+def result_as_dict(result: ValidationResult) -> Dict:
+	"""JSON-Sink: Ergebnis als JSON-serialisierbares Dict (Zeilen mit den Feldnamen der Zeilentypen)."""
+	def by_num(d: Dict[int, int]) -> Dict[str, int]:
+		return {str(k): v for k, v in sorted(d.items())}
+
+	return {
+		'exit_code': result.exit_code,
+		'total_days': result.total_days,
+		'summary': summary_metrics(result),
+		'violations': [v._asdict() for v in result.violations],
+		'deviations': [r._asdict() for r in result.deviations],
+		'counts': by_num(result.counts),
+		'favorite_hits': by_num(result.favorite_hits),
+		'consecutive_counts': by_num(result.consecutive_counts),
+		'monthly_quota': [r._asdict() for r in result.monthly_quota_dev_rows],
+		'q4_skew': [r._asdict() for r in result.q4_skew_rows],
+		'rolling_windows': [r._asdict() for r in result.rolling_window_rows],
+		'min_gap': result.min_gap,
+		'gap_stats': [r._asdict() for r in result.gap_stats_rows],
+		'min_gap_violations': [r._asdict() for r in result.min_gap_violations],
+	}
+
+
+def result_delta(old: ValidationResult, new: ValidationResult, limit: int = 20) -> List[str]:
+	"""Kurzfassung der Änderungen zwischen zwei Läufen: neue/behobene Verstöße, geänderte Abweichungen."""
+	lines: List[str] = []
+	if old.total_days != new.total_days:
+		lines.append(f"Plan-Tage: {old.total_days} -> {new.total_days}")
+	old_v = Counter(v.message for v in old.violations)
+	new_v = Counter(v.message for v in new.violations)
+	added = list((new_v - old_v).elements())
+	resolved = list((old_v - new_v).elements())
+	for msg in added[:limit]:
+		lines.append(f"+ neu: {msg}")
+	for msg in resolved[:limit]:
+		lines.append(f"- behoben: {msg}")
+	if len(added) > limit or len(resolved) > limit:
+		lines.append(f"  ({len(added)} neue, {len(resolved)} behobene Verstöße insgesamt)")
+	old_dev = {d.abteilung: d for d in old.deviations}
+	new_dev = {d.abteilung: d for d in new.deviations}
+	for num in sorted(set(old_dev) | set(new_dev)):
+		a, b = old_dev.get(num), new_dev.get(num)
+		if a == b:
+			continue
+		if a is None or b is None:
+			lines.append(f"~ Abt {num}: {'neu' if a is None else 'entfernt'}")
+		else:
+			lines.append(f"~ Abt {num}: Ziel {a.ziel} -> {b.ziel}, Ist {a.ist} -> {b.ist}, Diff {a.diff:+d} -> {b.diff:+d}")
+	old_m, new_m = summary_metrics(old), summary_metrics(new)
+	changed = [f"{k} {old_m[k]} -> {new_m[k]}" for k in old_m if k not in ('violations', 'abs_diff') and old_m[k] != new_m[k]]
+	if len(old.min_gap_violations) != len(new.min_gap_violations):
+		changed.append(f"Mindestabstand-Verstöße {len(old.min_gap_violations)} -> {len(new.min_gap_violations)}")
+	if changed:
+		lines.append('Kennzahlen: ' + ', '.join(changed))
+	return lines
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+	try:
+		st = os.stat(path)
+	except OSError:
+		return None  # z. B. während ein Editor die Datei ersetzt
+	return st.st_mtime_ns, st.st_size
+
+
+def _file_content(path: str) -> bytes:
+	with open(path, 'rb') as f:
+		return f.read()
+
+
+def watch(plan_csv: str, testdaten_csv: str, out_dir: Optional[str] = None, backend: str = 'python', windows: Iterable[str] = DEFAULT_WINDOWS, min_gap: int = DEFAULT_MIN_GAP, interval: float = 0.5, debounce: float = 0.3, show_windows: bool = False, show_gaps: bool = False) -> int:
+	"""Überwacht Plan und Testdaten per mtime-Polling und validiert bei Änderungen neu.
+
+	Abteilungen (und damit die Verfügbarkeiten) sowie die Planzeilen bleiben im Speicher; nach
+	einer Änderung wird nur die geänderte Datei neu eingelesen, die Testdaten nur bei geändertem
+	Inhalt, der Kalender ist ohnehin memoisiert. Validiert wird danach jedes Mal vollständig
+	(validate() über alle Zeilen, keine inkrementelle Neuberechnung einzelner Auswertungen);
+	ausgegeben wird nach dem ersten Bericht nur die Differenz zum vorherigen Lauf. Fehlerhafte Eingaben werden
+	gemeldet, die Überwachung läuft mit dem letzten gültigen Stand weiter. Beenden mit Strg+C;
+	Rückgabe ist der letzte Exit-Code.
+	show_windows/show_gaps wie bei print_report.
+	"""
+	windows = list(windows)
+	signatures = {path: _file_signature(path) for path in (plan_csv, testdaten_csv)}
+	try:
+		testdaten = _file_content(testdaten_csv)
+		abteilungen = parse_abteilungen_csv(testdaten_csv)
+		rows = list(iter_plan_rows(plan_csv))
+		result = validate(rows, abteilungen, backend=backend, windows=windows, min_gap=min_gap)
+	except ImportError as e:
+		print(f"NumPy-Backend nicht verfügbar ({e}); bitte 'pip install numpy' ausführen.", file=sys.stderr)
+		return 1
+	except (OSError, ValueError) as e:
+		print(f"Fehler in den Eingaben: {e}", file=sys.stderr)
+		return 1
+	print_report(result, show_windows=show_windows, show_gaps=show_gaps)
+	if out_dir:
+		write_csv_reports(result, out_dir)
+		write_markdown_report(result, out_dir)
+	print(f"\n[watch] Überwache {plan_csv} und {testdaten_csv} (alle {interval:g} s, Strg+C beendet)", flush=True)
+	try:
+		while True:
+			time.sleep(interval)
+			changed = [path for path, sig in signatures.items() if _file_signature(path) != sig]
+			if not changed:
+				continue
+			# Entprellen: erst auswerten, wenn sich die Dateien debounce Sekunden nicht mehr ändern
+			current = {path: _file_signature(path) for path in changed}
+			while True:
+				time.sleep(debounce)
+				latest = {path: _file_signature(path) for path in changed}
+				if latest == current:
+					break
+				current = latest
+			if any(sig is None for sig in current.values()):
+				continue
+			signatures.update(current)
+			started = time.perf_counter()
+			names = ', '.join(os.path.basename(path) for path in changed)
+			try:
+				# Geparste Testdaten weiterverwenden, solange sich ihr Inhalt nicht ändert
+				new_testdaten, new_abteilungen = testdaten, abteilungen
+				if testdaten_csv in changed:
+					new_testdaten = _file_content(testdaten_csv)
+					if new_testdaten != testdaten:
+						new_abteilungen = parse_abteilungen_csv(testdaten_csv)
+				new_rows = list(iter_plan_rows(plan_csv)) if plan_csv in changed else rows
+				if new_rows == rows and new_abteilungen is abteilungen:
+					print(f"[watch] {time.strftime('%H:%M:%S')} {names}: keine inhaltliche Änderung", flush=True)
+					continue
+				new_result = validate(new_rows, new_abteilungen, backend=backend, windows=windows, min_gap=min_gap)
+			except (OSError, ValueError, csv.Error) as e:
+				print(f"[watch] {time.strftime('%H:%M:%S')} Eingabe fehlerhaft ({e}); warte auf die nächste Änderung", flush=True)
+				continue
+			testdaten, abteilungen, rows = new_testdaten, new_abteilungen, new_rows
+			elapsed_ms = (time.perf_counter() - started) * 1000
+			print(f"\n[watch] {time.strftime('%H:%M:%S')} {names} geändert, neu validiert in {elapsed_ms:.0f} ms", flush=True)
+			delta = result_delta(result, new_result)
+			for line in delta or ['keine Änderungen an Verstößen oder Abweichungen']:
+				print(line)
+			print(f"Verstöße: {len(new_result.violations)}, Exit-Code: {new_result.exit_code}", flush=True)
+			result = new_result
+			if out_dir:
+				write_csv_reports(result, out_dir)
+				write_markdown_report(result, out_dir)
+	except KeyboardInterrupt:
+		print('\n[watch] beendet')
+	return result.exit_code
+
+
+def main(plan_csv: str, testdaten_csv: str, out_dir: Optional[str] = None, backend: str = 'python', windows: Iterable[str] = DEFAULT_WINDOWS, min_gap: int = DEFAULT_MIN_GAP, recorder: Optional[profiling.PhaseRecorder] = None, cprofile: Optional[str] = None, strict: bool = False, rules: Optional[str] = None, fail_fast: bool = False, show_windows: bool = False, show_gaps: bool = False) -> int:
+	"""CLI-Lauf: Validierung, Bericht und Exporte; recorder erhält die Phasenzeiten, cprofile den Dump der Validierung.
+
+	strict: Eingaben vorab streng prüfen; bei Eingabefehlern werden alle mit Datei:Zeile auf
+	stderr ausgegeben und der Lauf endet mit 1, ohne zu validieren.
+	rules: Regeldatei (siehe thresholds.py); der Exit-Code ist dann der der ersten verletzten
+	blockierenden Regel. fail_fast: Durchlauf abbrechen, sobald die erste blockierende Regel sicher
+	verletzt ist; der Exit-Code ist derselbe wie ohne fail_fast (ohne Bericht und Exporte; nur
+	Python-Backend). show_windows/show_gaps: Abschnitte im Konsolenbericht (siehe print_report).
+	"""
+	from input_parser import InputError, check_inputs
+	rec = recorder or profiling.PhaseRecorder()
+	rule_set = None
+	if rules:
+		import thresholds
+		try:
+			rule_set = thresholds.load_rules(rules)
+		except (OSError, ValueError) as e:
+			print(f"Fehler in den Regeln: {e}", file=sys.stderr)
+			return 1
+	guards = [rule_set.guard()] if rule_set and fail_fast and backend == 'python' else []
+	breach = (thresholds.RuleBreach,) if guards else ()
+	if rule_set and fail_fast and not guards:
+		print("Hinweis: --fail-fast wirkt nur mit dem Python-Backend; Regeln werden am Ende bewertet.", file=sys.stderr)
+	elif guards and rule_set.fail_fast_rule() is None:
+		print("Hinweis: --fail-fast greift nur, wenn die erste blockierende Regel im Durchlauf prüfbar ist (siehe thresholds.py); Regeln werden am Ende bewertet.", file=sys.stderr)
+	if strict:
+		with rec.phase('eingabepruefung') as phase:
+			# Binärpläne sind beim Schreiben bereits geprüft
+			issues = check_inputs(None if plan_csv.endswith(BINARY_PLAN_SUFFIX) else plan_csv, testdaten_csv)
+			phase.rows = len(issues)
+		if issues:
+			for issue in issues:
+				print(issue, file=sys.stderr)
+			print(f"{len(issues)} Eingabefehler; Validierung abgebrochen.", file=sys.stderr)
+			return 1
+	with rec.phase('einlesen_testdaten') as phase:
+		try:
+			abteilungen = parse_abteilungen_csv(testdaten_csv)
+		except InputError as e:
+			print(f"Fehler in den Testdaten: {e}", file=sys.stderr)
+			return 1
+		phase.rows = len(abteilungen)
+	timings: Dict[str, float] = {}
+	try:
+		with rec.phase('validierung') as phase:
+			result = profiling.run_profiled(cprofile, validate, plan_csv, abteilungen, backend=backend, windows=windows, min_gap=min_gap, timings=timings, accumulators=guards)
+			phase.rows = result.total_days
+	except ImportError as e:
+		print(f"NumPy-Backend nicht verfügbar ({e}); bitte 'pip install numpy' ausführen.", file=sys.stderr)
+		return 1
+	except breach as e:
+		print(f"Fail-Fast: {e}; Prüfung abgebrochen.")
+		return e.rule.exit_code
+	for name, seconds in timings.items():
+		rec.add(f'validierung.{name}', seconds)
+
+	# Bericht (stdout)
+	with rec.phase('bericht_konsole', rows=len(result.violations)):
+		print_report(result, show_windows=show_windows, show_gaps=show_gaps)
 
 	# Exporte
 	if out_dir:
-		os.makedirs(out_dir, exist_ok=True)
-		# Proportionalität CSV
-		write_csv(os.path.join(out_dir, 'validation_proportionality.csv'), ['Abteilung', 'Ziel', 'Ist', 'Diff'], [[n, z, i, d] for (n, z, i, d) in deviations])
-		# Folgetage CSV
-		write_csv(os.path.join(out_dir, 'validation_consecutive.csv'), ['Abteilung', 'Folgetage'], [[a.nummer, consecutive_counts.get(a.nummer, 0)] for a in abteilungen])
-		# Favoriten CSV
-		write_csv(os.path.join(out_dir, 'validation_favorites.csv'), ['Abteilung', 'Treffer', 'Gesamt'], [[a.nummer, favorite_hits.get(a.nummer, 0), counts.get(a.nummer, 0)] for a in abteilungen])
-		# Monatsweise CSV (Ist & Favoriten)
-		monthly_rows: List[List] = []
-		for month in sorted(monthly.keys()):
-			for num in sorted(monthly[month].keys()):
-				m = monthly[month][num]
-				monthly_rows.append([month, num, m.get('ist', 0), m.get('fav', 0)])
-		write_csv(os.path.join(out_dir, 'validation_monthly_summary.csv'), ['Monat', 'Abteilung', 'Ist', 'Favoriten'], monthly_rows)
-		# Monatsweise Soll/Ist-Quoten CSV
-		write_csv(os.path.join(out_dir, 'validation_monthly_quota_deviation.csv'), ['Monat', 'Abteilung', 'Soll', 'Ist', 'Diff'], monthly_quota_dev_rows)
-		# Q4-Skew CSV
-		write_csv(os.path.join(out_dir, 'validation_q4_skew.csv'), ['Abteilung', 'Q4_Ist', 'Q4_Soll', 'Diff'], q4_skew_rows)
-		# Markdown Summary
-		write_markdown_summary(os.path.join(out_dir, 'validation_summary.md'), total_days, violations, deviations, consecutive_counts, favorite_hits, counts, monthly, monthly_quota_dev_rows, q4_skew_rows)
-
-	# Rückgabecode: 0 wenn keine harten Regelverstöße
-	return 0 if not violations else 2
+		with rec.phase('export_csv'):
+			write_csv_reports(result, out_dir)
+		with rec.phase('export_markdown'):
+			write_markdown_report(result, out_dir)
+		with rec.phase('export_xlsx'):
+			from xlsx_export import write_xlsx_report
+			write_xlsx_report(result, out_dir, plan_csv)
+
+	# Rückgabecode: 0 wenn keine harten Regelverstöße; Regeldatei: Code der ersten verletzten Regel
+	if rule_set is None:
+		return result.exit_code
+	with rec.phase('schwellwerte', rows=len(rule_set.rules)):
+		outcomes = rule_set.evaluate(result)
+	thresholds.print_outcomes(outcomes)
+	return thresholds.exit_code(outcomes, result.exit_code)
 
 
 if __name__ == "__main__":
 	# CLI
 	parser = argparse.ArgumentParser(description='Validiere Dienstplan-CSV gegen Regeln')
-	parser.add_argument('plan_csv', help='Pfad zur Plan-CSV (Jahresdienstplan_2026.csv)')
+	parser.add_argument('plan_csv', help='Pfad zur Plan-CSV (Jahresdienstplan_2026.csv) oder zum Binärplan (.dpb)')
 	parser.add_argument('testdaten_csv', help='Pfad zu Testdaten.csv')
-	parser.add_argument('--out-dir', help='Ordner für CSV/Markdown-Exporte', default=None)
+	parser.add_argument('--out-dir', help='Ordner für CSV/Markdown/XLSX-Exporte', default=None)
+	parser.add_argument('--backend', choices=BACKENDS, default='python', help='Berechnungs-Backend (numpy: vektorisiert, benötigt numpy)')
+	parser.add_argument('--windows', default=None, help=f"Rollierende Fenster, kommagetrennt: Arbeitstage (20) oder Monate (3M); Default {','.join(DEFAULT_WINDOWS)}, angegeben auch im Konsolenbericht")
+	parser.add_argument('--min-gap', type=int, default=None, help=f'Mindestabstand zwischen zwei Einsätzen einer Abteilung in Arbeitstagen; Default {DEFAULT_MIN_GAP}, angegeben auch im Konsolenbericht')
+	parser.add_argument('--watch', action='store_true', help='Eingabedateien überwachen und bei Änderungen neu validieren (nur Änderungen ausgeben)')
+	parser.add_argument('--interval', type=float, default=0.5, help='Abfrageintervall im Watch-Modus in Sekunden')
+	parser.add_argument('--strict', action='store_true', help='Eingaben vorab streng prüfen und alle Fehler mit Datei:Zeile melden (Exit-Code 1)')
+	parser.add_argument('--rules', default=None, help='Schwellwert-Regeln (JSON, z. B. thresholds.json); Exit-Code der ersten verletzten Regel')
+	parser.add_argument('--fail-fast', action='store_true', help='Mit --rules: abbrechen, sobald die erste blockierende Regel sicher verletzt ist (nur Python-Backend)')
+	profiling.add_arguments(parser)
 	args = parser.parse_args()
-	sys.exit(main(args.plan_csv, args.testdaten_csv, args.out_dir))
+	# Fenster und Abstände stehen immer in den Exporten, auf der Konsole nur auf ausdrücklichen Wunsch
+	show = {'show_windows': args.windows is not None, 'show_gaps': args.min_gap is not None}
+	windows = [w for w in args.windows.split(',') if w.strip()] if args.windows is not None else list(DEFAULT_WINDOWS)
+	min_gap = DEFAULT_MIN_GAP if args.min_gap is None else args.min_gap
+	try:
+		for w in windows:
+			parse_window_spec(w)
+	except ValueError as e:
+		parser.error(str(e))
+	if args.fail_fast and not args.rules:
+		parser.error('--fail-fast benötigt --rules')
+	if args.watch:
+		sys.exit(watch(args.plan_csv, args.testdaten_csv, args.out_dir, args.backend, windows, min_gap, args.interval, **show))
+	recorder = profiling.recorder_from_args(args)
+	code = main(args.plan_csv, args.testdaten_csv, args.out_dir, args.backend, windows, min_gap, recorder, args.cprofile, args.strict, args.rules, args.fail_fast, **show)
+	profiling.report(recorder, args, 'validate_plan', plan=args.plan_csv, testdaten=args.testdaten_csv, backend=args.backend, exit_code=code)
+	sys.exit(code)
 
 
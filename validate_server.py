@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Lokaler HTTP-Validierungsdienst (asyncio, nur Standardbibliothek) für die Web-App.
+
+Endpunkte:
+- POST /validate: Plan + Testdaten als JSON ({"plan": ..., "testdaten": ...}) oder als
+  multipart/form-data-Upload (Felder plan, testdaten; CSV oder JSON). Plan: CSV-Text oder Liste
+  von Zeilen ([Datum, Wochentag, Abteilung] bzw. Objekte mit Datum/Wochentag/Abteilungsnummer).
+  Testdaten: CSV-Text oder Liste von Objekten (Abteilung, Jahrespensen, Lieblingstage,
+  Verhinderungen). Optional: windows, min_gap, backend. Antwort: validate_plan.result_as_dict.
+- GET /metrics: Anfragen, Fehler und Latenzen (Mittel, p50, p95, max) je Endpunkt.
+- GET /health
+
+Die Validierung läuft in einem Prozesspool, der Event-Loop blockiert also nicht. Jeder Worker
+hält geparste Abteilungen (Schlüssel: Hash der Testdaten) und Kalender zwischen Anfragen im
+Speicher. Der Dienst bindet per Default nur an 127.0.0.1 und braucht kein Netz.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from email.parser import BytesParser
+from email.policy import HTTP
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from calendar_service import get_calendar
+from validate_plan import (
+	BACKENDS,
+	DEFAULT_MIN_GAP,
+	DEFAULT_WINDOWS,
+	Abteilung,
+	iter_plan_lines,
+	parse_abteilungen_lines,
+	parse_window_spec,
+	result_as_dict,
+	validate,
+)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 20 * 1024 * 1024
+ABTEILUNGEN_CACHE_SIZE = 32
+LATENCY_SAMPLES = 1000
+
+STATUS_TEXT = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+	def __init__(self, status: int, message: str):
+		super().__init__(message)
+		self.status = status
+
+
+# --- Worker (läuft im Prozesspool) ------------------------------------------------------
+
+_abteilungen_cache: 'OrderedDict[str, List[Abteilung]]' = OrderedDict()
+
+
+def _init_worker(years: List[int]) -> None:
+	for year in years:
+		get_calendar(year)
+
+
+def _cached_abteilungen(lines: List[str]) -> Tuple[List[Abteilung], bool]:
+	key = hashlib.sha256('\n'.join(lines).encode('utf-8')).hexdigest()
+	abteilungen = _abteilungen_cache.get(key)
+	if abteilungen is not None:
+		_abteilungen_cache.move_to_end(key)
+		return abteilungen, True
+	abteilungen = parse_abteilungen_lines(lines)
+	_abteilungen_cache[key] = abteilungen
+	if len(_abteilungen_cache) > ABTEILUNGEN_CACHE_SIZE:
+		_abteilungen_cache.popitem(last=False)
+	return abteilungen, False
+
+
+def run_validation(plan_rows: List[Tuple[str, str, str]], testdaten_lines: List[str], windows: List[str], min_gap: int, backend: str) -> Dict[str, Any]:
+	abteilungen, hit = _cached_abteilungen(testdaten_lines)
+	started = time.perf_counter()
+	result = validate(plan_rows, abteilungen, backend=backend, windows=windows, min_gap=min_gap)
+	payload = result_as_dict(result)
+	payload['meta'] = {'testdaten_cache': 'hit' if hit else 'miss', 'validate_ms': round((time.perf_counter() - started) * 1000, 2), 'worker_pid': os.getpid()}
+	return payload
+
+
+# --- Eingaben normalisieren -------------------------------------------------------------
+
+def _plan_rows(value: Any) -> List[Tuple[str, str, str]]:
+	if isinstance(value, str):
+		return list(iter_plan_lines(value.splitlines()))
+	if not isinstance(value, list):
+		raise RequestError(400, 'plan: CSV-Text oder Liste von Zeilen erwartet')
+	rows = []
+	for item in value:
+		if isinstance(item, dict):
+			rows.append((str(item.get('Datum', item.get('datum', ''))).strip(), str(item.get('Wochentag', item.get('wochentag', ''))).strip(),
+				str(item.get('Abteilungsnummer', item.get('abteilung', ''))).strip()))
+		elif isinstance(item, (list, tuple)) and len(item) == 3:
+			rows.append(tuple(str(x).strip() for x in item))
+		else:
+			raise RequestError(400, f'plan: ungültige Zeile {item!r}')
+	return rows
+
+
+def _testdaten_lines(value: Any) -> List[str]:
+	if isinstance(value, str):
+		return value.splitlines()
+	if not isinstance(value, list):
+		raise RequestError(400, 'testdaten: CSV-Text oder Liste von Abteilungen erwartet')
+	lines = []
+	for item in value:
+		if not isinstance(item, dict):
+			raise RequestError(400, f'testdaten: ungültiger Eintrag {item!r}')
+		fields = []
+		for key, alt in (('Abteilung', 'nummer'), ('Jahrespensen', 'pensum'), ('Lieblingstage', 'lieblingstage'), ('Verhinderungen', 'verhinderungen')):
+			v = item.get(key, item.get(alt, ''))
+			fields.append(', '.join(str(x) for x in v) if isinstance(v, list) else str(v))
+		lines.append(';'.join(fields))
+	return lines
+
+
+def _decode_upload(data: bytes, filename: Optional[str], content_type: str) -> Any:
+	text = data.decode('utf-8-sig')
+	if content_type == 'application/json' or (filename or '').lower().endswith('.json'):
+		try:
+			return json.loads(text)
+		except ValueError as e:
+			raise RequestError(400, f'Ungültiges JSON in {filename or "Upload"}: {e}')
+	return text
+
+
+def parse_request_body(content_type: str, body: bytes) -> Dict[str, Any]:
+	"""JSON- oder multipart/form-data-Body -> Dict mit plan, testdaten und Optionen."""
+	mime = content_type.split(';', 1)[0].strip().lower()
+	if mime == 'application/json':
+		try:
+			data = json.loads(body.decode('utf-8-sig'))
+		except ValueError as e:
+			raise RequestError(400, f'Ungültiges JSON: {e}')
+		if not isinstance(data, dict):
+			raise RequestError(400, 'JSON-Objekt erwartet')
+		return data
+	if mime == 'multipart/form-data':
+		msg = BytesParser(policy=HTTP).parsebytes(b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+		data: Dict[str, Any] = {}
+		for part in msg.iter_parts():
+			name = part.get_param('name', header='content-disposition')
+			if name:
+				data[name] = _decode_upload(part.get_payload(decode=True) or b'', part.get_filename(), part.get_content_type())
+		return data
+	raise RequestError(400, f'Nicht unterstützter Content-Type: {content_type or "(leer)"}')
+
+
+def validation_args(data: Dict[str, Any]) -> Tuple:
+	if 'plan' not in data or 'testdaten' not in data:
+		raise RequestError(400, 'plan und testdaten sind erforderlich')
+	windows = data.get('windows', list(DEFAULT_WINDOWS))
+	if isinstance(windows, str):
+		windows = [w for w in windows.split(',') if w.strip()]
+	try:
+		for w in windows:
+			parse_window_spec(w)
+		min_gap = int(data.get('min_gap', DEFAULT_MIN_GAP))
+	except (TypeError, ValueError) as e:
+		raise RequestError(400, str(e))
+	backend = data.get('backend', 'python')
+	if backend not in BACKENDS:
+		raise RequestError(400, f"Unbekanntes Backend: {backend} (verfügbar: {', '.join(BACKENDS)})")
+	return _plan_rows(data['plan']), _testdaten_lines(data['testdaten']), list(windows), min_gap, backend
+
+
+# --- HTTP -------------------------------------------------------------------------------
+
+class RequestStats:
+	def __init__(self):
+		self.started = time.time()
+		self.in_flight = 0
+		self.count: Dict[str, int] = {}
+		self.errors: Dict[str, int] = {}
+		self.latencies: Dict[str, Deque[float]] = {}
+
+	def record(self, endpoint: str, status: int, seconds: float) -> None:
+		self.count[endpoint] = self.count.get(endpoint, 0) + 1
+		if status >= 400:
+			self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+		self.latencies.setdefault(endpoint, deque(maxlen=LATENCY_SAMPLES)).append(seconds * 1000)
+
+	def as_dict(self) -> Dict[str, Any]:
+		endpoints = {}
+		for endpoint, samples in sorted(self.latencies.items()):
+			ordered = sorted(samples)
+			endpoints[endpoint] = {
+				'requests': self.count[endpoint],
+				'errors': self.errors.get(endpoint, 0),
+				'latency_ms': {
+					'mean': round(sum(ordered) / len(ordered), 2),
+					'p50': round(ordered[len(ordered) // 2], 2),
+					'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+					'max': round(ordered[-1], 2),
+				},
+			}
+		return {'uptime_s': round(time.time() - self.started, 1), 'in_flight': self.in_flight, 'endpoints': endpoints}
+
+
+class ValidationServer:
+	def __init__(self, executor: ProcessPoolExecutor):
+		self.executor = executor
+		self.stats = RequestStats()
+
+	async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		started = time.perf_counter()
+		endpoint = '-'
+		try:
+			try:
+				method, path, headers, body = await self._read_request(reader)
+				endpoint = f'{method} {path}'
+				status, payload = await self._dispatch(method, path, headers, body)
+			except RequestError as e:
+				status, payload = e.status, {'error': str(e)}
+			except Exception as e:  # Worker-Fehler o. Ä. nicht als Verbindungsabbruch enden lassen
+				status, payload = 500, {'error': f'{type(e).__name__}: {e}'}
+			self.stats.record(endpoint, status, time.perf_counter() - started)
+			self._write_response(writer, status, payload)
+			await writer.drain()
+		except (ConnectionError, asyncio.IncompleteReadError):
+			pass
+		finally:
+			writer.close()
+
+	async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+		request_line = (await reader.readline()).decode('latin-1').strip()
+		parts = request_line.split()
+		if len(parts) != 3:
+			raise RequestError(400, 'Ungültige Anfragezeile')
+		method, target = parts[0].upper(), parts[1]
+		headers: Dict[str, str] = {}
+		while True:
+			line = (await reader.readline()).decode('latin-1')
+			if line in ('\r\n', '\n', ''):
+				break
+			name, _, value = line.partition(':')
+			headers[name.strip().lower()] = value.strip()
+		raw_length = headers.get('content-length', '')
+		# Nur Ziffern: int() nähme auch Vorzeichen, Unterstriche und Leerzeichen an
+		if raw_length and not (raw_length.isascii() and raw_length.isdigit()):
+			raise RequestError(400, f'Ungültige Content-Length: {raw_length}')
+		length = int(raw_length or 0)
+		if length > MAX_BODY_BYTES:
+			raise RequestError(413, f'Anfrage größer als {MAX_BODY_BYTES // (1024 * 1024)} MiB')
+		body = await reader.readexactly(length) if length else b''
+		return method, target.split('?', 1)[0], headers, body
+
+	async def _dispatch(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Optional[Dict]]:
+		if method == 'OPTIONS':
+			return 204, None  # CORS-Preflight der Web-App
+		if path == '/health':
+			return (200, {'status': 'ok'}) if method == 'GET' else (405, {'error': 'GET erwartet'})
+		if path == '/metrics':
+			return (200, self.stats.as_dict()) if method == 'GET' else (405, {'error': 'GET erwartet'})
+		if path == '/validate':
+			if method != 'POST':
+				return 405, {'error': 'POST erwartet'}
+			args = validation_args(parse_request_body(headers.get('content-type', ''), body))
+			self.stats.in_flight += 1
+			try:
+				result = await asyncio.get_running_loop().run_in_executor(self.executor, run_validation, *args)
+			except ValueError as e:  # z. B. ungültiges Datum in den Verhinderungen
+				raise RequestError(400, str(e))
+			finally:
+				self.stats.in_flight -= 1
+			return 200, result
+		return 404, {'error': f'Unbekannter Pfad: {path}'}
+
+	@staticmethod
+	def _write_response(writer: asyncio.StreamWriter, status: int, payload: Optional[Dict]) -> None:
+		body = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+		head = [
+			f'HTTP/1.1 {status} {STATUS_TEXT.get(status, "")}',
+			'Content-Type: application/json; charset=utf-8',
+			f'Content-Length: {len(body)}',
+			'Access-Control-Allow-Origin: *',
+			'Access-Control-Allow-Methods: GET, POST, OPTIONS',
+			'Access-Control-Allow-Headers: Content-Type',
+			'Connection: close',
+		]
+		writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+
+
+async def serve(host: str, port: int, workers: Optional[int], years: List[int]) -> None:
+	with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(years,)) as executor:
+		app = ValidationServer(executor)
+		server = await asyncio.start_server(app.handle, host, port)
+		print(f'Validierungsdienst läuft auf http://{host}:{port} (POST /validate, GET /metrics; Strg+C beendet)', flush=True)
+		async with server:
+			await server.serve_forever()
+
+
+def main(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: Optional[int] = None, years: Optional[List[int]] = None) -> int:
+	try:
+		asyncio.run(serve(host, port, workers, years or [2026]))
+	except KeyboardInterrupt:
+		print('\nbeendet')
+	return 0
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Lokaler HTTP-Dienst zur Plan-Validierung (JSON)')
+	parser.add_argument('--host', default=DEFAULT_HOST, help=f'Adresse (Default: {DEFAULT_HOST}, nur lokal erreichbar)')
+	parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (Default: {DEFAULT_PORT})')
+	parser.add_argument('--workers', type=int, default=None, help='Anzahl Worker-Prozesse (Default: CPU-Anzahl)')
+	parser.add_argument('--years', type=int, nargs='*', default=[2026], help='Kalenderjahre, die die Worker vorab laden')
+	args = parser.parse_args()
+	sys.exit(main(args.host, args.port, args.workers, args.years))
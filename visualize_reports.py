@@ -1,135 +1,288 @@
 #!/usr/bin/env python3
+"""Heatmaps und Diagramme zu den Validator-Ergebnissen.
+
+Die Eingaben der fünf Grafiken sind schlichte Zeilenlisten: aus einem Report-Ordner gelesen
+(render_reports, stdlib-csv) oder direkt aus einem ValidationResult (render_result, ohne
+CSV-Umweg). pandas/seaborn/matplotlib werden erst in render_figure geladen, also nur, wenn
+wirklich gezeichnet wird; mehrere Grafiken entstehen parallel in einem Prozesspool mit dem
+Agg-Backend. Je Ausgabeordner merkt sich FIGURE_MANIFEST den Eingabe-Hash jeder Grafik;
+Grafiken mit unveränderten Eingaben werden übersprungen.
+"""
 import argparse
+import csv
+import hashlib
+import json
 import os
 import sys
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from datetime import datetime
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
 
-sns.set_theme(style="whitegrid")
+import profiling
+from plan_binary import resolve_plan
+from validate_plan import ValidationResult, iter_plan_rows, q4_multi_year
 
 WEEKDAYS_DE = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag"]
+FIGURE_MANIFEST = '.figures.json'
+
+
+class Figure(NamedTuple):
+	name: str
+	filename: str
+	columns: List[str]  # Spalten der Eingabezeilen
+	label: str  # für Skip-Meldungen
+
+
+FIGURES = [
+	Figure('monthly_counts', 'heatmap_monthly_counts.png', ['Monat', 'Abteilung', 'Ist'], 'monthly heatmap'),
+	Figure('monthly_quota_deviation', 'heatmap_monthly_quota_diff.png', ['Monat', 'Abteilung', 'Diff'], 'quota deviation heatmap'),
+	Figure('weekday_distribution', 'heatmap_weekday_distribution.png', ['Abteilungsnummer', 'Wochentag', 'Anzahl'], 'weekday distribution'),
+	Figure('consecutive', 'bars_consecutive_by_department.png', ['Abteilung', 'Folgetage'], 'consecutive bars'),
+	Figure('q4_skew', 'bars_q4_skew.png', ['Abteilung', 'Diff'], 'Q4 skew'),
+]
+FIGURES_BY_NAME = {f.name: f for f in FIGURES}
+
+_renderer_hash: Optional[str] = None
 
 
 def ensure_out(out_dir: str) -> None:
 	os.makedirs(out_dir, exist_ok=True)
 
 
-def save_fig(path: str) -> None:
+# --- Eingaben (ohne pandas) ---
+
+def _csv_rows(path: str, columns: List[str]) -> Optional[List[List]]:
+	"""Spalten columns aus einer Validator-CSV; Zahlen als int, Monat als Text. None, wenn die Datei fehlt."""
+	if not os.path.exists(path):
+		return None
+	with open(path, newline='', encoding='utf-8') as f:
+		return [[row[c] if c == 'Monat' else int(row[c]) for c in columns] for row in csv.DictReader(f, delimiter=';')]
+
+
+def _q4_label(abteilung, jahr=None):
+	"""Balkenbeschriftung: Abteilungsnummer, bei mehrjährigen Plänen "Jahr / Abteilung"."""
+	return int(abteilung) if jahr is None else f"{jahr} / {abteilung}"
+
+
+def _q4_rows(path: str) -> Optional[List[List]]:
+	"""[Beschriftung, Diff] aus validation_q4_skew.csv (Spalte Jahr nur bei mehrjährigen Plänen)."""
+	if not os.path.exists(path):
+		return None
+	with open(path, newline='', encoding='utf-8') as f:
+		return [[_q4_label(row['Abteilung'], row.get('Jahr')), int(row['Diff'])] for row in csv.DictReader(f, delimiter=';')]
+
+
+def weekday_rows(plan_csv: str) -> Optional[List[List]]:
+	"""[Abteilung, Wochentag, Anzahl] für Montag–Freitag aus der Plan-CSV; None, wenn sie fehlt."""
+	if not os.path.exists(plan_csv):
+		return None
+	counts: Counter = Counter()
+	for _, wtag, abt in iter_plan_rows(plan_csv):
+		if wtag in WEEKDAYS_DE and abt.lstrip('-').isdigit():
+			counts[(int(abt), wtag)] += 1
+	return [[num, wtag, n] for (num, wtag), n in sorted(counts.items())]
+
+
+def inputs_from_dir(reports_dir: str, plan_csv: str) -> Dict[str, Optional[List[List]]]:
+	"""Eingaben aller Grafiken aus den CSVs eines Report-Ordners (z. B. tests/vX)."""
+	def path(name: str) -> str:
+		return os.path.join(reports_dir, name)
+
+	return {
+		'monthly_counts': _csv_rows(path('validation_monthly_summary.csv'), ['Monat', 'Abteilung', 'Ist']),
+		'monthly_quota_deviation': _csv_rows(path('validation_monthly_quota_deviation.csv'), ['Monat', 'Abteilung', 'Diff']),
+		'weekday_distribution': weekday_rows(plan_csv),
+		'consecutive': _csv_rows(path('validation_consecutive.csv'), ['Abteilung', 'Folgetage']),
+		'q4_skew': _q4_rows(path('validation_q4_skew.csv')),
+	}
+
+
+def inputs_from_result(result: ValidationResult, plan_csv: Optional[str] = None) -> Dict[str, Optional[List[List]]]:
+	"""Dieselben Eingaben direkt aus den Aggregaten eines Validierungslaufs (gleiche Zeilen wie die CSVs)."""
+	multi_year = q4_multi_year(result.q4_skew_rows)
+	return {
+		'monthly_counts': [[month, num, result.monthly[month][num].get('ist', 0)] for month in sorted(result.monthly) for num in sorted(result.monthly[month])],
+		'monthly_quota_deviation': [[r.monat, r.abteilung, r.diff] for r in result.monthly_quota_dev_rows],
+		'weekday_distribution': weekday_rows(plan_csv) if plan_csv else None,
+		'consecutive': [[a.nummer, result.consecutive_counts.get(a.nummer, 0)] for a in result.abteilungen],
+		'q4_skew': [[_q4_label(r.abteilung, r.jahr if multi_year else None), r.diff] for r in result.q4_skew_rows],
+	}
+
+
+# --- Zeichnen (im Worker-Prozess; schwere Importe erst hier) ---
+
+def _save_fig(plt, path: str) -> None:
 	plt.tight_layout()
-	plt.savefig(path, dpi=160)
+	# Über eine temporäre Datei ersetzen, damit Hardlinks (Snapshot-Cache) nicht überschrieben werden
+	tmp = path[:-4] + '.tmp.png'
+	plt.savefig(tmp, dpi=160)
 	plt.close()
-	print(f"Saved: {path}")
-
-
-def plot_monthly_counts_heatmap(monthly_summary_csv: str, out_dir: str) -> None:
-	if not os.path.exists(monthly_summary_csv):
-		print(f"Skip monthly heatmap; file not found: {monthly_summary_csv}")
-		return
-	df = pd.read_csv(monthly_summary_csv, sep=';')
-	# Erwartete Spalten: Monat;Abteilung;Ist;Favoriten
-	pivot = df.pivot_table(index='Abteilung', columns='Monat', values='Ist', aggfunc='sum', fill_value=0)
-	plt.figure(figsize=(14, max(6, len(pivot) * 0.3)))
-	sns.heatmap(pivot, cmap='Blues', annot=False)
-	plt.title('Heatmap: Einsätze pro Abteilung und Monat (Ist)')
-	plt.xlabel('Monat')
-	plt.ylabel('Abteilung')
-	save_fig(os.path.join(out_dir, 'heatmap_monthly_counts.png'))
-
-
-def plot_monthly_quota_deviation_heatmap(monthly_quota_csv: str, out_dir: str) -> None:
-	if not os.path.exists(monthly_quota_csv):
-		print(f"Skip quota deviation heatmap; file not found: {monthly_quota_csv}")
-		return
-	df = pd.read_csv(monthly_quota_csv, sep=';')
-	# Spalten: Monat;Abteilung;Soll;Ist;Diff
-	pivot = df.pivot_table(index='Abteilung', columns='Monat', values='Diff', aggfunc='sum', fill_value=0)
-	plt.figure(figsize=(14, max(6, len(pivot) * 0.3)))
-	sns.heatmap(pivot, cmap='coolwarm', center=0, annot=False)
-	plt.title('Heatmap: Soll/Ist-Abweichung pro Abteilung und Monat (Diff)')
-	plt.xlabel('Monat')
-	plt.ylabel('Abteilung')
-	save_fig(os.path.join(out_dir, 'heatmap_monthly_quota_diff.png'))
-
-
-def plot_weekday_distribution(plan_csv: str, out_dir: str) -> None:
-	if not os.path.exists(plan_csv):
-		print(f"Skip weekday distribution; plan CSV not found: {plan_csv}")
-		return
-	df = pd.read_csv(plan_csv, sep=';')
-	# Erwartete Spalten: Datum;Wochentag;Abteilungsnummer
-	# Filter nur Montag-Freitag
-	df = df[df['Wochentag'].isin(WEEKDAYS_DE)].copy()
-	# Pivot: Abteilung x Wochentag → count
-	pivot = df.pivot_table(index='Abteilungsnummer', columns='Wochentag', values='Datum', aggfunc='count', fill_value=0)
-	# Spalten sortieren nach Wochentag-Ordnung
-	present_days = [d for d in WEEKDAYS_DE if d in pivot.columns]
-	pivot = pivot[present_days]
-	plt.figure(figsize=(10, max(6, len(pivot) * 0.3)))
-	sns.heatmap(pivot, cmap='Greens', annot=False)
-	plt.title('Heatmap: Wochentags-Verteilung je Abteilung')
-	plt.xlabel('Wochentag')
-	plt.ylabel('Abteilung')
-	save_fig(os.path.join(out_dir, 'heatmap_weekday_distribution.png'))
-
-
-def plot_consecutive_bars(consecutive_csv: str, out_dir: str) -> None:
-	if not os.path.exists(consecutive_csv):
-		print(f"Skip consecutive bars; file not found: {consecutive_csv}")
-		return
-	df = pd.read_csv(consecutive_csv, sep=';')
-	# Spalten: Abteilung;Folgetage
-	df = df.sort_values('Folgetage', ascending=False)
-	plt.figure(figsize=(12, max(5, len(df) * 0.3)))
-	# Verwendung von einheitlicher Farbe statt palette ohne hue, um FutureWarning zu vermeiden
-	sns.barplot(data=df, x='Folgetage', y='Abteilung', color='#d62728')
-	plt.title('Folgetage je Abteilung (benachbarte Arbeitstage)')
-	plt.xlabel('Anzahl Folgetage')
-	plt.ylabel('Abteilung')
-	save_fig(os.path.join(out_dir, 'bars_consecutive_by_department.png'))
-
-
-def plot_q4_skew(q4_csv: str, out_dir: str) -> None:
-	if not os.path.exists(q4_csv):
-		print(f"Skip Q4 skew; file not found: {q4_csv}")
-		return
-	df = pd.read_csv(q4_csv, sep=';')
-	# Spalten: Abteilung;Q4_Ist;Q4_Soll;Diff
-	df = df.sort_values('Diff', key=lambda s: s.abs(), ascending=False)
-	plt.figure(figsize=(12, max(5, len(df) * 0.3)))
-	# Eigene Farbliste je nach Vorzeichen statt palette ohne hue
-	colors = df['Diff'].apply(lambda v: '#d62728' if v > 0 else '#1f77b4').tolist()
-	plt.barh(df['Abteilung'], df['Diff'], color=colors)
-	plt.axvline(0, color='black', linewidth=0.8)
-	plt.title('Q4-Skew: Abweichung Okt–Dez (Ist - Soll) je Abteilung')
-	plt.xlabel('Diff (Ist - Soll)')
-	plt.ylabel('Abteilung')
-	save_fig(os.path.join(out_dir, 'bars_q4_skew.png'))
+	os.replace(tmp, path)
+
+
+def render_figure(name: str, rows: List[List], path: str) -> None:
+	"""Zeichnet die Grafik name aus ihren Eingabezeilen nach path (PNG)."""
+	import matplotlib
+	matplotlib.use('Agg')
+	import matplotlib.pyplot as plt
+	import pandas as pd
+	import seaborn as sns
+
+	sns.set_theme(style="whitegrid")
+	df = pd.DataFrame(rows, columns=FIGURES_BY_NAME[name].columns)
+	if name == 'monthly_counts':
+		pivot = df.pivot_table(index='Abteilung', columns='Monat', values='Ist', aggfunc='sum', fill_value=0)
+		plt.figure(figsize=(14, max(6, len(pivot) * 0.3)))
+		sns.heatmap(pivot, cmap='Blues', annot=False)
+		plt.title('Heatmap: Einsätze pro Abteilung und Monat (Ist)')
+		plt.xlabel('Monat')
+		plt.ylabel('Abteilung')
+	elif name == 'monthly_quota_deviation':
+		pivot = df.pivot_table(index='Abteilung', columns='Monat', values='Diff', aggfunc='sum', fill_value=0)
+		plt.figure(figsize=(14, max(6, len(pivot) * 0.3)))
+		sns.heatmap(pivot, cmap='coolwarm', center=0, annot=False)
+		plt.title('Heatmap: Soll/Ist-Abweichung pro Abteilung und Monat (Diff)')
+		plt.xlabel('Monat')
+		plt.ylabel('Abteilung')
+	elif name == 'weekday_distribution':
+		pivot = df.pivot_table(index='Abteilungsnummer', columns='Wochentag', values='Anzahl', aggfunc='sum', fill_value=0)
+		# Spalten sortieren nach Wochentag-Ordnung
+		pivot = pivot[[d for d in WEEKDAYS_DE if d in pivot.columns]]
+		plt.figure(figsize=(10, max(6, len(pivot) * 0.3)))
+		sns.heatmap(pivot, cmap='Greens', annot=False)
+		plt.title('Heatmap: Wochentags-Verteilung je Abteilung')
+		plt.xlabel('Wochentag')
+		plt.ylabel('Abteilung')
+	elif name == 'consecutive':
+		df = df.sort_values('Folgetage', ascending=False)
+		plt.figure(figsize=(12, max(5, len(df) * 0.3)))
+		# Verwendung von einheitlicher Farbe statt palette ohne hue, um FutureWarning zu vermeiden
+		sns.barplot(data=df, x='Folgetage', y='Abteilung', color='#d62728')
+		plt.title('Folgetage je Abteilung (benachbarte Arbeitstage)')
+		plt.xlabel('Anzahl Folgetage')
+		plt.ylabel('Abteilung')
+	elif name == 'q4_skew':
+		df = df.sort_values('Diff', key=lambda s: s.abs(), ascending=False)
+		plt.figure(figsize=(12, max(5, len(df) * 0.3)))
+		# Eigene Farbliste je nach Vorzeichen statt palette ohne hue
+		colors = ['#d62728' if v > 0 else '#1f77b4' for v in df['Diff']]
+		plt.barh(df['Abteilung'], df['Diff'], color=colors)
+		plt.axvline(0, color='black', linewidth=0.8)
+		plt.title('Q4-Skew: Abweichung Okt–Dez (Ist - Soll) je Abteilung')
+		plt.xlabel('Diff (Ist - Soll)')
+		plt.ylabel('Abteilung')
+	else:
+		raise ValueError(f"Unbekannte Grafik: {name}")
+	_save_fig(plt, path)
+
+
+def _render_timed(name: str, rows: List[List], path: str) -> float:
+	started = time.perf_counter()
+	render_figure(name, rows, path)
+	return time.perf_counter() - started
+
+
+# --- Steuerung ---
+
+def _input_hash(name: str, rows: List[List]) -> str:
+	"""Hash über Eingabezeilen und Quelltext dieses Moduls (neue Zeichenlogik = neue Grafik)."""
+	global _renderer_hash
+	if _renderer_hash is None:
+		with open(os.path.abspath(__file__), 'rb') as f:
+			_renderer_hash = hashlib.sha256(f.read()).hexdigest()
+	payload = json.dumps([name, rows, _renderer_hash], ensure_ascii=False, separators=(',', ':'))
+	return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _read_manifest(out_dir: str) -> Dict[str, str]:
+	try:
+		with open(os.path.join(out_dir, FIGURE_MANIFEST), encoding='utf-8') as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+def _write_manifest(out_dir: str, manifest: Dict[str, str]) -> None:
+	path = os.path.join(out_dir, FIGURE_MANIFEST)
+	with open(path + '.tmp', 'w', encoding='utf-8') as f:
+		json.dump(manifest, f, indent=2, sort_keys=True)
+	os.replace(path + '.tmp', path)
+
+
+def render_inputs(inputs: Dict[str, Optional[List[List]]], out_dir: str, workers: Optional[int] = None, force: bool = False, recorder: Optional[profiling.PhaseRecorder] = None) -> Dict[str, str]:
+	"""Zeichnet alle Grafiken mit geänderten Eingaben; liefert je Grafik 'saved', 'unchanged' oder 'skipped'.
+
+	workers: Prozesse für das Zeichnen (Default: so viele wie Grafiken, höchstens CPU-Anzahl;
+	1 = im aktuellen Prozess). force=True zeichnet auch unveränderte Grafiken neu.
+	"""
+	rec = recorder or profiling.PhaseRecorder()
+	out_dir = os.path.abspath(out_dir)
+	ensure_out(out_dir)
+	manifest = _read_manifest(out_dir)
+	status: Dict[str, str] = {}
+	jobs = []
+	for fig in FIGURES:
+		rows = inputs.get(fig.name)
+		path = os.path.join(out_dir, fig.filename)
+		if not rows:
+			print(f"Skip {fig.label}; {'no data' if rows is not None else 'input not found'}")
+			status[fig.name] = 'skipped'
+			continue
+		key = _input_hash(fig.name, rows)
+		if not force and manifest.get(fig.filename) == key and os.path.exists(path):
+			print(f"Unchanged: {path}")
+			status[fig.name] = 'unchanged'
+			continue
+		jobs.append((fig, rows, path, key))
+
+	workers = workers or min(len(jobs), os.cpu_count() or 1)
+	with rec.phase('zeichnen', rows=len(jobs)):
+		if workers <= 1 or len(jobs) <= 1:
+			seconds = [_render_timed(fig.name, rows, path) for fig, rows, path, _ in jobs]
+		else:
+			with ProcessPoolExecutor(max_workers=workers) as pool:
+				seconds = list(pool.map(_render_timed, *zip(*[(fig.name, rows, path) for fig, rows, path, _ in jobs])))
+	for (fig, _, path, key), s in zip(jobs, seconds):
+		rec.add(f'zeichnen.{fig.name}', s)
+		manifest[fig.filename] = key
+		status[fig.name] = 'saved'
+		print(f"Saved: {path}")
+	if jobs:
+		_write_manifest(out_dir, manifest)
+	return status
+
+
+def render_reports(reports_dir: str, out_dir: Optional[str] = None, plan_csv: Optional[str] = None, recorder: Optional[profiling.PhaseRecorder] = None, workers: Optional[int] = None, force: bool = False) -> Dict[str, str]:
+	"""Erzeugt alle Grafiken für einen Report-Ordner (z. B. tests/vX) aus dessen CSVs."""
+	rec = recorder or profiling.PhaseRecorder()
+	reports_dir = os.path.abspath(reports_dir)
+	with rec.phase('eingaben'):
+		inputs = inputs_from_dir(reports_dir, plan_csv or resolve_plan(os.path.join(reports_dir, 'Jahresdienstplan_2026.csv')))
+	return render_inputs(inputs, out_dir or reports_dir, workers, force, rec)
+
+
+def render_result(result: ValidationResult, out_dir: str, plan_csv: Optional[str] = None, recorder: Optional[profiling.PhaseRecorder] = None, workers: Optional[int] = None, force: bool = False) -> Dict[str, str]:
+	"""Wie render_reports, aber direkt aus einem Validierungsergebnis (Pipeline, ohne CSV-Umweg)."""
+	rec = recorder or profiling.PhaseRecorder()
+	with rec.phase('eingaben'):
+		inputs = inputs_from_result(result, plan_csv)
+	return render_inputs(inputs, out_dir, workers, force, rec)
 
 
 def main() -> int:
 	parser = argparse.ArgumentParser(description='Visualisiere Validator-Reports (Heatmaps/Diagramme).')
 	parser.add_argument('--dir', required=True, help='Verzeichnis mit Reports (z. B. tests/vX)')
-	parser.add_argument('--plan', default=None, help='Pfad zu Plan-CSV (überschreibt auto-Suche)')
+	parser.add_argument('--plan', default=None, help='Pfad zu Plan-CSV oder Binärplan .dpb (überschreibt auto-Suche)')
 	parser.add_argument('--out-dir', default=None, help='Zielordner für Bilder (Default: gleich wie --dir)')
+	parser.add_argument('--workers', type=int, default=None, help='Prozesse für das Zeichnen (Default: eine je Grafik, höchstens CPU-Anzahl; 1 = ohne Pool)')
+	parser.add_argument('--force', action='store_true', help='Auch Grafiken mit unveränderten Eingaben neu zeichnen')
+	profiling.add_arguments(parser)
 	args = parser.parse_args()
 
-	reports_dir = os.path.abspath(args.dir)
-	out_dir = os.path.abspath(args.out_dir or reports_dir)
-	ensure_out(out_dir)
-
-	monthly_summary_csv = os.path.join(reports_dir, 'validation_monthly_summary.csv')
-	monthly_quota_csv = os.path.join(reports_dir, 'validation_monthly_quota_deviation.csv')
-	consecutive_csv = os.path.join(reports_dir, 'validation_consecutive.csv')
-	q4_csv = os.path.join(reports_dir, 'validation_q4_skew.csv')
-	plan_csv = args.plan or os.path.join(reports_dir, 'Jahresdienstplan_2026.csv')
-
-	plot_monthly_counts_heatmap(monthly_summary_csv, out_dir)
-	plot_monthly_quota_deviation_heatmap(monthly_quota_csv, out_dir)
-	plot_weekday_distribution(plan_csv, out_dir)
-	plot_consecutive_bars(consecutive_csv, out_dir)
-	plot_q4_skew(q4_csv, out_dir)
+	rec = profiling.recorder_from_args(args)
+	profiling.run_profiled(args.cprofile, render_reports, args.dir, args.out_dir, args.plan, rec, args.workers, args.force)
+	profiling.report(rec, args, 'visualize_reports', dir=args.dir)
 
 	print('Visualisierung abgeschlossen.')
 	return 0
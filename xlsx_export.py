@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""XLSX-Export ohne Zusatzabhängigkeit: Plan und Validierungsberichte in einer Arbeitsmappe.
+
+XlsxWriter schreibt jedes Tabellenblatt zeilenweise direkt in den Zip-Eintrag (Inline-Strings
+statt Shared-Strings-Tabelle), der Speicherbedarf hängt also nicht von der Zeilenzahl ab. Die
+Verwaltungsdateien ([Content_Types].xml, workbook.xml, Beziehungen, Styles) folgen beim
+Schließen. Alle Einträge tragen einen festen Zeitstempel, gleiche Eingaben ergeben damit eine
+byte-gleiche Datei (wichtig für den Snapshot-Cache).
+
+write_xlsx_report schreibt validation_report.xlsx mit den Blättern Plan, Proportionalität,
+Monate, Monatsquoten und Q4; Datumswerte werden echte Excel-Daten (TT.MM.JJJJ).
+"""
+import argparse
+import os
+import re
+import sys
+import zipfile
+from datetime import date
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Sequence
+from xml.sax.saxutils import escape, quoteattr
+
+from validate_plan import BINARY_PLAN_SUFFIX, ValidationResult, iter_plan_rows, parse_abteilungen_csv, parse_date_de, q4_table, validate
+
+XLSX_REPORT_FILE = 'validation_report.xlsx'
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+EXCEL_EPOCH = date(1899, 12, 30).toordinal()
+CHUNK_CHARS = 1 << 16
+MAX_SHEET_NAME = 31
+STYLE_DATE = 1
+STYLE_HEADER = 2
+
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_NS_PKG = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_XML_HEAD = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_STYLES = (
+	_XML_HEAD + f'<styleSheet xmlns="{_NS}">'
+	'<numFmts count="1"><numFmt numFmtId="164" formatCode="dd.mm.yyyy"/></numFmts>'
+	'<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+	'<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+	'<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+	'<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+	'<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+	'<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+	'<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+	'<cellStyles count="1"><cellStyle name="Standard" xfId="0" builtinId="0"/></cellStyles>'
+	'</styleSheet>'
+)
+
+
+@lru_cache(maxsize=4096)
+def _text_cell(text: str) -> str:
+	"""Inline-String-Zelle; gecacht, weil Wochentage, Monate u. Ä. sich ständig wiederholen."""
+	if not text:
+		return '<c/>'
+	text = _INVALID_XML.sub('', text)
+	space = ' xml:space="preserve"' if text != text.strip() else ''
+	return f'<c t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def _cell(value) -> str:
+	"""Eine Zelle ohne Referenz (Excel zählt Spalten selbst); None/'' bleiben leer."""
+	kind = type(value)
+	if kind is int:
+		return f'<c><v>{value}</v></c>'
+	if kind is str:
+		return _text_cell(value)
+	if kind is date:
+		return f'<c s="{STYLE_DATE}"><v>{value.toordinal() - EXCEL_EPOCH}</v></c>'
+	if value is None:
+		return '<c/>'
+	if isinstance(value, bool):
+		return f'<c t="b"><v>{int(value)}</v></c>'
+	if isinstance(value, (int, float)):
+		return f'<c><v>{value!r}</v></c>'
+	return _text_cell(str(value))
+
+
+def _sheet_name(name: str, taken: Sequence[str]) -> str:
+	base = _INVALID_SHEET_CHARS.sub('_', name).strip("'")[:MAX_SHEET_NAME] or 'Blatt'
+	candidate, n = base, 1
+	while candidate.lower() in (t.lower() for t in taken):
+		n += 1
+		suffix = f" ({n})"
+		candidate = base[:MAX_SHEET_NAME - len(suffix)] + suffix
+	return candidate
+
+
+class XlsxWriter:
+	"""Arbeitsmappe, Blatt für Blatt gestreamt; schreibt nach path.tmp und ersetzt beim Schließen."""
+
+	def __init__(self, path: str):
+		self.path = path
+		parent = os.path.dirname(path)
+		if parent:
+			os.makedirs(parent, exist_ok=True)
+		self._tmp = path + '.tmp'
+		self._zip = zipfile.ZipFile(self._tmp, 'w', zipfile.ZIP_DEFLATED)
+		self.sheets: List[str] = []
+
+	def _open(self, name: str):
+		info = zipfile.ZipInfo(name, ZIP_DATE)
+		info.compress_type = zipfile.ZIP_DEFLATED
+		return self._zip.open(info, 'w', force_zip64=True)
+
+	def _writestr(self, name: str, text: str) -> None:
+		info = zipfile.ZipInfo(name, ZIP_DATE)
+		info.compress_type = zipfile.ZIP_DEFLATED
+		self._zip.writestr(info, text.encode('utf-8'))
+
+	def add_sheet(self, name: str, header: Sequence[str], rows: Iterable[Sequence], widths: Optional[Sequence[float]] = None) -> int:
+		"""Schreibt ein Blatt (Kopfzeile fett und fixiert); liefert die Anzahl der Datenzeilen."""
+		self.sheets.append(_sheet_name(name, self.sheets))
+		count = 0
+		with self._open(f'xl/worksheets/sheet{len(self.sheets)}.xml') as raw:
+			parts = [
+				_XML_HEAD, f'<worksheet xmlns="{_NS}" xmlns:r="{_NS_R}">',
+				'<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>',
+			]
+			if widths:
+				parts.append('<cols>' + ''.join(f'<col min="{i}" max="{i}" width="{w}" customWidth="1"/>' for i, w in enumerate(widths, 1)) + '</cols>')
+			parts.append('<sheetData><row>' + ''.join(f'<c t="inlineStr" s="{STYLE_HEADER}"><is><t>{escape(h)}</t></is></c>' for h in header) + '</row>')
+			size = 0
+			for row in rows:
+				line = '<row>' + ''.join(map(_cell, row)) + '</row>'
+				parts.append(line)
+				size += len(line)
+				count += 1
+				if size >= CHUNK_CHARS:
+					raw.write(''.join(parts).encode('utf-8'))
+					parts, size = [], 0
+			parts.append('</sheetData></worksheet>')
+			raw.write(''.join(parts).encode('utf-8'))
+		return count
+
+	def close(self) -> None:
+		n = len(self.sheets)
+		sheets = ''.join(f'<sheet name={quoteattr(name)} sheetId="{i}" r:id="rId{i}"/>' for i, name in enumerate(self.sheets, 1))
+		self._writestr('xl/workbook.xml', _XML_HEAD + f'<workbook xmlns="{_NS}" xmlns:r="{_NS_R}"><sheets>{sheets}</sheets></workbook>')
+		rels = ''.join(f'<Relationship Id="rId{i}" Type="{_NS_R}/worksheet" Target="worksheets/sheet{i}.xml"/>' for i in range(1, n + 1))
+		rels += f'<Relationship Id="rId{n + 1}" Type="{_NS_R}/styles" Target="styles.xml"/>'
+		self._writestr('xl/_rels/workbook.xml.rels', _XML_HEAD + f'<Relationships xmlns="{_NS_PKG}">{rels}</Relationships>')
+		self._writestr('xl/styles.xml', _STYLES)
+		self._writestr('_rels/.rels', _XML_HEAD + f'<Relationships xmlns="{_NS_PKG}"><Relationship Id="rId1" Type="{_NS_R}/officeDocument" Target="xl/workbook.xml"/></Relationships>')
+		overrides = ''.join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>' for i in range(1, n + 1))
+		self._writestr('[Content_Types].xml', _XML_HEAD + (
+			'<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+			'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+			'<Default Extension="xml" ContentType="application/xml"/>'
+			'<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+			'<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+			f'{overrides}</Types>'
+		))
+		self._zip.close()
+		os.replace(self._tmp, self.path)
+
+	def discard(self) -> None:
+		self._zip.close()
+		if os.path.exists(self._tmp):
+			os.remove(self._tmp)
+
+	def __enter__(self) -> 'XlsxWriter':
+		return self
+
+	def __exit__(self, exc_type, *exc) -> None:
+		if exc_type is None:
+			self.close()
+		else:
+			self.discard()
+
+
+def plan_sheet_rows(plan_path: str) -> Iterator[List]:
+	"""Planzeilen (Plan-CSV oder Binärplan) als [Datum, Wochentag, Abteilung]; gestreamt, unlesbare Werte bleiben Text."""
+	if plan_path.endswith(BINARY_PLAN_SUFFIX):
+		from plan_binary import iter_binary_entries
+		yield from ([d, weekday_name, num] for d, weekday_name, num in iter_binary_entries(plan_path))
+		return
+	for datum, wochentag, abt in iter_plan_rows(plan_path):
+		try:
+			d = parse_date_de(datum)
+		except (ValueError, TypeError):
+			d = datum
+		try:
+			num = int(abt)
+		except ValueError:
+			num = abt
+		yield [d, wochentag, num]
+
+
+def write_xlsx_report(result: ValidationResult, out_dir: str, plan_path: Optional[str] = None) -> str:
+	"""XLSX-Sink: validation_report.xlsx nach out_dir (mit Planblatt, falls plan_path angegeben)."""
+	path = os.path.join(out_dir, XLSX_REPORT_FILE)
+	with XlsxWriter(path) as book:
+		if plan_path:
+			book.add_sheet('Plan', ['Datum', 'Wochentag', 'Abteilungsnummer'], plan_sheet_rows(plan_path), widths=(12, 12, 18))
+		book.add_sheet('Proportionalität', ['Abteilung', 'Ziel', 'Ist', 'Diff', 'Folgetage', 'Lieblingstage'], (
+			[r.abteilung, r.ziel, r.ist, r.diff, result.consecutive_counts.get(r.abteilung, 0), result.favorite_hits.get(r.abteilung, 0)]
+			for r in result.deviations
+		))
+		book.add_sheet('Monate', ['Monat', 'Abteilung', 'Ist', 'Favoriten'], (
+			[month, num, m.get('ist', 0), m.get('fav', 0)]
+			for month in sorted(result.monthly) for num, m in sorted(result.monthly[month].items())
+		))
+		book.add_sheet('Monatsquoten', ['Monat', 'Abteilung', 'Soll', 'Ist', 'Diff'], result.monthly_quota_dev_rows)
+		book.add_sheet('Q4', *q4_table(result.q4_skew_rows))
+	return path
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Plan und Validierungsberichte als XLSX-Arbeitsmappe exportieren')
+	parser.add_argument('plan_csv', help='Plan-CSV oder Binärplan (.dpb)')
+	parser.add_argument('testdaten_csv', help='Testdaten.csv')
+	parser.add_argument('--out-dir', default='.', help='Zielordner für validation_report.xlsx')
+	args = parser.parse_args()
+	try:
+		res = validate(args.plan_csv, parse_abteilungen_csv(args.testdaten_csv))
+		print(f"XLSX gespeichert: {write_xlsx_report(res, args.out_dir, args.plan_csv)}")
+	except (OSError, ValueError) as e:
+		print(f"Fehler: {e}", file=sys.stderr)
+		sys.exit(1)